@@ -11,14 +11,21 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import hashlib
 import json
-from typing import Optional
+import re
+from collections import OrderedDict
+from contextlib import contextmanager
+from threading import Lock
+from typing import Iterator, Optional, Tuple, Union
 
 from iconcommons.logger import Logger
 from iconservice.base.address import Address
 from iconservice.icon_constant import DATA_BYTE_ORDER, DEFAULT_BYTE_SIZE
 
+from tbears.block_manager.block_codec import Encoding, encode, decode, is_compact, to_json_bytes
 from tbears.block_manager.tbears_db import TbearsDB
+from tbears.block_manager.transaction import Transaction, get_tx_hash, get_tx_data, get_tx_bytes
 
 LOG_BLOCK = 'BLOCK'
 
@@ -30,13 +37,203 @@ class DbPrefix(object):
     BLOCK_INDEX = b'blockIndex|'
     BLOCK_HEIGHT = b'blockHeight|'
     PREV_BLOCK = b'prevBlockHash|'
+    # address(21) + block height(8) + transaction index(4) -> transaction hash
+    ADDRESS_TX = b'addressTx|'
+    # height of the first block not pruned
+    PRUNED_HEIGHT = b'prunedHeight|'
+    # SCORE address(21) + event digest(8) + block height(8) + transaction index(4) + log index(4)
+    # -> transaction hash
+    LOG_INDEX = b'logIndex|'
+    # height of the first block in log index
+    LOG_INDEX_HEIGHT = b'logIndexHeight|'
+    # transaction hash of pruned block -> block height. kept for duplicate check
+    PRUNED_TX = b'prunedTx|'
+
+
+# rows not read through cache
+UNCACHED_PREFIXES = (DbPrefix.BLOCK_HEIGHT, DbPrefix.PREV_BLOCK, DbPrefix.ADDRESS_TX, DbPrefix.PRUNED_HEIGHT,
+                     DbPrefix.LOG_INDEX, DbPrefix.LOG_INDEX_HEIGHT, DbPrefix.PRUNED_TX)
+# rows removed by pruning
+PRUNED_PREFIXES = (DbPrefix.TX, DbPrefix.TXRESULT, DbPrefix.ADDRESS_TX, DbPrefix.LOG_INDEX, DbPrefix.BLOCK)
+
+ADDRESS_TX_PAGE_SIZE = 10
+# number of blocks read at once by iter_blocks()
+BLOCK_RANGE_CHUNK_SIZE = 100
+# number of blocks pruned in a write batch
+BLOCK_PRUNE_BATCH_SIZE = 100
+# compact pruned ranges every N pruned blocks
+BLOCK_PRUNE_COMPACTION_INTERVAL = 1000
+_ADDRESS = re.compile('(hx|cx)[0-9a-f]{40}')
+# estimated memory of decoded value per byte of raw value. Python dicts and strings are several times bigger
+DECODED_SIZE_FACTOR = 4
+
+
+class BlockCache(object):
+    """
+    Size-aware LRU cache of DB rows.
+    Keeps the raw value and the decoded value, which is made on first read. Decoded values must not be modified.
+    Decoded value is charged DECODED_SIZE_FACTOR times the raw value size
+    """
+    def __init__(self, capacity: int = 0):
+        """
+        :param capacity: maximum sum of key, raw value and estimated decoded value sizes in bytes. 0 disables cache
+        """
+        # key -> [raw value, decoded value]
+        self._entries: OrderedDict = OrderedDict()
+        self._capacity: int = capacity
+        self._size: int = 0
+        self._lock = Lock()
+        # incremented on every write so that a value read from DB before the write is not cached
+        self._generation: int = 0
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, key: bytes) -> Optional[list]:
+        """
+        Get cache entry
+        :param key: DB key
+        :return: [raw value, decoded value]. decoded value is None if not decoded yet
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry
+
+    def peek(self, key: bytes) -> Optional[list]:
+        """
+        Get cache entry without counting hits and misses or updating the LRU order
+        :param key: DB key
+        :return: [raw value, decoded value]. decoded value is None if not decoded yet
+        """
+        with self._lock:
+            return self._entries.get(key)
+
+    def put(self, key: bytes, value: bytes, decoded: object = None, generation: Optional[int] = None) -> list:
+        """
+        Put cache entry. Least recently used entries are evicted if the cache is full
+        :param key: DB key
+        :param value: raw value
+        :param decoded: decoded value
+        :param generation: generation read before the value was read from DB.
+        Entry is not put if the cache has been written since then. None for a written value
+        :return: cache entry
+        """
+        entry = [value, decoded]
+        size = self._get_entry_size(key, entry)
+        with self._lock:
+            if generation is None:
+                self._generation += 1
+            elif generation != self._generation:
+                return entry
+
+            old_entry = self._entries.pop(key, None)
+            if old_entry is not None:
+                self._size -= self._get_entry_size(key, old_entry)
+            if size > self._capacity:
+                return entry
+
+            self._entries[key] = entry
+            self._size += size
+            self._evict()
+
+        return entry
+
+    def set_decoded(self, key: bytes, entry: list, decoded: object):
+        """
+        Set decoded value of cache entry and charge its estimated size
+        :param key: DB key
+        :param entry: cache entry returned by get() or put()
+        :param decoded: decoded value
+        :return:
+        """
+        with self._lock:
+            if entry[1] is not None:
+                return
+
+            entry[1] = decoded
+            # entry may be evicted already
+            if self._entries.get(key) is not entry:
+                return
+
+            self._size += len(entry[0]) * DECODED_SIZE_FACTOR
+            if self._size > self._capacity:
+                # entry in use is evicted after the others
+                self._entries.move_to_end(key)
+                self._evict()
+
+    def delete(self, key: bytes):
+        with self._lock:
+            self._generation += 1
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._size -= self._get_entry_size(key, entry)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._size = 0
+
+    def _evict(self):
+        while self._size > self._capacity:
+            old_key, old_entry = self._entries.popitem(last=False)
+            self._size -= self._get_entry_size(old_key, old_entry)
+
+    @staticmethod
+    def _get_entry_size(key: bytes, entry: list) -> int:
+        size = len(key) + len(entry[0])
+        if entry[1] is not None:
+            size += len(entry[0]) * DECODED_SIZE_FACTOR
+        return size
 
 
 class Block(object):
-    def __init__(self, db_path: str):
-        self._db: TbearsDB = TbearsDB(TbearsDB.make_db(db_path))
+    def __init__(self, db_path: str, cache_size: int = 0, encoding: str = Encoding.JSON, db_options: dict = None,
+                 log_index: bool = False):
+        """
+        :param db_path: DB path
+        :param cache_size: size of block cache in bytes. 0 disables cache
+        :param encoding: encoding of transaction, transaction result and block values to write.
+        Values are read regardless of encoding
+        :param db_options: LevelDB options. See TbearsDB.make_db()
+        :param log_index: write index of event logs by SCORE address and event signature
+        """
+        if encoding not in Encoding.ALL:
+            raise ValueError(f'Invalid block DB encoding: {encoding}')
+
+        self._db: TbearsDB = TbearsDB(TbearsDB.make_db(db_path, options=db_options))
+        self._cache: BlockCache = BlockCache(capacity=cache_size)
+        self._encoding: str = encoding
         self._block_height = -1
         self._prev_block_hash = None
+        # genesis block is never pruned
+        self._pruned_height = 1
+        self._pruned_since_compaction = 0
+        self._log_index: bool = log_index
+        self._log_index_height: Optional[int] = None
+        # rows and block information staged in unit of work
+        self._batch_rows: Optional[list] = None
+        self._batch_block_info: Optional[dict] = None
         self._peer_id: str = str(Address.from_string("hx6e1dd0d4432620778b54b2bbc21ac3df961adf89"))
 
         self.load_block_info()
@@ -48,6 +245,88 @@ class Block(object):
     @property
     def peer_id(self):
         return self._peer_id
+
+    @property
+    def cache(self) -> 'BlockCache':
+        return self._cache
+
+    @property
+    def encoding(self) -> str:
+        return self._encoding
+
+    @contextmanager
+    def batch(self):
+        """
+        Unit of work. Writes in the context are committed in a single write batch when the context exits.
+        Cache, block height and previous block hash are updated after the commit.
+        Nothing is written if an exception is raised. Nested context joins the outer one
+        """
+        if self._batch_rows is not None:
+            yield
+            return
+
+        self._batch_rows = []
+        self._batch_block_info = {}
+        try:
+            yield
+            rows, block_info = self._batch_rows, self._batch_block_info
+            if rows:
+                self.db.write_rows(rows)
+        finally:
+            self._batch_rows = None
+            self._batch_block_info = None
+
+        for key, value in rows:
+            if value is None:
+                self._cache.delete(key)
+            elif not key.startswith(UNCACHED_PREFIXES):
+                self._cache.put(key, value)
+        self._block_height = block_info.get('height', self._block_height)
+        self._prev_block_hash = block_info.get('hash', self._prev_block_hash)
+        self._pruned_height = block_info.get('pruned_height', self._pruned_height)
+        self._log_index_height = block_info.get('log_index_height', self._log_index_height)
+
+    def _put(self, key: bytes, value: bytes):
+        with self.batch():
+            self._batch_rows.append((key, value))
+
+    def _delete(self, key: bytes):
+        with self.batch():
+            self._batch_rows.append((key, None))
+
+    def _get(self, key: bytes) -> Optional[bytes]:
+        """
+        Get raw value from cache or DB
+        :param key: DB key
+        :return: raw value
+        """
+        entry = self._cache.get(key)
+        if entry is not None:
+            return entry[0]
+
+        generation = self._cache.generation
+        value = self.db.get(key)
+        if value is not None:
+            self._cache.put(key, value, generation=generation)
+        return value
+
+    def _get_decoded(self, key: bytes) -> Optional[dict]:
+        """
+        Get decoded value from cache or DB. Value is decoded only once while it is cached
+        :param key: DB key
+        :return: decoded value
+        """
+        entry = self._cache.get(key)
+        if entry is None:
+            generation = self._cache.generation
+            value = self.db.get(key)
+            if value is None:
+                return None
+            entry = self._cache.put(key, value, generation=generation)
+
+        if entry[1] is None:
+            self._cache.set_decoded(key, entry, decode(entry[0]))
+        return entry[1]
     
     def load_block_info(self):
         """
@@ -63,21 +342,44 @@ class Block(object):
         if byte_prev_block_hash is not None:
             self._prev_block_hash = bytes.hex(byte_prev_block_hash)
 
+        byte_pruned_height = self.db.get(DbPrefix.PRUNED_HEIGHT)
+        if byte_pruned_height is not None:
+            self._pruned_height = int(byte_pruned_height.decode())
+
+        byte_log_index_height = self.db.get(DbPrefix.LOG_INDEX_HEIGHT)
+        if byte_log_index_height is not None:
+            if self._log_index:
+                self._log_index_height = int(byte_log_index_height.decode())
+            else:
+                # log index has a gap from now on. it restarts from the next block when enabled again
+                self.db.delete(DbPrefix.LOG_INDEX_HEIGHT)
+
     @property
     def block_height(self):
         return self._block_height
 
     def increase_block_height(self):
-        self._block_height += 1
-        self.db.put(DbPrefix.BLOCK_HEIGHT, str(self._block_height).encode())
+        with self.batch():
+            block_height = self._batch_block_info.get('height', self._block_height) + 1
+            self._batch_block_info['height'] = block_height
+            self._put(DbPrefix.BLOCK_HEIGHT, str(block_height).encode())
+
+    @property
+    def pruned_height(self) -> int:
+        """
+        Height of the first block which is not pruned. Blocks below it keep header only
+        :return:
+        """
+        return self._pruned_height
 
     @property
     def prev_block_hash(self):
         return self._prev_block_hash
 
     def set_prev_block_hash(self, block_hash: str):
-        self._prev_block_hash = block_hash
-        self.db.put(DbPrefix.PREV_BLOCK, bytes.fromhex(self._prev_block_hash))
+        with self.batch():
+            self._batch_block_info['hash'] = block_hash
+            self._put(DbPrefix.PREV_BLOCK, bytes.fromhex(block_hash))
 
     def commit_block(self, prev_block_hash: str):
         """
@@ -85,8 +387,9 @@ class Block(object):
         :param prev_block_hash:
         :return:
         """
-        self.increase_block_height()
-        self.set_prev_block_hash(block_hash=prev_block_hash)
+        with self.batch():
+            self.increase_block_height()
+            self.set_prev_block_hash(block_hash=prev_block_hash)
 
     def save_transactions(self, tx_list: list, block_hash: str):
         """
@@ -99,14 +402,23 @@ class Block(object):
         if len(tx_list) == 0:
             return
 
-        # write transaction with batch
-        with self.db.create_write_batch() as wb:
+        # write transaction and address index with batch
+        block_height = self.block_height + 1
+        with self.batch():
             for i, tx in enumerate(tx_list):
-                key, value = self._get_tx_value(i, tx['txHash'], tx, block_hash, self.block_height + 1)
-                self.db.write_batch(write_batch=wb, key=key, value=value)
+                tx_hash = get_tx_hash(tx)
+                key, value = self._get_tx_value(i, tx_hash, tx, block_hash, block_height, self._encoding)
+                self._put(key, value)
+
+                tx_data = get_tx_data(tx)
+                for address in {tx_data.get('from'), tx_data.get('to')}:
+                    address_key = self._get_address_key(address)
+                    if address_key is not None:
+                        self._put(address_key + self._get_tx_position(block_height, i), bytes.fromhex(tx_hash))
 
     @staticmethod
-    def _get_tx_value(index: int, k: str, v: dict, block_hash: str, block_height: int):
+    def _get_tx_value(index: int, k: str, v: Union['Transaction', dict], block_hash: str, block_height: int,
+                      encoding: str = Encoding.JSON):
         """
         Get transaction key, value bytes data for DB writing
         :param index: transaction index
@@ -114,18 +426,106 @@ class Block(object):
         :param v: value
         :param block_hash: block hash
         :param block_height: block height
+        :param encoding: value encoding
         :return:
         """
         key = DbPrefix.TX + bytes.fromhex(k)
 
-        value = {
-            'transaction': v,
-            'tx_index': hex(index),
-            'block_height': hex(block_height),
-            'block_hash': f'0x{block_hash}'
-        }
+        if encoding != Encoding.JSON:
+            value = {
+                'transaction': get_tx_data(v),
+                'tx_index': hex(index),
+                'block_height': hex(block_height),
+                'block_hash': f'0x{block_hash}'
+            }
+            return key, encode(value, encoding)
 
-        return key, json.dumps(value).encode()
+        # same as json.dumps() of the value dictionary. encoded transaction is reused
+        value = b'{"transaction": ' + get_tx_bytes(v) + \
+                f', "tx_index": "{hex(index)}", "block_height": "{hex(block_height)}", ' \
+                f'"block_hash": "0x{block_hash}"}}'.encode()
+
+        return key, value
+
+    @staticmethod
+    def _get_address_bytes(address: str) -> Optional[bytes]:
+        """
+        Get address in key of index. type(1) + address(20)
+        :param address: EOA or contract address
+        :return: address bytes. None if address is invalid
+        """
+        if not isinstance(address, str) or not _ADDRESS.fullmatch(address):
+            return None
+
+        address_type = b'\x00' if address[0] == 'h' else b'\x01'
+        return address_type + bytes.fromhex(address[2:])
+
+    @staticmethod
+    def _get_address_key(address: str) -> Optional[bytes]:
+        """
+        Get key prefix of address index
+        :param address: EOA or contract address
+        :return: key prefix. None if address is invalid
+        """
+        address_bytes = Block._get_address_bytes(address)
+        if address_bytes is None:
+            return None
+
+        return DbPrefix.ADDRESS_TX + address_bytes
+
+    @staticmethod
+    def _get_log_key(address: str, event: str) -> Optional[bytes]:
+        """
+        Get key prefix of log index
+        :param address: SCORE address
+        :param event: event signature
+        :return: key prefix. None if address or event is invalid
+        """
+        address_bytes = Block._get_address_bytes(address)
+        if address_bytes is None or not isinstance(event, str):
+            return None
+
+        return DbPrefix.LOG_INDEX + address_bytes + hashlib.sha3_256(event.encode()).digest()[:8]
+
+    def _get_log_index_rows(self, tx_result: dict, block_height: int, tx_index: int) -> Iterator[bytes]:
+        """
+        Get keys of log index for event logs of transaction result
+        :param tx_result: transaction result
+        :param block_height: block height of transaction result
+        :param tx_index: transaction index of transaction result
+        :return: keys
+        """
+        for log_index, event_log in enumerate(tx_result.get('eventLogs') or []):
+            indexed = event_log.get('indexed')
+            log_key = self._get_log_key(event_log.get('scoreAddress'), indexed[0] if indexed else None)
+            if log_key is not None:
+                yield log_key + self._get_tx_position(block_height, tx_index) + log_index.to_bytes(4, 'big')
+
+    @staticmethod
+    def _get_tx_position(block_height: int, tx_index: int) -> bytes:
+        return block_height.to_bytes(8, 'big') + tx_index.to_bytes(4, 'big')
+
+    def get_tx_by_address(self, address: str, index: int = 0,
+                          count: int = ADDRESS_TX_PAGE_SIZE) -> Tuple[list, int]:
+        """
+        Get hashes of transactions sent from or to the address in block order
+        :param address: EOA or contract address
+        :param index: position of the first transaction. 0 for the first page or next index of the previous page
+        :param count: maximum number of transactions
+        :return: transaction hashes and next index. next index is 0 if there are no more transactions
+        """
+        address_key = self._get_address_key(address)
+        if address_key is None or not 0 <= index < 1 << 96:
+            return [], 0
+
+        tx_hashes = []
+        start = address_key + index.to_bytes(12, 'big')
+        for key, value in self.db.iterator(start=start, stop=address_key + b'\xff' * 13):
+            if len(tx_hashes) >= count:
+                return tx_hashes, int.from_bytes(key[-12:], 'big')
+            tx_hashes.append(f'0x{value.hex()}')
+
+        return tx_hashes, 0
 
     def save_txresult(self, tx_hash: str, tx_result):
         """
@@ -135,7 +535,7 @@ class Block(object):
         :return:
         """
         Logger.debug(f'save_txresult:{tx_result}', LOG_BLOCK)
-        self.db.put(DbPrefix.TXRESULT + bytes.fromhex(tx_hash), json.dumps(tx_result).encode())
+        self._put(DbPrefix.TXRESULT + bytes.fromhex(tx_hash), encode(tx_result, self._encoding))
 
     def save_txresults(self, tx_results: list, new_block_hash: str):
         """
@@ -146,17 +546,60 @@ class Block(object):
         """
         Logger.debug(f'save_txresults:{tx_results}', LOG_BLOCK)
 
-        # write transaction result with batch
-        with self.db.create_write_batch() as wb:
-            for tx_result in tx_results:
+        # write transaction result and log index with batch
+        with self.batch():
+            for i, tx_result in enumerate(tx_results):
                 # key from transaction hash
-                key = DbPrefix.TXRESULT + bytes.fromhex(tx_result.get('txHash'))
+                tx_hash = bytes.fromhex(tx_result.get('txHash'))
+                key = DbPrefix.TXRESULT + tx_hash
 
                 # get value from transaction result
                 tx_result['blockHash'] = new_block_hash
-                value = json.dumps(tx_result).encode()
+                value = encode(tx_result, self._encoding)
+
+                self._put(key, value)
 
-                self.db.write_batch(write_batch=wb, key=key, value=value)
+                if self._log_index:
+                    self._put_log_index(tx_result, tx_hash, i)
+
+    def _put_log_index(self, tx_result: dict, tx_hash: bytes, tx_index: int):
+        block_height = int(tx_result.get('blockHeight', hex(self.block_height + 1)), 16)
+        tx_index = int(tx_result.get('txIndex', hex(tx_index)), 16)
+
+        if self._batch_block_info.get('log_index_height', self._log_index_height) is None:
+            self._batch_block_info['log_index_height'] = block_height
+            self._put(DbPrefix.LOG_INDEX_HEIGHT, str(block_height).encode())
+
+        for key in self._get_log_index_rows(tx_result, block_height, tx_index):
+            self._put(key, tx_hash)
+
+    def is_log_indexed(self, block_height: int) -> bool:
+        """
+        Check whether log index covers blocks from the height
+        :param block_height: block height
+        :return: True if log index is enabled and written since the height
+        """
+        return self._log_index and self._log_index_height is not None and self._log_index_height <= block_height
+
+    def iter_log_index(self, address: str, event: str, start: int, end: int) -> Iterator[Tuple[int, int, int, str]]:
+        """
+        Iterate log index of the SCORE address and event signature in the height range.
+        Event signature is stored as a digest. Check the event log of the entry
+        :param address: SCORE address
+        :param event: event signature
+        :param start: first block height
+        :param end: last block height
+        :return: iterator of block height, transaction index, log index and transaction hash
+        """
+        log_key = self._get_log_key(address, event)
+        if log_key is None or start < 0 or end < start:
+            return
+
+        for key, value in self.db.iterator(start=log_key + start.to_bytes(8, 'big'),
+                                           stop=log_key + (end + 1).to_bytes(8, 'big')):
+            position = key[len(log_key):]
+            yield int.from_bytes(position[:8], 'big'), int.from_bytes(position[8:12], 'big'), \
+                int.from_bytes(position[12:], 'big'), value.hex()
 
     def save_txresults_legacy(self, tx_list: list, results: dict):
         """
@@ -170,18 +613,18 @@ class Block(object):
             return
 
         # write transaction result with batch
-        with self.db.create_write_batch() as wb:
+        with self.batch():
             for tx in tx_list:
-                tx_hash = tx['txHash']
+                tx_hash = get_tx_hash(tx)
                 # key from transaction hash
                 key = DbPrefix.TXRESULT + bytes.fromhex(tx_hash)
 
                 # get value from transaction result dict by tx hash
                 tx_result = results.get(tx_hash, "")
                 tx_result['txHash'] = f'0x{tx_hash}'
-                value = json.dumps(tx_result).encode()
+                value = encode(tx_result, self._encoding)
 
-                self.db.write_batch(write_batch=wb, key=key, value=value)
+                self._put(key, value)
 
     def save_block(self, block: dict):
         """
@@ -190,22 +633,45 @@ class Block(object):
         block_hash = block['hash']
         block_height = block['height']
         # save block
-        self.db.put(DbPrefix.BLOCK + bytes.fromhex(block_hash), json.dumps(block).encode())
+        if self._encoding == Encoding.JSON:
+            value = self._dumps_block(block)
+        else:
+            value = encode(dict(block, transactions=[get_tx_data(tx) for tx in block['transactions']]),
+                           self._encoding)
+        with self.batch():
+            self._put(DbPrefix.BLOCK + bytes.fromhex(block_hash), value)
 
-        # save block height/hash for block query request
-        self.db.put(DbPrefix.BLOCK_INDEX + block_height.to_bytes(DEFAULT_BYTE_SIZE, DATA_BYTE_ORDER),
-                    bytes.fromhex(block_hash))
+            # save block height/hash for block query request
+            self._put(DbPrefix.BLOCK_INDEX + block_height.to_bytes(DEFAULT_BYTE_SIZE, DATA_BYTE_ORDER),
+                      bytes.fromhex(block_hash))
 
         Logger.debug(f'save block : block_height:{block_height}, block_hash: {block_hash}, block: {block}', LOG_BLOCK)
 
+    @staticmethod
+    def _dumps_block(block: dict) -> bytes:
+        """
+        Encode block to JSON in the same format as json.dumps(). encoded transactions are reused
+        :param block: block data
+        :return: JSON bytes
+        """
+        items = []
+        for key, value in block.items():
+            if key == 'transactions' and isinstance(value, list):
+                encoded = b'[' + b', '.join(get_tx_bytes(tx) for tx in value) + b']'
+            else:
+                encoded = json.dumps(value).encode()
+            items.append(json.dumps(key).encode() + b': ' + encoded)
+
+        return b'{' + b', '.join(items) + b'}'
+
     def get_last_block(self) -> Optional[dict]:
         """
         Get last block information
         :return: block information
         """
         # get block hash from block height/hash DB
-        block_hash: bytes = self.db.get(DbPrefix.BLOCK_INDEX +
-                                        self.block_height.to_bytes(DEFAULT_BYTE_SIZE, DATA_BYTE_ORDER))
+        block_hash: bytes = self._get(DbPrefix.BLOCK_INDEX +
+                                      self.block_height.to_bytes(DEFAULT_BYTE_SIZE, DATA_BYTE_ORDER))
         if block_hash is None:
             return None
 
@@ -219,13 +685,84 @@ class Block(object):
         :return: block information
         """
         # get block hash from block height/hash DB
-        block_hash: bytes = self.db.get(DbPrefix.BLOCK_INDEX + block_height.to_bytes(DEFAULT_BYTE_SIZE, DATA_BYTE_ORDER))
+        block_hash: bytes = self._get(DbPrefix.BLOCK_INDEX + block_height.to_bytes(DEFAULT_BYTE_SIZE, DATA_BYTE_ORDER))
         if block_hash is None:
             return None
 
         # get block Info.
         return self._get_block_by_hash(block_hash=block_hash)
 
+    def get_last_block_raw(self) -> Optional[Tuple[str, bytes]]:
+        """
+        Get last block in JSON bytes without decoding stored value
+        :return: block hash and block information in JSON
+        """
+        return self.get_block_raw_by_height(self.block_height)
+
+    def get_block_raw_by_height(self, block_height: int) -> Optional[Tuple[str, bytes]]:
+        """
+        Get block in JSON bytes by height without decoding stored value. Block hash is read from block index
+        :param block_height: block height
+        :return: block hash and block information in JSON
+        """
+        if block_height < 0:
+            return None
+
+        block_hash: bytes = self._get(DbPrefix.BLOCK_INDEX + block_height.to_bytes(DEFAULT_BYTE_SIZE, DATA_BYTE_ORDER))
+        if block_hash is None:
+            return None
+
+        return self._get_block_raw(block_hash)
+
+    def get_block_raw_by_hash(self, block_hash: str) -> Optional[Tuple[str, bytes]]:
+        """
+        Get block in JSON bytes by hash without decoding stored value
+        :param block_hash: block hash
+        :return: block hash and block information in JSON
+        """
+        return self._get_block_raw(bytes.fromhex(block_hash))
+
+    def _get_block_raw(self, block_hash: bytes) -> Optional[Tuple[str, bytes]]:
+        value = self._get(DbPrefix.BLOCK + block_hash)
+        if value is None:
+            return None
+
+        # JSON value is returned as it is. compact value is transcoded
+        return block_hash.hex(), to_json_bytes(value)
+
+    def iter_blocks(self, start: int = 0, end: int = None, raw: bool = False,
+                    chunk_size: int = BLOCK_RANGE_CHUNK_SIZE) -> Iterator[Union[dict, bytes]]:
+        """
+        Iterate blocks in the height range with a range scan of block index.
+        Blocks are read from DB by chunk without filling cache, so memory usage is bounded by the chunk size
+        :param start: first block height
+        :param end: last block height. last block if None
+        :param raw: yield JSON bytes instead of decoded block
+        :param chunk_size: number of blocks read at once
+        :return: iterator of blocks in height order
+        """
+        if end is None:
+            end = self.block_height
+        if start < 0 or end < start:
+            return
+
+        stop = DbPrefix.BLOCK_INDEX + (end + 1).to_bytes(DEFAULT_BYTE_SIZE, DATA_BYTE_ORDER)
+        index = self.db.iterator(start=DbPrefix.BLOCK_INDEX + start.to_bytes(DEFAULT_BYTE_SIZE, DATA_BYTE_ORDER),
+                                 stop=stop)
+        keys = []
+        for _, block_hash in index:
+            keys.append(DbPrefix.BLOCK + block_hash)
+            if len(keys) >= chunk_size:
+                yield from self._get_blocks(keys, raw)
+                keys = []
+        if keys:
+            yield from self._get_blocks(keys, raw)
+
+    def _get_blocks(self, keys: list, raw: bool) -> Iterator[Union[dict, bytes]]:
+        for value in self.db.get_many(keys):
+            if value is not None:
+                yield to_json_bytes(value) if raw else decode(value)
+
     def get_block_by_hash(self, block_hash: str) -> Optional[dict]:
         """
         Get block information by hash
@@ -243,10 +780,9 @@ class Block(object):
         """
         try:
             # get block data from DB
-            block: bytes = self.db.get(DbPrefix.BLOCK + block_hash)
-            if block is None:
+            block_json = self._get_decoded(DbPrefix.BLOCK + block_hash)
+            if block_json is None:
                 return None
-            block_json = json.loads(block)
         except Exception as e:
             Logger.debug(f'_get_block_by_hash: exception with ({e})', LOG_BLOCK)
             return None
@@ -254,26 +790,154 @@ class Block(object):
             Logger.debug(f'_get_block_by_hash: get {block_json}', LOG_BLOCK)
             return block_json
 
+    def prune(self, stop_height: int, before_timestamp: int = None,
+              max_count: int = BLOCK_PRUNE_BATCH_SIZE) -> int:
+        """
+        Remove transactions, transaction results and address index of old blocks and keep block headers.
+        Hashes of removed transactions are kept, so they are still rejected as duplicates.
+        Blocks are pruned in height order from pruned_height in a single write batch.
+        Pruned key ranges are compacted every BLOCK_PRUNE_COMPACTION_INTERVAL blocks
+        :param stop_height: blocks below the height are pruned
+        :param before_timestamp: only blocks of which timestamp is less than it are pruned. microseconds
+        :param max_count: maximum number of blocks to prune
+        :return: number of pruned blocks
+        """
+        stop_height = min(stop_height, self._pruned_height + max_count, self.block_height + 1)
+        count = 0
+        with self.batch():
+            for height in range(self._pruned_height, stop_height):
+                block_hash: bytes = self.db.get(DbPrefix.BLOCK_INDEX +
+                                                height.to_bytes(DEFAULT_BYTE_SIZE, DATA_BYTE_ORDER))
+                block = None if block_hash is None else self._get_decoded(DbPrefix.BLOCK + block_hash)
+                if block is not None:
+                    if before_timestamp is not None and block.get('timestamp', 0) >= before_timestamp:
+                        break
+                    self._prune_block(block_hash, block)
+
+                count += 1
+                self._batch_block_info['pruned_height'] = height + 1
+                self._put(DbPrefix.PRUNED_HEIGHT, str(height + 1).encode())
+
+        if count > 0:
+            Logger.debug(f'prune: {count} blocks below {self._pruned_height}', LOG_BLOCK)
+            self._pruned_since_compaction += count
+            if self._pruned_since_compaction >= BLOCK_PRUNE_COMPACTION_INTERVAL:
+                self.compact()
+
+        return count
+
+    def _prune_block(self, block_hash: bytes, block: dict):
+        height = block['height']
+        for index, tx in enumerate(block.get('transactions', [])):
+            tx_hash = tx.get('txHash')
+            if not isinstance(tx_hash, str):
+                continue
+            tx_hash = bytes.fromhex(tx_hash[2:] if tx_hash[:2] == '0x' else tx_hash)
+            if self._log_index:
+                tx_result = self._get_decoded(DbPrefix.TXRESULT + tx_hash)
+                for key in self._get_log_index_rows(tx_result or {}, height, index):
+                    self._delete(key)
+            self._delete(DbPrefix.TX + tx_hash)
+            self._delete(DbPrefix.TXRESULT + tx_hash)
+            # tbears has no timestamp window of transactions. hash is kept as long as DB
+            self._put(DbPrefix.PRUNED_TX + tx_hash, height.to_bytes(DEFAULT_BYTE_SIZE, DATA_BYTE_ORDER))
+            for address in {tx.get('from'), tx.get('to')}:
+                address_key = self._get_address_key(address)
+                if address_key is not None:
+                    self._delete(address_key + self._get_tx_position(height, index))
+
+        # keep block header
+        header = dict(block, transactions=[])
+        value = self._dumps_block(header) if self._encoding == Encoding.JSON else encode(header, self._encoding)
+        self._put(DbPrefix.BLOCK + block_hash, value)
+
+    def compact(self):
+        """
+        Compact key ranges of pruned rows
+        :return:
+        """
+        for prefix in PRUNED_PREFIXES:
+            self.db.compact_range(start=prefix, stop=prefix[:-1] + bytes([prefix[-1] + 1]))
+        self._pruned_since_compaction = 0
+
     def get_transaction(self, tx_hash: str) -> Optional[dict]:
         """
         Get transaction information by transaction hash
         :param tx_hash: transaction hash
         :return: transaction information
         """
-        tx_payload = self.db.get(DbPrefix.TX + bytes.fromhex(tx_hash))
-        if tx_payload is None:
-            return None
+        return self._get_decoded(DbPrefix.TX + bytes.fromhex(tx_hash))
+
+    def has_transaction(self, tx_hash: str) -> bool:
+        """
+        Check the transaction is saved. Transactions of pruned blocks are also saved ones
+        :param tx_hash: transaction hash
+        :return:
+        """
+        return self.has_transactions([tx_hash])[0]
 
-        return json.loads(tx_payload)
+    def has_transactions(self, tx_hashes: list) -> list:
+        """
+        Check transactions are saved. Transactions of pruned blocks are also saved ones.
+        Transactions not in cache are read from a DB snapshot at once
+        :param tx_hashes: transaction hashes
+        :return: True for each saved transaction
+        """
+        hashes = [bytes.fromhex(tx_hash) for tx_hash in tx_hashes]
+        result = [self._cache.peek(DbPrefix.TX + tx_hash) is not None for tx_hash in hashes]
+        missed = [i for i, cached in enumerate(result) if not cached]
+        keys = [prefix + hashes[i] for i in missed for prefix in (DbPrefix.TX, DbPrefix.PRUNED_TX)]
+        values = self.db.get_many(keys)
+        for n, i in enumerate(missed):
+            result[i] = values[2 * n] is not None or values[2 * n + 1] is not None
+        return result
+
+    def get_txresult_data(self, tx_hash: str) -> Optional[dict]:
+        """
+        Get decoded transaction result by transaction hash
+        :param tx_hash: transaction hash
+        :return: transaction result information. Must not be modified
+        """
+        return self._get_decoded(DbPrefix.TXRESULT + bytes.fromhex(tx_hash))
 
     def get_txresult(self, tx_hash: str) -> Optional[bytes]:
         """
         Get transaction result by transaction hash
         :param tx_hash: transaction hash
-        :return: transaction result information
+        :return: transaction result information in JSON
         """
-        tx_payload = self.db.get(DbPrefix.TXRESULT + bytes.fromhex(tx_hash))
+        tx_payload = self._get(DbPrefix.TXRESULT + bytes.fromhex(tx_hash))
         if tx_payload is None:
             return None
 
-        return tx_payload
+        return to_json_bytes(tx_payload)
+
+    def migrate(self, encoding: str, batch_size: int = 1000) -> int:
+        """
+        Re-encode transaction, transaction result and block values with the encoding
+        :param encoding: target encoding
+        :param batch_size: number of values written in a batch
+        :return: number of re-encoded values
+        """
+        if encoding not in Encoding.ALL:
+            raise ValueError(f'Invalid block DB encoding: {encoding}')
+
+        count = 0
+        for prefix in (DbPrefix.TX, DbPrefix.TXRESULT, DbPrefix.BLOCK):
+            rows = []
+            for key, value in self.db.iterator(prefix=prefix):
+                if is_compact(value) == (encoding == Encoding.MSGPACK):
+                    continue
+
+                rows.append((key, encode(decode(value), encoding)))
+                if len(rows) >= batch_size:
+                    self.db.write_rows(rows)
+                    count += len(rows)
+                    rows = []
+            self.db.write_rows(rows)
+            count += len(rows)
+
+        self._encoding = encoding
+        self._cache.clear()
+        return count
+
@@ -0,0 +1,167 @@
+# Copyright 2021 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Encoding of block DB values.
+
+Legacy values are JSON. Compact values are msgpack with the header below
+ - MAGIC(0xc1), which is never used in msgpack and JSON, and VERSION
+Hex strings and addresses are packed to bytes with extension types and known field names are packed to integers.
+Decoded values are the same as the JSON decoded ones.
+"""
+import json
+import re
+
+import msgpack
+
+
+class Encoding(object):
+    JSON = 'json'
+    MSGPACK = 'msgpack'
+
+    ALL = (JSON, MSGPACK)
+
+
+MAGIC = b'\xc1'
+VERSION = b'\x01'
+HEADER = MAGIC + VERSION
+
+# extension types
+EXT_INT = 1             # '0x' prefixed hex string of integer. e.g. '0x1a'
+EXT_HEX_0X = 2          # '0x' prefixed hex string. e.g. '0x0a1b'
+EXT_HEX = 3             # hex string. e.g. block hash
+EXT_EOA = 4             # EOA address. 'hx' + 40 hex
+EXT_CONTRACT = 5        # contract address. 'cx' + 40 hex
+
+# minimum length of hex string without prefix to be packed
+MIN_HEX_LENGTH = 8
+
+# field names packed to integers. append only. change VERSION to modify
+KEYS = (
+    'version', 'from', 'to', 'value', 'stepLimit', 'timestamp', 'nid', 'nonce', 'signature', 'dataType', 'data',
+    'txHash', 'transaction', 'tx_index', 'block_height', 'block_hash', 'status', 'blockHeight', 'blockHash',
+    'txIndex', 'stepUsed', 'stepPrice', 'cumulativeStepUsed', 'eventLogs', 'logsBloom', 'scoreAddress', 'failure',
+    'indexed', 'method', 'params', 'prevHash', 'transactionsHash', 'stateHash', 'receiptsHash', 'repsHash',
+    'nextRepsHash', 'leaderVotesHash', 'prevVotesHash', 'transactions', 'leaderVotes', 'prevVotes', 'hash',
+    'height', 'leader', 'nextLeader', 'rep', 'contentType', 'content', 'code', 'message', 'accounts', 'name',
+    'address', 'balance'
+)
+KEY_INDEX = {key: index for index, key in enumerate(KEYS)}
+
+_HEX = re.compile('[0-9a-f]*')
+
+
+def _pack_str(value: str):
+    length = len(value)
+    if value[:2] == '0x':
+        digits = value[2:]
+        if digits and _HEX.fullmatch(digits):
+            number = int(digits, 16)
+            if hex(number) == value:
+                return msgpack.ExtType(EXT_INT, number.to_bytes((number.bit_length() + 7) // 8 or 1, 'big'))
+            if length % 2 == 0:
+                return msgpack.ExtType(EXT_HEX_0X, bytes.fromhex(digits))
+    elif length == 42 and value[:2] in ('hx', 'cx') and _HEX.fullmatch(value, 2):
+        return msgpack.ExtType(EXT_EOA if value[0] == 'h' else EXT_CONTRACT, bytes.fromhex(value[2:]))
+    elif length >= MIN_HEX_LENGTH and length % 2 == 0 and _HEX.fullmatch(value):
+        return msgpack.ExtType(EXT_HEX, bytes.fromhex(value))
+
+    return value
+
+
+def _pack_obj(value):
+    if isinstance(value, str):
+        return _pack_str(value)
+    if isinstance(value, dict):
+        return {KEY_INDEX.get(k, k): _pack_obj(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_pack_obj(v) for v in value]
+    return value
+
+
+def _ext_hook(code: int, data: bytes):
+    if code == EXT_INT:
+        return hex(int.from_bytes(data, 'big'))
+    if code == EXT_HEX_0X:
+        return f'0x{data.hex()}'
+    if code == EXT_HEX:
+        return data.hex()
+    if code == EXT_EOA:
+        return f'hx{data.hex()}'
+    if code == EXT_CONTRACT:
+        return f'cx{data.hex()}'
+    return msgpack.ExtType(code, data)
+
+
+def _object_pairs_hook(pairs: list) -> dict:
+    return {KEYS[k] if isinstance(k, int) else k: v for k, v in pairs}
+
+
+def is_compact(value: bytes) -> bool:
+    return value[:1] == MAGIC
+
+
+def pack(value) -> bytes:
+    """
+    Encode JSON compatible value to compact bytes
+    :param value: value
+    :return: encoded bytes
+    """
+    return HEADER + msgpack.packb(_pack_obj(value), use_bin_type=True)
+
+
+def unpack(value: bytes):
+    """
+    Decode compact bytes
+    :param value: encoded bytes
+    :return: decoded value
+    """
+    if value[:2] != HEADER:
+        raise ValueError(f'Unsupported encoding version: {value[:2].hex()}')
+
+    return msgpack.unpackb(value[2:], raw=False, strict_map_key=False, ext_hook=_ext_hook,
+                           object_pairs_hook=_object_pairs_hook)
+
+
+def encode(value, encoding: str = Encoding.JSON) -> bytes:
+    """
+    Encode value with the encoding
+    :param value: JSON compatible value
+    :param encoding: Encoding.JSON or Encoding.MSGPACK
+    :return: encoded bytes
+    """
+    if encoding == Encoding.MSGPACK:
+        return pack(value)
+    return json.dumps(value).encode()
+
+
+def decode(value: bytes):
+    """
+    Decode value. Both of JSON and compact bytes are supported
+    :param value: encoded bytes
+    :return: decoded value
+    """
+    if is_compact(value):
+        return unpack(value)
+    return json.loads(value)
+
+
+def to_json_bytes(value: bytes) -> bytes:
+    """
+    Get JSON bytes of value. JSON value is returned as it is
+    :param value: encoded bytes
+    :return: JSON bytes
+    """
+    if is_compact(value):
+        return json.dumps(unpack(value)).encode()
+    return value
@@ -15,9 +15,11 @@
 import argparse
 import sys
 import time
-from asyncio import get_event_loop
-from copy import deepcopy
-from typing import Union
+from asyncio import Future, get_event_loop, ensure_future, wait_for, TimeoutError as AsyncTimeoutError
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Dict, List, Optional, Set, Union
 
 import setproctitle
 from earlgrey import MessageQueueService
@@ -27,10 +29,22 @@ from iconservice.icon_constant import DATA_BYTE_ORDER, DEFAULT_BYTE_SIZE
 from iconservice.utils.bloom import BloomFilter
 
 from tbears.block_manager.block import Block
-from tbears.block_manager.channel_service import ChannelService, ChannelTxCreatorService
-from tbears.block_manager.hash_utils import generate_hash
-from tbears.block_manager.icon_service import IconStub
-from tbears.block_manager.task import Periodic, Immediate
+from tbears.block_manager.block_codec import Encoding
+from tbears.block_manager.block_notifier import BlockPublisher, create_block_publisher, make_new_block_notification
+from tbears.block_manager.channel_service import (
+    ChannelInnerTask, ChannelService, ChannelSocketService, ChannelTxCreatorInnerTask, ChannelTxCreatorService,
+    ChannelTxCreatorSocketService
+)
+from tbears.block_manager.hash_utils import EMPTY_ROOT_HASH, MerkleRoot, VOTE_HASH_SALT, generate_hash
+from tbears.block_manager.icon_service import IconStub, IconSocketStub
+from tbears.block_manager.local_stub import LocalStub
+from tbears.block_manager.log_query import LogQuery
+from tbears.block_manager.metrics import Metrics
+from tbears.block_manager.task import Periodic, Immediate, Hybrid
+from tbears.block_manager.transaction import Transaction, get_tx_data, get_tx_hash, get_tx_leaf_hash
+from tbears.block_manager.tx_pool import TxPool
+from tbears.block_manager.tx_verifier import SignatureVerifier
+from tbears.block_manager.unix_socket import UnixSocketService, get_unix_socket_path
 from tbears.config.tbears_config import TConfigKey, tbears_server_config, keystore_test1
 from tbears.util import create_hash, get_tbears_version
 
@@ -41,24 +55,80 @@ CHANNEL_QUEUE_NAME_FORMAT = "Channel.{channel_name}.{amqp_key}"
 CHANNEL_TX_CREATOR_QUEUE_NAME_FORMAT = "ChannelTxCreator.{channel_name}.{amqp_key}"
 
 
+class PRepRing(object):
+    """
+    P-Rep set registered by iconservice. The generator is rotated in the ring without copying the list.
+    Encoded ids and their merkle root are cached for each rotation, so the set is hashed at most once per rotation
+    """
+    def __init__(self, preps: list):
+        self._preps: deque = deque(preps)
+        self._offset: int = 0
+        self._encoded: list = [f'00{prep["id"][2:]}'.encode() for prep in self._preps]
+        self._hashes: Dict[int, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._preps)
+
+    def __iter__(self):
+        return iter(self._preps)
+
+    def __getitem__(self, index: int) -> dict:
+        return self._preps[index]
+
+    def rotate(self):
+        """
+        Move the first P-Rep to the end
+        :return:
+        """
+        if self._preps:
+            self._preps.rotate(-1)
+            self._offset = (self._offset + 1) % len(self._preps)
+
+    def get_validators(self) -> list:
+        return list(islice(self._preps, 1, None))
+
+    def get_hash(self) -> str:
+        """
+        Get merkle root of the P-Rep ids in the current order. See repsHash in block
+        :return: merkle root in hex string
+        """
+        root = self._hashes.get(self._offset)
+        if root is None:
+            root = generate_hash(self._encoded[self._offset:] + self._encoded[:self._offset])
+            self._hashes[self._offset] = root
+        return root
+
+    def to_list(self) -> list:
+        return list(self._preps)
+
+
 class PRepManager(object):
     def __init__(self, is_generator_rotation: bool, gen_count_per_leader: int, prep_list: list = None):
-        self._prep_list: list = deepcopy(prep_list)
+        self._preps: Optional['PRepRing'] = None if prep_list is None else PRepRing(prep_list)
         self._is_generator_rotation: bool = is_generator_rotation
         self._gen_count_per_leader: int = gen_count_per_leader
         self._gen_count: int = 0
         self._generator: str = keystore_test1['address']
         self._prev_generator: str = keystore_test1['address']
         self._prev_votes: list = []
-        self.prev_preps: list = deepcopy(prep_list)
+        # P-Rep set of the previous block. it is the current set until new set is registered
+        self._prev_preps: Optional['PRepRing'] = None if prep_list is None else PRepRing(prep_list)
 
     def register_preps(self, data: dict):
         if data is None:
             return
 
-        self._prep_list = data.get('preps', None)
+        preps = data.get('preps', None)
+        self._preps = None if preps is None else PRepRing(preps)
         self._gen_count = 0
 
+    def commit_preps(self):
+        """
+        Set the current P-Rep set as the set of previous block
+        :return:
+        """
+        self._prev_preps = self._preps
+
     @staticmethod
     def _create_prev_block_contributors_format(generator: str, validators: list = []) -> dict:
         validator_id_list = []
@@ -76,21 +146,21 @@ class PRepManager(object):
         return prev_block_contributors_format
 
     def get_prev_block_contributors_info(self) -> dict:
-        if self.prep_list is None or len(self.prep_list) == 0:
+        if not self._preps:
             # set generator with test1 and validators with empty list
             prev_block_contributors_format = self._create_prev_block_contributors_format(keystore_test1['address'])
             return prev_block_contributors_format
 
-        prev_block_contributors_format = self._create_prev_block_contributors_format(self._prep_list[0].get('id'),
-                                                                                     self._prep_list[1:])
+        prev_block_contributors_format = self._create_prev_block_contributors_format(self._preps[0].get('id'),
+                                                                                     self._preps.get_validators())
         # rotate leader after generate block 10 times
         self._prev_generator = self._generator
         if self._is_generator_rotation:
             self._gen_count += 1
             if self._gen_count == self._gen_count_per_leader:
                 self._gen_count = 0
-                self._prep_list.append(self._prep_list.pop(0))
-                self._generator = self._prep_list[0]['id']
+                self._preps.rotate()
+                self._generator = self._preps[0]['id']
                 Logger.debug(f"generator rotated. generator: {self._generator}", TBEARS_BLOCK_MANAGER)
 
         return prev_block_contributors_format
@@ -105,22 +175,42 @@ class PRepManager(object):
 
     @property
     def prep_list(self):
-        return self._prep_list
+        return None if self._preps is None else self._preps.to_list()
+
+    @property
+    def prev_preps(self):
+        return None if self._prev_preps is None else self._prev_preps.to_list()
+
+    def get_reps_hash(self) -> str:
+        """
+        Get repsHash of block. merkle root of the previous P-Rep set
+        :return:
+        """
+        return EMPTY_ROOT_HASH if self._prev_preps is None else self._prev_preps.get_hash()
+
+    def get_next_reps_hash(self) -> str:
+        """
+        Get nextRepsHash of block. merkle root of the current P-Rep set
+        :return:
+        """
+        return EMPTY_ROOT_HASH if self._preps is None else self._preps.get_hash()
 
     def set_prev_votes(self, block_height: int, block_hash: str, timestamp: int):
-        self._prev_votes.clear()
-        if self.prep_list:
-            for index, prep in enumerate(self.prep_list):
+        # new list is made. the previous one may be in a block which is still being written
+        prev_votes = []
+        if self._preps:
+            for index, prep in enumerate(self._preps):
                 if index == 0:
-                    self._prev_votes.append(None)
+                    prev_votes.append(None)
                 else:
-                    self._prev_votes.append({
+                    prev_votes.append({
                         "rep": prep.get("id"),
                         "timestamp": timestamp,
                         "blockHeight": block_height,
                         "blockHash": block_hash,
                         "signature": "tbears_block_manager_does_not_support_prev_vote_signature"
                     })
+        self._prev_votes = prev_votes
 
     @property
     def prev_votes(self):
@@ -128,20 +218,51 @@ class PRepManager(object):
 
 
 class BlockManager(object):
-    def __init__(self, conf: 'IconConfig'):
+    def __init__(self, conf: 'IconConfig', icon_task: object = None):
+        """
+        :param conf: tbears configuration
+        :param icon_task: iconservice IconScoreInnerTask in the same process. message queue is not used if given
+        """
         self._conf = conf
+        self._icon_task = icon_task
         self._channel_mq_name = None
         self._tx_creator_mq_name = None
         self._icon_mq_name = None
         self._amqp_target = None
+        # directory of Unix domain sockets. message queue is used if empty
+        self._uds_target = conf.get(TConfigKey.UDS_TARGET, '')
         self._channel_service = None
         self._tx_creator_service = None
         self._icon_stub = None
-        self._block: 'Block' = Block(f'{conf["stateDbRootPath"]}/tbears')
-        self._tx_queue = []
+        # stubs of channel handlers for iconrpcserver in the same process
+        self._channel_stub: 'LocalStub' = None
+        self._tx_creator_stub: 'LocalStub' = None
+        self._block: 'Block' = Block(f'{conf["stateDbRootPath"]}/tbears',
+                                     cache_size=self._conf.get(TConfigKey.BLOCK_CACHE_SIZE, 0),
+                                     encoding=self._conf.get(TConfigKey.BLOCK_DB_ENCODING, Encoding.JSON),
+                                     db_options=self._conf.get(TConfigKey.BLOCK_DB),
+                                     log_index=self._conf.get(TConfigKey.LOG_INDEX, False))
+        self._log_query = LogQuery(self._block)
+        # height and hash of the last invoked block. block DB may be behind it while the block is persisted
+        self._head_height: int = self._block.block_height
+        self._head_hash: str = self._block.prev_block_hash
+        # single worker keeps DB writes in block order
+        self._db_executor = ThreadPoolExecutor(max_workers=1)
+        self._confirm_task = None
+        # hashes of transactions popped from the pool until their block is written. see is_tx_pending()
+        self._in_flight_tx_hashes: Set[str] = set()
+        # futures of clients waiting for transaction results. resolved when the block is written and committed
+        self._tx_result_waiters: Dict[str, List[Future]] = {}
+        self._block_publisher: Optional['BlockPublisher'] = None
+        self._metrics = Metrics()
+        self._tx_pool = TxPool(max_size=self._conf.get(TConfigKey.TX_POOL_MAX_SIZE, 0))
+        self._signature_verifier = SignatureVerifier(
+            workers=self._conf.get(TConfigKey.SIGNATURE_VERIFY_WORKERS, 0),
+            batch_size=self._conf.get(TConfigKey.SIGNATURE_VERIFY_BATCH_SIZE, 1))
         self._prep_manager = PRepManager(
             is_generator_rotation=self._conf[TConfigKey.BLOCK_GENERATOR_ROTATION],
             gen_count_per_leader=self._conf[TConfigKey.BLOCK_GENERATE_COUNT_PER_LEADER])
+        self.hybrid: 'Hybrid' = None
         self._genesis_addr: str = self._conf["genesis"]["accounts"][0]["address"]
         self._test1_addr: str = self._conf["genesis"]["accounts"][2]["address"]
 
@@ -149,12 +270,39 @@ class BlockManager(object):
     def block(self) -> 'Block':
         return self._block
 
+    @property
+    def log_query(self) -> 'LogQuery':
+        return self._log_query
+
+    @property
+    def signature_verifier(self) -> 'SignatureVerifier':
+        return self._signature_verifier
+
+    @property
+    def metrics(self) -> 'Metrics':
+        return self._metrics
+
+    @property
+    def channel_stub(self) -> 'LocalStub':
+        return self._channel_stub
+
+    @property
+    def tx_creator_stub(self) -> 'LocalStub':
+        return self._tx_creator_stub
+
+    @property
+    def icon_stub(self):
+        return self._icon_stub
+
     def serve(self):
         async def _serve():
             try:
                 await self.init()
             except RuntimeError as e:
-                msg = f'Failed to connect to MQ. Check rabbitMQ service. ({e})'
+                if self._uds_target:
+                    msg = f'Failed to connect to Unix domain socket. Check iconservice. ({e})'
+                else:
+                    msg = f'Failed to connect to MQ. Check rabbitMQ service. ({e})'
                 Logger.error(msg, TBEARS_BLOCK_MANAGER)
                 print(msg)
                 self.close()
@@ -175,6 +323,7 @@ class BlockManager(object):
         Logger.info(f'==========tbears block_manager params==========', TBEARS_BLOCK_MANAGER)
         Logger.info(f'amqp_target : {amqp_target}', TBEARS_BLOCK_MANAGER)
         Logger.info(f'amqp_key    : {amqp_key}', TBEARS_BLOCK_MANAGER)
+        Logger.info(f'uds_target  : {self._uds_target}', TBEARS_BLOCK_MANAGER)
         Logger.info(f'queue_name  : {self._channel_mq_name}', TBEARS_BLOCK_MANAGER)
         Logger.info(f'            : {self._tx_creator_mq_name}', TBEARS_BLOCK_MANAGER)
         Logger.info(f'            : {self._icon_mq_name}', TBEARS_BLOCK_MANAGER)
@@ -195,10 +344,15 @@ class BlockManager(object):
         await self._init_channel()
         await self._init_tx_creator()
         await self._init_icon()
+        await self._init_block_publisher()
         if self._conf[TConfigKey.BLOCK_MANUAL_CONFIRM]:
             await self._init_immediate()
+        elif self._conf.get(TConfigKey.BLOCK_CONFIRM_HYBRID, False):
+            await self._init_hybrid()
         else:
             await self._init_periodic()
+        if self._conf.get(TConfigKey.METRICS_FILE_PATH):
+            await self._init_metrics()
 
         Logger.debug(f'Initialize done!!', TBEARS_BLOCK_MANAGER)
 
@@ -209,10 +363,18 @@ class BlockManager(object):
         """
         Logger.debug(f'Initialize channel started!!', TBEARS_BLOCK_MANAGER)
 
-        self._channel_service = ChannelService(self._amqp_target, self._channel_mq_name,
-                                               block_manager=self)
+        if self._icon_task is not None:
+            self._channel_stub = LocalStub(ChannelInnerTask(block_manager=self))
+        elif self._uds_target:
+            self._channel_service = ChannelSocketService(
+                get_unix_socket_path(self._uds_target, self._channel_mq_name), block_manager=self)
 
-        await self._channel_service.connect(exclusive=True)
+            await self._channel_service.connect()
+        else:
+            self._channel_service = ChannelService(self._amqp_target, self._channel_mq_name,
+                                                   block_manager=self)
+
+            await self._channel_service.connect(exclusive=True)
 
         Logger.debug(f'Initialize channel done!!', TBEARS_BLOCK_MANAGER)
 
@@ -223,10 +385,18 @@ class BlockManager(object):
         """
         Logger.debug(f'Initialize tx creator started!!', TBEARS_BLOCK_MANAGER)
 
-        self._tx_creator_service = ChannelTxCreatorService(self._amqp_target, self._tx_creator_mq_name,
-                                                           block_manager=self)
+        if self._icon_task is not None:
+            self._tx_creator_stub = LocalStub(ChannelTxCreatorInnerTask(block_manager=self))
+        elif self._uds_target:
+            self._tx_creator_service = ChannelTxCreatorSocketService(
+                get_unix_socket_path(self._uds_target, self._tx_creator_mq_name), block_manager=self)
 
-        await self._tx_creator_service.connect(exclusive=True)
+            await self._tx_creator_service.connect()
+        else:
+            self._tx_creator_service = ChannelTxCreatorService(self._amqp_target, self._tx_creator_mq_name,
+                                                               block_manager=self)
+
+            await self._tx_creator_service.connect(exclusive=True)
 
         Logger.debug(f'Initialize tx creator done!!', TBEARS_BLOCK_MANAGER)
 
@@ -237,8 +407,13 @@ class BlockManager(object):
         """
         Logger.debug(f'Initialize ICON started!!', TBEARS_BLOCK_MANAGER)
 
-        # make MQ stub
-        self._icon_stub = IconStub(amqp_target=self._amqp_target, route_key=self._icon_mq_name)
+        # make MQ stub. iconservice in the same process is called directly
+        if self._icon_task is not None:
+            self._icon_stub = LocalStub(self._icon_task)
+        elif self._uds_target:
+            self._icon_stub = IconSocketStub(get_unix_socket_path(self._uds_target, self._icon_mq_name))
+        else:
+            self._icon_stub = IconStub(amqp_target=self._amqp_target, route_key=self._icon_mq_name)
 
         await self._icon_stub.connect()
         await self._icon_stub.async_task().hello()
@@ -293,19 +468,40 @@ class BlockManager(object):
             tx_result['txHash'] = tx_hash
             tx_hash = tx_hash[2:]
 
-        # save transaction result
-        self.block.save_txresult(tx_hash, tx_result)
-
-        # save block
         block = self._make_block_data(block_hash, self._conf['genesis'], block_timestamp_us, response)
-        self.block.save_block(block)
 
-        # update block information
-        self.block.commit_block(prev_block_hash=block_hash)
+        # save genesis block in a single write batch
+        with self.block.batch():
+            # save transaction result
+            self.block.save_txresult(tx_hash, tx_result)
+
+            # save block
+            self.block.save_block(block)
+
+            # update block information
+            self.block.commit_block(prev_block_hash=block_hash)
+        self._head_height, self._head_hash = block_height, block_hash
 
         Logger.debug(f'Initialize ICON done!! Load genesis block. block_height: {self.block.block_height}',
                      TBEARS_BLOCK_MANAGER)
 
+    async def _init_block_publisher(self):
+        """
+        Initialize new block publisher. tbears works without notifications if it fails
+        :return:
+        """
+        publisher = create_block_publisher(self._conf)
+        if publisher is None:
+            return
+
+        try:
+            await publisher.connect()
+        except Exception as e:
+            Logger.error(f'Failed to initialize new block publisher. ({e})', TBEARS_BLOCK_MANAGER)
+            return
+
+        self._block_publisher = publisher
+
     async def _init_periodic(self):
         """
         Initialize periodic task.
@@ -319,6 +515,38 @@ class BlockManager(object):
 
         Logger.debug(f'Initialize periodic task done!!', TBEARS_BLOCK_MANAGER)
 
+    async def _init_hybrid(self):
+        """
+        Initialize hybrid task.
+         - block confirmation by transaction count, bytes and time
+        :return:
+        """
+        Logger.debug(f'Initialize hybrid task started!!', TBEARS_BLOCK_MANAGER)
+
+        self.hybrid = Hybrid(func=self.process_block_data,
+                             interval=self._conf[TConfigKey.BLOCK_CONFIRM_INTERVAL],
+                             linger=self._conf.get(TConfigKey.BLOCK_LINGER_MS, 0) / 1000,
+                             get_pending=lambda: (len(self._tx_pool), self._tx_pool.size_in_bytes),
+                             max_count=self._conf.get(TConfigKey.BLOCK_TRIGGER_TX_COUNT, 0),
+                             max_bytes=self._conf.get(TConfigKey.BLOCK_TRIGGER_BYTES, 0))
+        await self.hybrid.start()
+
+        Logger.debug(f'Initialize hybrid task done!!', TBEARS_BLOCK_MANAGER)
+
+    async def _init_metrics(self):
+        """
+        Initialize metrics task.
+         - write metrics file periodically
+        :return:
+        """
+        Logger.debug(f'Initialize metrics task started!!', TBEARS_BLOCK_MANAGER)
+
+        self.metrics_periodic = Periodic(func=self._write_metrics,
+                                         interval=self._conf.get(TConfigKey.METRICS_INTERVAL, 10))
+        await self.metrics_periodic.start()
+
+        Logger.debug(f'Initialize metrics task done!!', TBEARS_BLOCK_MANAGER)
+
     async def _init_immediate(self):
         """
         Initialize immediate task.
@@ -333,25 +561,69 @@ class BlockManager(object):
 
     def close(self):
         Logger.debug(f'close {TBEARS_BLOCK_MANAGER}', TBEARS_BLOCK_MANAGER)
+        self._signature_verifier.close()
+        self._db_executor.shutdown()
+        for waiters in self._tx_result_waiters.values():
+            for future in waiters:
+                future.cancel()
+        self._tx_result_waiters.clear()
+        if self._block_publisher is not None:
+            self._block_publisher.close()
+        for service in (self._channel_service, self._tx_creator_service):
+            if isinstance(service, UnixSocketService):
+                service.close()
         get_event_loop().stop()
 
-    def add_tx(self, tx_hash: str, tx: dict):
+    def add_tx(self, tx_hash: str, tx: dict, size: int = 0) -> bool:
         """
         Add transactions to queue for block confirmation
         :param tx_hash: transaction hash
         :param tx: transaction
-        :return:
+        :param size: serialized size of transaction in bytes
+        :return: False if the transaction pool is full
+        """
+        added = self._add_tx(tx_hash, tx, size)
+        if added and self.hybrid is not None:
+            self.hybrid.notify()
+
+        return added
+
+    def add_txs(self, txs: list) -> list:
+        """
+        Add transactions to queue for block confirmation at once. Block confirmation is notified once
+        :param txs: list of (tx_hash, tx, size)
+        :return: False for each transaction which is not added because the transaction pool is full
         """
+        result = [self._add_tx(tx_hash, tx, size) for tx_hash, tx, size in txs]
+        if any(result) and self.hybrid is not None:
+            self.hybrid.notify()
+
+        return result
+
+    def _add_tx(self, tx_hash: str, tx: dict, size: int) -> bool:
         if self._conf[TConfigKey.BLOCK_MANUAL_CONFIRM] and self._check_debug_tx(tx):
             self.immediate.add_func(func=self.process_block_data)
-        else:
-            tx_copy = deepcopy(tx)
+            return True
 
-            # add txHash
-            tx_copy['txHash'] = tx_hash
+        # transaction record with txHash. encoded once and reused until saved
+        tx_record = Transaction(tx_hash, tx, size)
 
-            self._tx_queue.append(tx_copy)
-            Logger.debug(f'Append tx to tx_queue: {self._tx_queue}', TBEARS_BLOCK_MANAGER)
+        if not self._tx_pool.add(tx_hash, tx_record, size):
+            Logger.debug(f'Transaction pool is full. drop tx: {tx_hash}', TBEARS_BLOCK_MANAGER)
+            self._metrics.txs_rejected.inc()
+            return False
+        self._metrics.txs_received.inc()
+        Logger.debug(f'Append tx to tx_pool: {tx_hash}, pool size: {len(self._tx_pool)}', TBEARS_BLOCK_MANAGER)
+
+        return True
+
+    def is_tx_pending(self, tx_hash: str) -> bool:
+        """
+        Check whether the transaction is in the pool or in a block which is not written to block DB yet
+        :param tx_hash: transaction hash
+        :return:
+        """
+        return tx_hash in self._tx_pool or tx_hash in self._in_flight_tx_hashes
 
     def _check_debug_tx(self, tx: dict) -> bool:
         if tx['from'] != self._test1_addr:
@@ -363,32 +635,66 @@ class BlockManager(object):
         return True
 
     @property
-    def tx_queue(self) -> list:
+    def tx_pool(self) -> 'TxPool':
         """
-        Get transaction queue
+        Get transaction pool
         :return:
         """
-        return self._tx_queue
+        return self._tx_pool
 
-    def clear_tx(self) -> list:
+    def get_metrics(self) -> dict:
         """
-        return transaction queue and clear
-        :return: transaction queue
+        Get metrics of block manager
+        :return: metrics dictionary
         """
-        tx_queue: list = self._tx_queue
-        self._tx_queue = []
+        self._update_metrics()
+        return self._metrics.to_dict()
+
+    def _update_metrics(self):
+        cache = self._block.cache
+        self._metrics.tx_pool_depth.set(len(self._tx_pool))
+        self._metrics.block_cache_hits.value = cache.hits
+        self._metrics.block_cache_misses.value = cache.misses
+        self._metrics.block_cache_bytes.set(cache.size)
 
-        return tx_queue
+    async def _write_metrics(self):
+        """
+        Write metrics to file in Prometheus text format
+        :return:
+        """
+        self._update_metrics()
+        try:
+            self._metrics.write_prometheus(self._conf[TConfigKey.METRICS_FILE_PATH])
+        except OSError as e:
+            Logger.error(f'Failed to write metrics file. {e}', TBEARS_BLOCK_MANAGER)
+
+    def clear_tx(self) -> list:
+        """
+        return transactions in pool and clear
+        :return: transaction list
+        """
+        return self._tx_pool.clear()
 
     async def process_block_data(self):
         """
         Process block data. Invoke block and save transactions, transaction results and block. Update block height and previous block hash.
+        Block is persisted in background while the next block is invoked. Only one block waits for persistence.
         :return:
         """
         Logger.debug(f'process_block_data started!!', TBEARS_BLOCK_MANAGER)
 
-        # clear tx_queue
-        tx_list = self.clear_tx()
+        # get transactions for block. remains are confirmed in the next block
+        tx_list = self._tx_pool.pop(max_count=self._conf.get(TConfigKey.MAX_TX_PER_BLOCK, 0),
+                                    max_bytes=self._conf.get(TConfigKey.MAX_BLOCK_BYTES, 0))
+        if len(self._tx_pool) > 0:
+            Logger.debug(f'{len(self._tx_pool)} transactions remain for the next block', TBEARS_BLOCK_MANAGER)
+        # popped transactions are still duplicates until the block is written
+        tx_hashes = [get_tx_hash(tx) for tx in tx_list]
+        self._in_flight_tx_hashes.update(tx_hashes)
+
+        now = time.monotonic()
+        for tx in tx_list:
+            self._metrics.tx_queue_wait.observe(now - tx.received)
 
         if len(tx_list) == 0:
             if self._conf[TConfigKey.BLOCK_CONFIRM_EMPTY]:
@@ -398,40 +704,118 @@ class BlockManager(object):
                 return
 
         # make block hash. tbears block_manager is dev util
+        block_height = self._head_height + 1
         block_timestamp_us = int(time.time() * 10 ** 6)
         block_hash = create_hash(block_timestamp_us.to_bytes(DEFAULT_BYTE_SIZE, DATA_BYTE_ORDER))
 
         # send invoke message to ICON
         prev_block_timestamp = block_timestamp_us - self._conf.get(TConfigKey.BLOCK_CONFIRM_INTERVAL, 0)
-        self._prep_manager.set_prev_votes(self.block.block_height, self.block.prev_block_hash,
-                                          prev_block_timestamp)
-        response = await self._invoke_block(tx_list=tx_list, block_hash=block_hash, block_timestamp=block_timestamp_us)
+        self._prep_manager.set_prev_votes(self._head_height, self._head_hash, prev_block_timestamp)
+        try:
+            response = await self._invoke_block(tx_list=tx_list, block_height=block_height, block_hash=block_hash,
+                                                block_timestamp=block_timestamp_us)
+        except Exception:
+            self._in_flight_tx_hashes.difference_update(tx_hashes)
+            raise
         if response is None:
             Logger.debug(f'iconservice response None for invoke request.', TBEARS_BLOCK_MANAGER)
+            self._in_flight_tx_hashes.difference_update(tx_hashes)
+            return
+
+        # previous block must be confirmed before the next one
+        try:
+            await self.wait_confirm()
+        except Exception:
+            # head is reset to the last block in block DB. transactions of this block are made into the next one
+            Logger.error(f'Drop block {block_height} invoked on the block which failed to confirm. '
+                         f'{len(tx_list)} transactions are returned to pool', TBEARS_BLOCK_MANAGER)
+            self._in_flight_tx_hashes.difference_update(tx_hashes)
+            self._tx_pool.restore([(tx.tx_hash, tx, tx.size) for tx in tx_list])
+            if self.hybrid is not None:
+                self.hybrid.notify()
             return
 
-        # send write precommit message and confirm block
-        await self._confirm_block(tx_list=tx_list, invoke_response=response, block_hash=block_hash,
-                                  timestamp=block_timestamp_us)
+        block_data = self._prepare_block(tx_list=tx_list, invoke_response=response, block_height=block_height,
+                                         block_hash=block_hash, timestamp=block_timestamp_us)
+        self._head_height, self._head_hash = block_height, block_hash
+
+        # send write precommit message and confirm block in background
+        self._confirm_task = ensure_future(self._confirm_block(tx_list=tx_list, invoke_response=response,
+                                                               block_data=block_data))
         Logger.debug(f'process_block_data done!!', TBEARS_BLOCK_MANAGER)
 
-    async def _invoke_block(self, tx_list: list, block_hash: str, block_timestamp) -> dict:
+    async def wait_confirm(self):
+        """
+        Wait until the last invoked block is confirmed.
+        If it fails, head is reset to the last block in block DB and the exception is raised again,
+        so no block is made on the block which is not persisted. Next block is made on the reset head
+        :return:
+        """
+        if self._confirm_task is None:
+            return
+
+        task, self._confirm_task = self._confirm_task, None
+        try:
+            await task
+        except Exception as e:
+            Logger.error(f'Failed to confirm block. {e}', TBEARS_BLOCK_MANAGER)
+            self._head_height, self._head_hash = self._block.block_height, self._block.prev_block_hash
+            raise
+
+    async def wait_tx_result(self, tx_hash: str, timeout: float) -> Optional[bytes]:
+        """
+        Wait until the transaction result is written to block DB and the state of the block is committed
+        :param tx_hash: transaction hash
+        :param timeout: timeout in second
+        :return: transaction result information in JSON. None if the transaction is not invoked until timeout
+        """
+        tx_result = self._block.get_txresult(tx_hash=tx_hash)
+        if tx_result is not None or timeout <= 0:
+            return tx_result
+
+        future = get_event_loop().create_future()
+        waiters = self._tx_result_waiters.setdefault(tx_hash, [])
+        waiters.append(future)
+        try:
+            await wait_for(future, timeout)
+        except AsyncTimeoutError:
+            waiters.remove(future)
+            if not waiters and self._tx_result_waiters.get(tx_hash) is waiters:
+                del self._tx_result_waiters[tx_hash]
+            return None
+
+        return self._block.get_txresult(tx_hash=tx_hash)
+
+    def _notify_tx_results(self, tx_list: list):
+        """
+        Wake up clients waiting for the results of the transactions
+        :param tx_list: transaction list of the written block
+        :return:
+        """
+        if not self._tx_result_waiters:
+            return
+
+        for tx in tx_list:
+            for future in self._tx_result_waiters.pop(get_tx_hash(tx), ()):
+                if not future.done():
+                    future.set_result(None)
+
+    async def _invoke_block(self, tx_list: list, block_height: int, block_hash: str, block_timestamp) -> dict:
         """
         Invoke block. Send 'invoke' message to iconservice and get response
         :param tx_list: transaction list
+        :param block_height: block height
         :param block_hash: block hash
         :param block_timestamp: block confirm timestamp
         :return:
         """
         Logger.debug(f'invoke block start', TBEARS_BLOCK_MANAGER)
-        block_height = self.block.block_height + 1
-        prev_block_hash = self.block.prev_block_hash
 
         transactions = []
         for tx in tx_list:
             transaction = {
                 "method": 'icx_sendTransaction',
-                "params": tx
+                "params": get_tx_data(tx)
             }
             transactions.append(transaction)
 
@@ -439,7 +823,7 @@ class BlockManager(object):
             'block': {
                 'blockHeight': hex(block_height),
                 'blockHash': block_hash,
-                'prevBlockHash': prev_block_hash,
+                'prevBlockHash': self._head_hash,
                 'timestamp': hex(block_timestamp)
             },
             'transactions': transactions,
@@ -451,7 +835,8 @@ class BlockManager(object):
         request.update(prev_block_contributors)
 
         # send invoke message to iconservice
-        response = await self._icon_stub.async_task().invoke(request)
+        with self._metrics.invoke.time():
+            response = await self._icon_stub.async_task().invoke(request)
 
         if 'error' in response:
             Logger.debug(f'Get error response from iconservice: {response}!!', TBEARS_BLOCK_MANAGER)
@@ -460,17 +845,17 @@ class BlockManager(object):
         Logger.debug(f'invoke block done. response: {response}!!', TBEARS_BLOCK_MANAGER)
         return response
 
-    async def _confirm_block(self, tx_list: list, invoke_response: dict, block_hash: str, timestamp: int):
+    def _prepare_block(self, tx_list: list, invoke_response: dict, block_height: int, block_hash: str,
+                       timestamp: int) -> dict:
         """
-        Confirm block. Send 'write_precommit_state' message and save transaction, transaction result and block data
-        :param tx_list: transaction list
+        Make block data from invoke response and update P-Rep information
+        :param tx_list: transaction list. addedTransactions in invoke_response are inserted
         :param invoke_response: invoke response
-        :param block_hash: old block hash
+        :param block_height: block height
+        :param block_hash: block hash
         :param timestamp: block timestamp
-        :return:
+        :return: block data
         """
-        Logger.debug(f'confirm block start. tx_list:{tx_list}, invoke_response:{invoke_response}', TBEARS_BLOCK_MANAGER)
-
         # Set new P-Rep list
         self._prep_manager.register_preps(invoke_response.get('prep'))
 
@@ -492,39 +877,100 @@ class BlockManager(object):
                 else:
                     Logger.error(f"Can't find txResult of addedTransaction({tx_hash}: {tx})")
 
-        # recalculate block_hash. tbears block_manager is dev util
-        block_timestamp_us = int(time.time() * 10 ** 6)
-        new_block_hash = create_hash(block_timestamp_us.to_bytes(DEFAULT_BYTE_SIZE, DATA_BYTE_ORDER))
+        block_data = self._make_block_data(block_hash, tx_list, timestamp, invoke_response,
+                                           block_height=block_height, prev_block_hash=self._head_hash)
+        self._prep_manager.commit_preps()
 
-        block_height = self.block.block_height + 1
+        return block_data
 
-        # save transaction result
-        if block_height == 0:
-            self.block.save_txresults_legacy(tx_list=tx_list, results=invoke_response)
-        else:
-            self.block.save_txresults(tx_results=invoke_response.get('txResults'), new_block_hash=new_block_hash)
-
-        # save transactions
-        self.block.save_transactions(tx_list=tx_list, block_hash=new_block_hash)
-
-        # save block
-        block_data = self._make_block_data(new_block_hash, tx_list, timestamp, invoke_response)
-        self.block.save_block(block_data)
-        self._prep_manager.prev_preps = self._prep_manager.prep_list
+    async def _confirm_block(self, tx_list: list, invoke_response: dict, block_data: dict):
+        """
+        Confirm block. Save transaction, transaction result and block data and send 'write_precommit_state' message
+        :param tx_list: transaction list
+        :param invoke_response: invoke response
+        :param block_data: block data
+        :return:
+        """
+        Logger.debug(f'confirm block start. tx_list:{tx_list}, invoke_response:{invoke_response}', TBEARS_BLOCK_MANAGER)
 
-        # update block information
-        self.block.commit_block(prev_block_hash=new_block_hash)
+        try:
+            with self._metrics.confirm_db_write.time():
+                await get_event_loop().run_in_executor(self._db_executor, self._write_block, tx_list,
+                                                       invoke_response, block_data)
+        finally:
+            # written transactions are found in block DB from now on
+            self._in_flight_tx_hashes.difference_update(get_tx_hash(tx) for tx in tx_list)
 
-        precommit_request = {'blockHeight': hex(block_height),
+        block_hash = block_data['hash']
+        precommit_request = {'blockHeight': hex(block_data['height']),
                              'oldBlockHash': block_hash,
-                             'newBlockHash': new_block_hash}
+                             'newBlockHash': block_hash}
         # send write_precommit_state message to iconservice
 
-        await self._icon_stub.async_task().write_precommit_state(precommit_request)
+        with self._metrics.precommit.time():
+            await self._icon_stub.async_task().write_precommit_state(precommit_request)
+
+        # state of the block is queried by woken clients
+        self._notify_tx_results(tx_list)
+
+        # block and state are committed. notify subscribers
+        if self._block_publisher is not None:
+            try:
+                await self._block_publisher.publish(make_new_block_notification(block_data))
+            except Exception as e:
+                Logger.error(f'Failed to publish new block notification. {e}', TBEARS_BLOCK_MANAGER)
+
+        self._metrics.blocks_confirmed.inc()
+        self._metrics.txs_confirmed.inc(len(tx_list))
+        self._metrics.block_tx_count.observe(len(tx_list))
+
+        # prune old blocks between confirmations
+        if self._conf.get(TConfigKey.BLOCK_RETENTION, 0) or self._conf.get(TConfigKey.BLOCK_RETENTION_DAYS, 0):
+            await get_event_loop().run_in_executor(self._db_executor, self._prune_blocks)
 
         Logger.debug(f'confirm block done.', TBEARS_BLOCK_MANAGER)
 
-    def _make_block_data(self, block_hash: str, tx: Union[list, dict], timestamp: int, invoke_response: dict):
+    def _write_block(self, tx_list: list, invoke_response: dict, block_data: dict):
+        """
+        Save transaction, transaction result and block data to DB and update block information in a single write batch
+        :param tx_list: transaction list
+        :param invoke_response: invoke response
+        :param block_data: block data
+        :return:
+        """
+        block_hash = block_data['hash']
+
+        with self.block.batch():
+            # save transaction result
+            if block_data['height'] == 0:
+                self.block.save_txresults_legacy(tx_list=tx_list, results=invoke_response)
+            else:
+                self.block.save_txresults(tx_results=invoke_response.get('txResults'), new_block_hash=block_hash)
+
+            # save transactions
+            self.block.save_transactions(tx_list=tx_list, block_hash=block_hash)
+
+            # save block
+            self.block.save_block(block_data)
+
+            # update block information
+            self.block.commit_block(prev_block_hash=block_hash)
+
+    def _prune_blocks(self) -> int:
+        """
+        Prune blocks out of retention. Blocks within either of retention settings are kept
+        :return: number of pruned blocks
+        """
+        # keep the last block at least
+        retention = max(self._conf.get(TConfigKey.BLOCK_RETENTION, 0), 1)
+        retention_days = self._conf.get(TConfigKey.BLOCK_RETENTION_DAYS, 0)
+        before_timestamp = int((time.time() - retention_days * 24 * 60 * 60) * 10 ** 6) if retention_days else None
+
+        return self.block.prune(stop_height=self.block.block_height + 1 - retention,
+                                before_timestamp=before_timestamp)
+
+    def _make_block_data(self, block_hash: str, tx: Union[list, dict], timestamp: int, invoke_response: dict,
+                         block_height: int = None, prev_block_hash: str = None):
         is_genesis = isinstance(tx, dict)
         tx_list = []
         tx_results = invoke_response['txResults']
@@ -538,23 +984,21 @@ class BlockManager(object):
                 if "logsBloom" in tx_result.keys():
                     logs_bloom = logs_bloom + int(tx_result['logsBloom'], 16)
 
-        block_height = self.block.block_height + 1
-
-        preps = [] if self._prep_manager.prep_list is None else self._prep_manager.prep_list
-        preps = [prep['id'] for prep in preps]
-        preps = [f'00{prep[2:]}'.encode() for prep in preps]
-        prev_preps = [] if self._prep_manager.prev_preps is None else self._prep_manager.prev_preps
-        prev_preps = [prep['id'] for prep in prev_preps]
-        prev_preps = [f'00{prep[2:]}'.encode() for prep in prev_preps]
+        if block_height is None:
+            block_height = self.block.block_height + 1
+        if prev_block_hash is None:
+            prev_block_hash = self.block.prev_block_hash
 
-        transactions_hash = generate_hash(tx_list)
+        # hashes are made inline. they are pure Python and hold the GIL, so threads don't run them in parallel
+        transactions_hash = self._generate_transactions_hash(tx_list)
         receipts_hash = generate_hash(tx_results)
-        pre_votes_hash = generate_hash(self._prep_manager.prev_votes, "icx_vote")
-        reps_hash = generate_hash(prev_preps)
-        next_reps_hash = generate_hash(preps)
+        prev_votes = self._prep_manager.prev_votes
+        pre_votes_hash = generate_hash(prev_votes, VOTE_HASH_SALT)
+        reps_hash = self._prep_manager.get_reps_hash()
+        next_reps_hash = self._prep_manager.get_next_reps_hash()
         block = {
             "version": "tbears",
-            "prevHash": self.block.prev_block_hash if not is_genesis else "",
+            "prevHash": prev_block_hash if not is_genesis else "",
             "transactionsHash": transactions_hash,
             "stateHash": invoke_response['stateRootHash'],
             "receiptsHash": receipts_hash,
@@ -566,7 +1010,7 @@ class BlockManager(object):
             "timestamp": timestamp,
             "transactions": tx_list,
             "leaderVotes": [],
-            "prevVotes": self._prep_manager.prev_votes,
+            "prevVotes": prev_votes,
             "hash": block_hash,
             "height": block_height,
             "leader": self._prep_manager.prev_generator,
@@ -575,6 +1019,12 @@ class BlockManager(object):
         }
         return block
 
+    @staticmethod
+    def _generate_transactions_hash(tx_list: list) -> str:
+        transactions_root = MerkleRoot()
+        transactions_root.extend_leaves([get_tx_leaf_hash(tx) for tx in tx_list])
+        return transactions_root.hexdigest()
+
 
 def create_parser():
     """
@@ -592,6 +1042,8 @@ def create_parser():
                         help='Block confirm interval in second')
     parser.add_argument('-be', '--block-confirm-empty', dest=TConfigKey.BLOCK_CONFIRM_EMPTY, type=bool,
                         help='Confirm empty block')
+    parser.add_argument('-em', '--embedded', dest=TConfigKey.EMBEDDED, action='store_true', default=None,
+                        help='Run iconservice and iconrpcserver in the same process without message queue')
     parser.add_argument('-c', '--config', help='Configuration file path')
 
     return parser
@@ -624,8 +1076,13 @@ def main():
     setproctitle.setproctitle(f'{TBEARS_BLOCK_MANAGER}.{conf[TConfigKey.CHANNEL]}.{conf[TConfigKey.AMQP_KEY]}')
 
     # run block_manager service
-    block_manager = BlockManager(conf=conf)
-    block_manager.serve()
+    if conf.get(TConfigKey.EMBEDDED, False):
+        # imports iconservice and iconrpcserver only in embedded mode
+        from tbears.block_manager.embedded import serve_embedded
+        serve_embedded(conf)
+    else:
+        block_manager = BlockManager(conf=conf)
+        block_manager.serve()
 
     Logger.info('===============tbears block_manager done================', TBEARS_BLOCK_MANAGER)
 
@@ -0,0 +1,276 @@
+# Copyright 2021 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+New block notifications of tbears block_manager.
+
+block_manager publishes a compact notification of each confirmed block on a fanout channel, so subscribers don't need
+to poll 'icx_getLastBlock'. The channel follows the transport of tbears service.
+    - message queue: fanout exchange NEW_BLOCK_EXCHANGE_NAME_FORMAT of RabbitMQ
+    - Unix domain socket: '<udsTarget>/<exchange name>.sock'. Frame is 4 bytes big-endian length followed by JSON
+Notifications are not queued for subscribers which are not connected.
+"""
+import asyncio
+import json
+import os
+import struct
+from abc import ABC, abstractmethod
+from typing import Optional, Set
+
+import aio_pika
+from iconcommons.logger import Logger
+
+from tbears.block_manager.unix_socket import get_unix_socket_path
+from tbears.config.tbears_config import TConfigKey
+
+NEW_BLOCK_EXCHANGE_NAME_FORMAT = "NewBlock.{channel_name}.{amqp_key}"
+# subscriber which doesn't read notifications is disconnected
+MAX_SUBSCRIBER_BUFFER_SIZE = 1024 * 1024
+
+_HEADER = struct.Struct('>I')
+_TAG = 'block_notifier'
+
+
+def make_new_block_notification(block_data: dict) -> dict:
+    """
+    Make new block notification from block data
+    :param block_data: block data made by block_manager
+    :return: height, hash, number of transactions and logsBloom of the block
+    """
+    return {
+        "height": block_data['height'],
+        "hash": block_data['hash'],
+        "txCount": len(block_data['transactions']),
+        "logsBloom": block_data['logsBloom']
+    }
+
+
+def _get_exchange_name(conf: dict) -> str:
+    return NEW_BLOCK_EXCHANGE_NAME_FORMAT.format(channel_name=conf[TConfigKey.CHANNEL],
+                                                 amqp_key=conf[TConfigKey.AMQP_KEY])
+
+
+def _connect_amqp(amqp_target: str):
+    return aio_pika.connect_robust(host=amqp_target,
+                                   login=os.getenv("AMQP_USERNAME", "guest"),
+                                   password=os.getenv("AMQP_PASSWORD", "guest"))
+
+
+class BlockPublisher(ABC):
+    """
+    Publish new block notifications to subscribers
+    """
+    async def connect(self):
+        pass
+
+    @abstractmethod
+    async def publish(self, notification: dict):
+        pass
+
+    def close(self):
+        pass
+
+
+class AmqpBlockPublisher(BlockPublisher):
+    def __init__(self, amqp_target: str, exchange_name: str):
+        """
+        :param amqp_target: AMQP target
+        :param exchange_name: fanout exchange name
+        """
+        self._amqp_target = amqp_target
+        self._exchange_name = exchange_name
+        self._connection: 'aio_pika.RobustConnection' = None
+        self._exchange: 'aio_pika.Exchange' = None
+
+    async def connect(self):
+        self._connection = await _connect_amqp(self._amqp_target)
+        channel = await self._connection.channel()
+        self._exchange = await channel.declare_exchange(self._exchange_name, aio_pika.ExchangeType.FANOUT)
+
+    async def publish(self, notification: dict):
+        message = aio_pika.Message(body=json.dumps(notification).encode(), content_type='application/json')
+        await self._exchange.publish(message, routing_key='')
+
+    def close(self):
+        if self._connection is not None:
+            asyncio.ensure_future(self._connection.close())
+            self._connection = None
+
+
+class UnixSocketBlockPublisher(BlockPublisher):
+    def __init__(self, path: str):
+        """
+        :param path: socket file path. See get_unix_socket_path()
+        """
+        self._path = path
+        self._server: Optional['asyncio.AbstractServer'] = None
+        self._writers: Set['asyncio.StreamWriter'] = set()
+
+    async def connect(self):
+        if os.path.exists(self._path):
+            os.remove(self._path)
+        os.makedirs(os.path.dirname(self._path) or '.', exist_ok=True)
+
+        self._server = await asyncio.start_unix_server(self._on_connected, path=self._path)
+        os.chmod(self._path, 0o600)
+
+    async def publish(self, notification: dict):
+        body = json.dumps(notification).encode()
+        frame = _HEADER.pack(len(body)) + body
+        for writer in list(self._writers):
+            if writer.transport.get_write_buffer_size() > MAX_SUBSCRIBER_BUFFER_SIZE:
+                Logger.warning(f'Disconnect slow new block subscriber', _TAG)
+                self._writers.discard(writer)
+                writer.close()
+                continue
+            writer.write(frame)
+
+    def close(self):
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+        for writer in self._writers:
+            writer.close()
+        self._writers.clear()
+        if os.path.exists(self._path):
+            os.remove(self._path)
+
+    async def _on_connected(self, reader: 'asyncio.StreamReader', writer: 'asyncio.StreamWriter'):
+        self._writers.add(writer)
+        # subscribers don't send anything. EOF means the subscriber is closed
+        await reader.read()
+        self._writers.discard(writer)
+        writer.close()
+
+
+class NewBlockSubscriber(ABC):
+    """
+    Receive new block notifications published by tbears block_manager
+
+        subscriber = create_new_block_subscriber(server_conf)
+        await subscriber.connect()
+        async for notification in subscriber:
+            print(notification['height'])
+    """
+    @abstractmethod
+    async def connect(self):
+        pass
+
+    @abstractmethod
+    async def get(self) -> dict:
+        """
+        Wait for the next new block notification
+        :return: new block notification. See make_new_block_notification()
+        """
+        pass
+
+    def close(self):
+        pass
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> dict:
+        try:
+            return await self.get()
+        except ConnectionError:
+            raise StopAsyncIteration
+
+
+class AmqpNewBlockSubscriber(NewBlockSubscriber):
+    def __init__(self, amqp_target: str, exchange_name: str):
+        """
+        :param amqp_target: AMQP target
+        :param exchange_name: fanout exchange name
+        """
+        self._amqp_target = amqp_target
+        self._exchange_name = exchange_name
+        self._connection: 'aio_pika.RobustConnection' = None
+        self._notifications: 'asyncio.Queue' = asyncio.Queue()
+
+    async def connect(self):
+        self._connection = await _connect_amqp(self._amqp_target)
+        channel = await self._connection.channel()
+        exchange = await channel.declare_exchange(self._exchange_name, aio_pika.ExchangeType.FANOUT)
+
+        # queue of the subscriber is removed when the subscriber is closed
+        queue = await channel.declare_queue(exclusive=True, auto_delete=True)
+        await queue.bind(exchange)
+        await queue.consume(self._on_message, no_ack=True)
+
+    async def get(self) -> dict:
+        return await self._notifications.get()
+
+    def close(self):
+        if self._connection is not None:
+            asyncio.ensure_future(self._connection.close())
+            self._connection = None
+
+    def _on_message(self, message: 'aio_pika.IncomingMessage'):
+        self._notifications.put_nowait(json.loads(message.body))
+
+
+class UnixSocketNewBlockSubscriber(NewBlockSubscriber):
+    def __init__(self, path: str):
+        """
+        :param path: socket file path. See get_unix_socket_path()
+        """
+        self._path = path
+        self._reader: 'asyncio.StreamReader' = None
+        self._writer: 'asyncio.StreamWriter' = None
+
+    async def connect(self):
+        try:
+            self._reader, self._writer = await asyncio.open_unix_connection(self._path)
+        except (FileNotFoundError, ConnectionRefusedError) as e:
+            raise RuntimeError(f"Failed to connect to {self._path}. ({e})")
+
+    async def get(self) -> dict:
+        try:
+            header = await self._reader.readexactly(_HEADER.size)
+            body = await self._reader.readexactly(_HEADER.unpack(header)[0])
+        except asyncio.IncompleteReadError:
+            raise ConnectionError(f'New block publisher is closed. {self._path}')
+        return json.loads(body)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+def create_block_publisher(conf: dict) -> Optional['BlockPublisher']:
+    """
+    Create new block publisher on the transport of tbears service
+    :param conf: tbears configuration
+    :return: new block publisher. None in embedded mode without Unix domain sockets
+    """
+    if conf.get(TConfigKey.UDS_TARGET):
+        return UnixSocketBlockPublisher(get_unix_socket_path(conf[TConfigKey.UDS_TARGET], _get_exchange_name(conf)))
+    if conf.get(TConfigKey.EMBEDDED, False):
+        return None
+    return AmqpBlockPublisher(conf[TConfigKey.AMQP_TARGET], _get_exchange_name(conf))
+
+
+def create_new_block_subscriber(conf: dict) -> Optional['NewBlockSubscriber']:
+    """
+    Create new block subscriber on the transport of tbears service
+    :param conf: tbears configuration. e.g. server configuration written by 'tbears start'
+    :return: new block subscriber. None in embedded mode without Unix domain sockets
+    """
+    if conf.get(TConfigKey.UDS_TARGET):
+        return UnixSocketNewBlockSubscriber(get_unix_socket_path(conf[TConfigKey.UDS_TARGET],
+                                                                 _get_exchange_name(conf)))
+    if conf.get(TConfigKey.EMBEDDED, False):
+        return None
+    return AmqpNewBlockSubscriber(conf[TConfigKey.AMQP_TARGET], _get_exchange_name(conf))
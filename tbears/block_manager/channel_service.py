@@ -12,16 +12,15 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import base64
-import hashlib
-import json
-from typing import Tuple, TYPE_CHECKING, Optional
+from asyncio import gather, get_event_loop
+from typing import List, Tuple, TYPE_CHECKING, Optional
 
-from earlgrey import MessageQueueService, message_queue_task
+from earlgrey import MessageQueueService, MessageQueueStub, message_queue_task
 from iconcommons.logger import Logger
 
 from . import message_code
-from .tx_verifier import verify_signature
+from .log_query import LOG_QUERY_LIMIT
+from .unix_socket import UnixSocketService, UnixSocketStub
 from iconsdk.libs.serializer import serialize
 from ..util import create_hash
 
@@ -29,6 +28,13 @@ if TYPE_CHECKING:
     from earlgrey import RobustConnection
     from tbears.block_manager.block_manager import BlockManager
 
+WAIT_INVOKE_RESULT_TIMEOUT = 10
+WAIT_INVOKE_RESULT_MAX_TIMEOUT = 60
+# fields of transaction used by tbears block_manager before iconservice validates it
+TX_REQUIRED_KEYS = ('from', 'to', 'signature')
+# maximum number of validate_transaction requests sent to iconservice at once
+VALIDATE_TX_CONCURRENCY = 100
+
 
 class ChannelInnerTask(object):
     """
@@ -55,6 +61,25 @@ class ChannelInnerTask(object):
 
         return message_code.Response.success, tx_data_json
 
+    @message_queue_task
+    async def wait_invoke_result(self, tx_hash: str, timeout: float = WAIT_INVOKE_RESULT_TIMEOUT) \
+            -> Tuple[int, Optional[str]]:
+        """
+        Handler of 'wait_invoke_result' message. Same as 'get_invoke_result', but the response is returned as soon as
+        the block including the transaction is written instead of returning 'fail_tx_not_invoked' for pending one
+        :param tx_hash: transaction hash
+        :param timeout: timeout in second. up to WAIT_INVOKE_RESULT_MAX_TIMEOUT
+        :return: message code and transaction result information
+        """
+        Logger.debug(f'Get wait_invoke_result tx_hash: {tx_hash}, timeout: {timeout}')
+
+        timeout = min(timeout, WAIT_INVOKE_RESULT_MAX_TIMEOUT)
+        tx_data_json = await self._block_manager.wait_tx_result(tx_hash=tx_hash, timeout=timeout)
+        if tx_data_json is None:
+            return message_code.Response.fail_tx_not_invoked, None
+
+        return message_code.Response.success, tx_data_json
+
     @message_queue_task
     async def get_tx_info(self, tx_hash: str) -> Tuple[int, dict]:
         """
@@ -86,35 +111,80 @@ class ChannelInnerTask(object):
 
         fail_response_code: int = None
 
+        # forward stored block without decoding. block hash comes from block index
         if block_hash == "" and block_height == -1:
             # getLastBlock
-            block_data_json = block.get_last_block()
-            if block_data_json is None:
+            raw_block = block.get_last_block_raw()
+            if raw_block is None:
                 fail_response_code = message_code.Response.fail_wrong_block_hash
         elif block_hash:
             # getBlockByHash
-            block_data_json = block.get_block_by_hash(block_hash=block_hash)
-            if block_data_json is None:
+            raw_block = block.get_block_raw_by_hash(block_hash=block_hash)
+            if raw_block is None:
                 fail_response_code = message_code.Response.fail_wrong_block_hash
         else:
             # getBlockByHeight
-            block_data_json = block.get_block_by_height(block_height=block_height)
-            if block_data_json is None:
+            raw_block = block.get_block_raw_by_height(block_height=block_height)
+            if raw_block is None:
                 fail_response_code = message_code.Response.fail_wrong_block_height
 
         if fail_response_code:
             return fail_response_code, block_hash, b'', ""
 
-        block_hash: str = block_data_json.get('hash')
-        # below block v0.3
-        block_hash: str = block_hash if block_hash else block_data_json['block_hash']
-        block_data_json_str: str = json.dumps(block_data_json)
+        block_hash, block_data_json = raw_block
+        block_data_json_str: str = block_data_json.decode()
 
         # tbears does not support filters
 
         Logger.debug(f'Response block!!', "block")
         return message_code.Response.success, block_hash, b'0x1', block_data_json_str
 
+    @message_queue_task
+    async def get_tx_by_address(self, address: str, index: int) -> Tuple[list, int]:
+        """
+        Handler of 'get_tx_by_address' message. 'get_tx_by_address' is generated by 'icx_getTransactionByAddress'
+        :param address: address
+        :param index: index of the first transaction. 0 for the first page
+        :return: transaction hashes and index of the next page. index is 0 if there is no next page
+        """
+        Logger.debug(f'Get get_tx_by_address message address: {address}, index: {index}')
+        block = self._block_manager._block
+
+        tx_list, next_index = block.get_tx_by_address(address=address, index=int(index))
+
+        # iconrpcserver removes the last item like loopchain does
+        tx_list.append(next_index)
+        return tx_list, next_index
+
+    @message_queue_task
+    async def get_logs(self, start: int = 0, end: int = None, address: str = None, event: str = None,
+                       limit: int = LOG_QUERY_LIMIT) -> Tuple[int, list]:
+        """
+        Handler of 'get_logs' message. 'get_logs' is generated by 'tbears logs' command
+        :param start: first block height
+        :param end: last block height. last block if None
+        :param address: SCORE address which emitted the event log
+        :param event: event signature
+        :param limit: maximum number of event logs
+        :return: message code and event logs
+        """
+        Logger.debug(f'Get get_logs message start: {start}, end: {end}, address: {address}, event: {event}')
+
+        # scanning blocks does not block the event loop
+        logs = await get_event_loop().run_in_executor(None, self._block_manager.log_query.query,
+                                                      start, end, address, event, limit)
+        return message_code.Response.success, logs
+
+    @message_queue_task
+    async def get_metrics(self) -> Tuple[int, dict]:
+        """
+        Handler of 'get_metrics' message.
+        :return: message code and metrics of block manager
+        """
+        Logger.debug(f'Get get_metrics message')
+
+        return message_code.Response.success, self._block_manager.get_metrics()
+
 
 class ChannelService(MessageQueueService[ChannelInnerTask]):
     TaskType = ChannelInnerTask
@@ -124,6 +194,37 @@ class ChannelService(MessageQueueService[ChannelInnerTask]):
         self._task._block_manager.close()
 
 
+class ChannelSocketService(UnixSocketService[ChannelInnerTask]):
+    TaskType = ChannelInnerTask
+
+
+class ChannelInnerStubTask(object):
+    """
+    Send request to 'channel' message queue. Used by tbears CLI
+    """
+    @message_queue_task
+    async def wait_invoke_result(self, tx_hash: str, timeout: float = WAIT_INVOKE_RESULT_TIMEOUT) \
+            -> Tuple[int, Optional[str]]:
+        pass
+
+    @message_queue_task
+    async def get_logs(self, start: int = 0, end: int = None, address: str = None, event: str = None,
+                       limit: int = LOG_QUERY_LIMIT) -> Tuple[int, list]:
+        pass
+
+    @message_queue_task
+    async def get_metrics(self) -> Tuple[int, dict]:
+        pass
+
+
+class ChannelStub(MessageQueueStub[ChannelInnerStubTask]):
+    TaskType = ChannelInnerStubTask
+
+
+class ChannelSocketStub(UnixSocketStub[ChannelInnerStubTask]):
+    TaskType = ChannelInnerStubTask
+
+
 class ChannelTxCreatorInnerTask(object):
     def __init__(self, block_manager: 'BlockManager'):
         self._block_manager = block_manager
@@ -144,30 +245,115 @@ class ChannelTxCreatorInnerTask(object):
         tx_hash = create_hash(serialized_data)
 
         # check duplication
-        duplicated_tx = False
-        for tx in block_manager.tx_queue:
-            if tx_hash == tx['txHash']:
-                duplicated_tx = True
-        if duplicated_tx is False and block_manager._block.get_transaction(tx_hash=tx_hash):
-            duplicated_tx = True
-
-        if duplicated_tx:
+        if block_manager.is_tx_pending(tx_hash) or block_manager.block.has_transaction(tx_hash):
             return message_code.Response.fail_tx_invalid_duplicated_hash, None, ''
 
+        # check transaction pool capacity
+        if block_manager.tx_pool.is_full():
+            return message_code.Response.fail_out_of_tps_limit, None, ''
+
         # check signature validity
         signature = kwargs['signature']
         if signature != 'sig':
-            msg_hash = hashlib.sha3_256(serialized_data).digest()
-            sig_byte = base64.b64decode(signature)
-            if not verify_signature(msg_hash, sig_byte, kwargs['from']):
+            verifier = block_manager.signature_verifier
+            with block_manager.metrics.signature_verify.time():
+                verified = await verifier.verify(serialized_data, signature, kwargs['from'])
+            if not verified:
                 return message_code.Response.fail_tx_invalid_signature, None, ''
 
-        # append to transaction queue
-        block_manager.add_tx(tx_hash=tx_hash, tx=kwargs)
+            # same transaction may be added while verifying signature
+            if block_manager.is_tx_pending(tx_hash):
+                return message_code.Response.fail_tx_invalid_duplicated_hash, None, ''
+
+        # append to transaction pool
+        if not block_manager.add_tx(tx_hash=tx_hash, tx=kwargs, size=len(serialized_data)):
+            return message_code.Response.fail_out_of_tps_limit, None, ''
 
         Logger.debug(f'Response create_icx_tx!!', "create_icx_tx")
         return message_code.Response.success, f"0x{tx_hash}", ''
 
+    @message_queue_task
+    async def create_icx_tx_batch(self, tx_list: list) -> List[Tuple[int, Optional[str], str]]:
+        """
+        Handler of 'create_icx_tx_batch' message. Validate transactions as a group and enqueue them at once.
+        Transactions are pre-validated by iconservice like 'icx_sendTransaction' of iconrpcserver.
+        Invalid transaction fails by itself and does not fail the others.
+        Pre-validation requests are sent in chunks of VALIDATE_TX_CONCURRENCY so that a big batch does not flood
+        iconservice. Each chunk waits for its slowest request, which adds latency to big batches
+        :param tx_list: list of transaction data
+        :return: message code, transaction hash and message of each transaction
+        """
+        Logger.debug(f'Get create_icx_tx_batch message!! count: {len(tx_list)}', "create_icx_tx_batch")
+        block_manager = self._block_manager
+        results: list = [None] * len(tx_list)
+        serialized_list: list = [None] * len(tx_list)
+        tx_hashes: list = [None] * len(tx_list)
+
+        # check required fields and generate tx hashes
+        for i, tx in enumerate(tx_list):
+            if not isinstance(tx, dict) or not all(key in tx for key in TX_REQUIRED_KEYS):
+                results[i] = (message_code.Response.fail_tx_invalid_params, None,
+                              f'Transaction must have {", ".join(TX_REQUIRED_KEYS)}')
+                continue
+            serialized_list[i] = serialize(tx)
+            tx_hashes[i] = create_hash(serialized_list[i])
+
+        # check duplication in the batch, transaction pool, unwritten block and block DB
+        indexes = [i for i, result in enumerate(results) if result is None]
+        saved = block_manager.block.has_transactions([tx_hashes[i] for i in indexes])
+        tx_hash_set = set()
+        for i, is_saved in zip(indexes, saved):
+            tx_hash = tx_hashes[i]
+            if is_saved or tx_hash in tx_hash_set or block_manager.is_tx_pending(tx_hash):
+                results[i] = (message_code.Response.fail_tx_invalid_duplicated_hash, None, '')
+            tx_hash_set.add(tx_hash)
+
+        # check transaction pool capacity
+        if block_manager.tx_pool.is_full():
+            return [(message_code.Response.fail_out_of_tps_limit, None, '') if result is None else result
+                    for result in results]
+
+        # pre-validate transactions with iconservice
+        indexes = [i for i, result in enumerate(results) if result is None]
+        icon_task = block_manager.icon_stub.async_task()
+        for start in range(0, len(indexes), VALIDATE_TX_CONCURRENCY):
+            chunk = indexes[start:start + VALIDATE_TX_CONCURRENCY]
+            responses = await gather(*[icon_task.validate_transaction({'method': 'icx_sendTransaction',
+                                                                        'params': tx_list[i]}) for i in chunk])
+            for i, response in zip(chunk, responses):
+                if 'error' in response:
+                    results[i] = (message_code.Response.fail_tx_invalid_params, None,
+                                  response['error'].get('message', ''))
+
+        # check signature validity
+        indexes = [i for i, result in enumerate(results) if result is None and tx_list[i]['signature'] != 'sig']
+        if indexes:
+            requests = [(serialized_list[i], tx_list[i]['signature'], tx_list[i]['from']) for i in indexes]
+            verified_list = await block_manager.signature_verifier.verify_many(requests)
+            for i, verified in zip(indexes, verified_list):
+                if not verified:
+                    results[i] = (message_code.Response.fail_tx_invalid_signature, None, '')
+
+        # same transaction may be added while validating
+        indexes = []
+        for i, result in enumerate(results):
+            if result is None:
+                if block_manager.is_tx_pending(tx_hashes[i]):
+                    results[i] = (message_code.Response.fail_tx_invalid_duplicated_hash, None, '')
+                else:
+                    indexes.append(i)
+
+        # append to transaction pool at once
+        added_list = block_manager.add_txs([(tx_hashes[i], tx_list[i], len(serialized_list[i])) for i in indexes])
+        for i, added in zip(indexes, added_list):
+            if added:
+                results[i] = (message_code.Response.success, f"0x{tx_hashes[i]}", '')
+            else:
+                results[i] = (message_code.Response.fail_out_of_tps_limit, None, '')
+
+        Logger.debug(f'Response create_icx_tx_batch!!', "create_icx_tx_batch")
+        return results
+
 
 class ChannelTxCreatorService(MessageQueueService[ChannelTxCreatorInnerTask]):
     TaskType = ChannelTxCreatorInnerTask
@@ -175,3 +361,28 @@ class ChannelTxCreatorService(MessageQueueService[ChannelTxCreatorInnerTask]):
     def _callback_connection_close(self, exc: Exception):
         Logger.error(f'[ChannelTxCreatorService] close message queue connection. {exc}', 'tbears_block_manager')
         self._task._block_manager.close()
+
+
+class ChannelTxCreatorSocketService(UnixSocketService[ChannelTxCreatorInnerTask]):
+    TaskType = ChannelTxCreatorInnerTask
+
+
+class ChannelTxCreatorInnerStubTask(object):
+    """
+    Send request to 'channel tx creator' message queue. Used by clients submitting transactions in bulk
+    """
+    @message_queue_task
+    async def create_icx_tx(self, kwargs: dict) -> Tuple[int, Optional[str], str]:
+        pass
+
+    @message_queue_task
+    async def create_icx_tx_batch(self, tx_list: list) -> List[Tuple[int, Optional[str], str]]:
+        pass
+
+
+class ChannelTxCreatorStub(MessageQueueStub[ChannelTxCreatorInnerStubTask]):
+    TaskType = ChannelTxCreatorInnerStubTask
+
+
+class ChannelTxCreatorSocketStub(UnixSocketStub[ChannelTxCreatorInnerStubTask]):
+    TaskType = ChannelTxCreatorInnerStubTask
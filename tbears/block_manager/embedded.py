@@ -0,0 +1,117 @@
+# Copyright 2021 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Embedded tbears service.
+
+iconservice, tbears block_manager and iconrpcserver run in a single asyncio process. Message queue stubs are replaced
+with LocalStub, so RabbitMQ is not needed.
+"""
+import asyncio
+import signal
+from copy import deepcopy
+
+from earlgrey import MessageQueueService
+from iconcommons.icon_config import IconConfig
+from iconcommons.logger import Logger
+from iconrpcserver.default_conf.icon_rpcserver_config import default_rpcserver_config
+from iconrpcserver.default_conf.icon_rpcserver_constant import ConfigKey as RpcConfigKey
+from iconrpcserver.server.rest_server import ServerComponents
+from iconrpcserver.utils.message_queue.stub_collection import StubCollection
+from iconservice.icon_config import default_icon_config
+from iconservice.icon_inner_service import IconScoreInnerTask
+
+from tbears.block_manager.block_manager import BlockManager, TBEARS_BLOCK_MANAGER
+from tbears.config.tbears_config import TConfigKey
+
+
+def serve_embedded(conf: 'IconConfig'):
+    """
+    Run iconservice, tbears block_manager and iconrpcserver in the current process until SIGINT or SIGTERM
+    :param conf: tbears configuration
+    :return:
+    """
+    # iconservice engine must be opened with the event loop of services
+    loop = MessageQueueService.loop
+    asyncio.set_event_loop(loop)
+
+    icon_task = IconScoreInnerTask(make_icon_conf(conf))
+
+    block_manager = BlockManager(conf=conf, icon_task=icon_task)
+    rpc_server = None
+
+    async def _serve():
+        nonlocal rpc_server
+        try:
+            await block_manager.init()
+            rpc_server = await start_rpc_server(conf, block_manager.channel_stub, block_manager.tx_creator_stub,
+                                                block_manager.icon_stub)
+        except Exception as e:
+            msg = f'Failed to start embedded tbears service. ({e})'
+            Logger.error(msg, TBEARS_BLOCK_MANAGER)
+            print(msg)
+            block_manager.close()
+            return
+
+        Logger.info(f'embedded tbears service started!', TBEARS_BLOCK_MANAGER)
+
+    loop.create_task(_serve())
+    loop.add_signal_handler(signal.SIGINT, loop.stop)
+    loop.add_signal_handler(signal.SIGTERM, loop.stop)
+
+    try:
+        loop.run_forever()
+    finally:
+        if rpc_server is not None:
+            loop.run_until_complete(rpc_server.close())
+        icon_task.cleanup()
+
+
+def make_icon_conf(conf: 'IconConfig') -> 'IconConfig':
+    """
+    Make iconservice configuration from tbears configuration
+    :param conf: tbears configuration
+    :return: iconservice configuration
+    """
+    icon_conf = IconConfig(str(), deepcopy(default_icon_config))
+    icon_conf.update_conf(deepcopy(dict(conf)))
+    return icon_conf
+
+
+async def start_rpc_server(conf: 'IconConfig', channel_stub, tx_creator_stub, icon_stub):
+    """
+    Start JSON-RPC server of iconrpcserver in the current process with the given stubs instead of message queue stubs
+    :param conf: tbears configuration
+    :param channel_stub: connected stub of channel tasks
+    :param tx_creator_stub: connected stub of channel tx creator tasks
+    :param icon_stub: connected stub of iconservice tasks
+    :return: sanic AsyncioServer
+    """
+    rpc_conf = IconConfig(str(), deepcopy(default_rpcserver_config))
+    rpc_conf.update_conf(deepcopy(dict(conf)))
+    rpc_conf[RpcConfigKey.TBEARS_MODE] = True
+
+    channel = conf[TConfigKey.CHANNEL]
+    stub_collection = StubCollection()
+    stub_collection.conf = rpc_conf
+    stub_collection.channel_stubs[channel] = channel_stub
+    stub_collection.channel_tx_creator_stubs[channel] = tx_creator_stub
+    stub_collection.icon_score_stubs[channel] = icon_stub
+
+    ServerComponents.conf = rpc_conf
+    server_components = ServerComponents()
+    server_components.set_resource()
+
+    return await server_components.app.create_server(host=conf['hostAddress'], port=conf['port'],
+                                                     ssl=server_components.ssl_context, access_log=False,
+                                                     return_asyncio_server=True)
@@ -11,22 +11,148 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-from iconservice.utils.hashing.hash_generator import HashGenerator, RootHashGenerator
+from hashlib import sha3_256
+from typing import Iterable, List, Optional
+
+from iconservice.utils.hashing.hash_origin_generator import HashOriginGeneratorV1
 
 TRANSACTION_HASH_SALT = "icx_sendTransaction"
+VOTE_HASH_SALT = "icx_vote"
+EMPTY_ROOT_HASH = "0" * 64
+
+# stateless. origin data is not modified, so it is not copied like HashGenerator does
+_ORIGIN_GENERATOR = HashOriginGeneratorV1()
+
+
+def get_hash(data: dict, salt: Optional[str] = TRANSACTION_HASH_SALT) -> bytes:
+    """
+    Get hash of the data. Same as iconservice HashGenerator.generate_hash() with HashGenerator._SALT = salt,
+    but the salt is not shared, so hashes with different salts can be made concurrently
+    :param data: origin data
+    :param salt: salt. no salt if None
+    :return: sha3_256 hash
+    """
+    origin = _ORIGIN_GENERATOR.generate(data)
+    if salt is not None:
+        origin = f'{salt}.{origin}'
+    return sha3_256(origin.encode()).digest()
+
+
+def get_leaf_hash(elem, salt: Optional[str] = TRANSACTION_HASH_SALT) -> Optional[bytes]:
+    """
+    Get merkle tree leaf of the element. Same as the leaf of RootHashGenerator.generate_root_hash(values, True)
+    :param elem: dict is hashed with the salt. bytes is used as it is
+    :param salt: salt of dict hash
+    :return: leaf hash. None for None element
+    """
+    if elem is None:
+        return None
+    if isinstance(elem, dict):
+        elem = get_hash(elem, salt)
+    return sha3_256(elem).digest()
+
+
+class MerkleRoot(object):
+    """
+    Incremental merkle root of iconservice MerkleTree.
+    Nodes are paired from the left on each level and the odd last node is promoted to the upper level.
+    Only the roots of complete subtrees are kept, so a leaf is added in O(1) amortized time and the root is made
+    in O(log n) time without rebuilding the tree
+    """
+    def __init__(self, salt: Optional[str] = TRANSACTION_HASH_SALT):
+        """
+        :param salt: salt of dict element hash
+        """
+        self._salt = salt
+        # root of the complete subtree of 2^level leaves which is not paired yet
+        self._nodes: List[Optional[bytes]] = []
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def add_leaf(self, leaf: bytes):
+        """
+        Add leaf hash
+        :param leaf: leaf hash. See get_leaf_hash()
+        :return:
+        """
+        self.extend_leaves((leaf,))
+
+    def add(self, elem):
+        """
+        Add element. None is ignored
+        :param elem: dict or bytes
+        :return:
+        """
+        leaf = get_leaf_hash(elem, self._salt)
+        if leaf is not None:
+            self.add_leaf(leaf)
+
+    def extend(self, elems: Iterable):
+        """
+        Add elements. Leaves are hashed in a batch before they are added to the tree
+        :param elems: dict or bytes elements
+        :return:
+        """
+        salt = self._salt
+        leaves = [get_leaf_hash(elem, salt) for elem in elems]
+        self.extend_leaves([leaf for leaf in leaves if leaf is not None])
+
+    def extend_leaves(self, leaves: Iterable[bytes]):
+        """
+        Add leaf hashes which are hashed in advance. e.g. Transaction.leaf_hash
+        :param leaves: leaf hashes
+        :return:
+        """
+        nodes = self._nodes
+        count = self._count
+        for leaf in leaves:
+            # carry the pair up while the level has a node like a binary counter
+            level = 0
+            bit = 1
+            while count & bit:
+                leaf = sha3_256(nodes[level] + leaf).digest()
+                nodes[level] = None
+                level += 1
+                bit <<= 1
+
+            if level == len(nodes):
+                nodes.append(leaf)
+            else:
+                nodes[level] = leaf
+            count += 1
+        self._count = count
+
+    def digest(self) -> Optional[bytes]:
+        """
+        Get merkle root
+        :return: merkle root. None if there are no leaves
+        """
+        root = None
+        for node in self._nodes:
+            if node is not None:
+                root = node if root is None else sha3_256(node + root).digest()
+        return root
+
+    def hexdigest(self) -> str:
+        """
+        Get merkle root in hex string
+        :return: merkle root. EMPTY_ROOT_HASH if there are no leaves
+        """
+        root = self.digest()
+        return EMPTY_ROOT_HASH if root is None else root.hex()
 
 
-def generate_hash(data: list, salt: str = TRANSACTION_HASH_SALT):
+def generate_hash(data: list, salt: Optional[str] = TRANSACTION_HASH_SALT) -> str:
+    """
+    Generate merkle root of the data. Thread-safe
+    :param data: dict or bytes elements. None elements are ignored
+    :param salt: salt of dict element hash
+    :return: merkle root in hex string. EMPTY_ROOT_HASH if there are no elements
+    """
     if not data:
-        return "0" * 64
-    HashGenerator._SALT = salt
-    values = []
-    for elem in data:
-        if isinstance(elem, dict):
-            value = HashGenerator.generate_hash(elem)
-        elif elem is None:
-            continue
-        else:
-            value = elem
-        values.append(value)
-    return RootHashGenerator.generate_root_hash(values, True).hex()
+        return EMPTY_ROOT_HASH
+    merkle_root = MerkleRoot(salt)
+    merkle_root.extend(data)
+    return merkle_root.hexdigest()
@@ -17,6 +17,8 @@ from typing import TYPE_CHECKING
 from earlgrey import MessageQueueStub, message_queue_task
 from iconcommons.logger import Logger
 
+from .unix_socket import UnixSocketStub
+
 
 if TYPE_CHECKING:
     from earlgrey import RobustConnection
@@ -38,6 +40,10 @@ class IconScoreInnerTask(object):
     async def query(self, request: dict) -> dict:
         pass
 
+    @message_queue_task
+    async def validate_transaction(self, request: dict) -> dict:
+        pass
+
     @message_queue_task
     async def write_precommit_state(self, request: dict) -> dict:
         pass
@@ -57,3 +63,10 @@ class IconStub(MessageQueueStub[IconScoreInnerTask]):
     def _callback_connection_close(self, connection: 'RobustConnection'):
         Logger.error(f'[IconStub] close message queue connection', 'tbears_block_manager')
         self._task._block_manager.close()
+
+
+class IconSocketStub(UnixSocketStub[IconScoreInnerTask]):
+    TaskType = IconScoreInnerTask
+
+    def _callback_connection_close(self, exc: Exception):
+        Logger.error(f'[IconSocketStub] close unix domain socket connection. {exc}', 'tbears_block_manager')
@@ -0,0 +1,81 @@
+# Copyright 2021 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import functools
+import inspect
+import logging
+import pickle
+from asyncio import ensure_future
+
+from earlgrey import MessageQueueException, MessageQueueType, MESSAGE_QUEUE_TYPE_KEY, TASK_ATTR_DICT
+
+
+def _copy(value):
+    # values are copied like they are sent through the message queue
+    return pickle.loads(pickle.dumps(value))
+
+
+class LocalStub(object):
+    """
+    In-process replacement of earlgrey MessageQueueStub.
+    Tasks of the stub call message queue task handlers of the given object directly without message queue.
+    Parameters and results are copied, so the handlers and the callers don't share objects
+    """
+    def __init__(self, task: object):
+        """
+        :param task: object which has message queue task handlers. e.g. ChannelInnerTask
+        """
+        self._task = task
+        self._async_task = _LocalTask(task)
+
+    async def connect(self, *args, **kwargs):
+        pass
+
+    def async_task(self):
+        return self._async_task
+
+    @property
+    def task(self) -> object:
+        return self._task
+
+
+class _LocalTask(object):
+    def __init__(self, task: object):
+        for attribute_name in dir(task):
+            try:
+                attribute = getattr(task, attribute_name)
+                task_attr: dict = getattr(attribute, TASK_ATTR_DICT)
+            except AttributeError:
+                continue
+
+            if task_attr[MESSAGE_QUEUE_TYPE_KEY] == MessageQueueType.Worker:
+                call = functools.partial(self._call_worker, attribute)
+            else:
+                call = functools.partial(self._call_rpc, attribute)
+            setattr(self, attribute_name, call)
+
+    @staticmethod
+    def _bind(func, *args, **kwargs) -> dict:
+        params = inspect.signature(func).bind(*args, **kwargs)
+        params.apply_defaults()
+        return _copy(params.arguments)
+
+    async def _call_worker(self, func, *args, **kwargs):
+        ensure_future(func(**self._bind(func, *args, **kwargs)))
+
+    async def _call_rpc(self, func, *args, **kwargs):
+        result = await func(**self._bind(func, *args, **kwargs))
+        if isinstance(result, MessageQueueException):
+            logging.error(result)
+            raise result
+        return _copy(result)
@@ -0,0 +1,146 @@
+# Copyright 2021 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from typing import TYPE_CHECKING, Iterator, Optional
+
+from iconservice.base.address import Address
+from iconservice.iconscore.icon_score_event_log import EventLogEmitter
+from iconservice.utils.bloom import BloomFilter
+
+if TYPE_CHECKING:
+    from tbears.block_manager.block import Block
+
+# maximum number of event logs in a query result
+LOG_QUERY_LIMIT = 100
+LOG_QUERY_MAX_LIMIT = 1000
+
+
+class LogFilter(object):
+    """
+    Condition of event logs. None matches everything
+    """
+    def __init__(self, address: str = None, event: str = None):
+        """
+        :param address: SCORE address which emitted the event log
+        :param event: event signature. e.g. 'Transfer(Address,Address,int)'
+        """
+        self.address: Optional[str] = address
+        self.event: Optional[str] = event
+
+        # items added to logsBloom by iconservice
+        self._bloom_items = []
+        if address is not None:
+            self._bloom_items.append(EventLogEmitter.get_ordered_bytes(0xff, Address.from_string(address)))
+        if event is not None:
+            self._bloom_items.append(EventLogEmitter.get_ordered_bytes(0, event))
+
+    def may_contain(self, logs_bloom: str) -> bool:
+        """
+        Check logsBloom of block or transaction result. False positive is possible
+        :param logs_bloom: '0x' prefixed hex string of bloom
+        :return: False if no event log matches
+        """
+        bloom = BloomFilter(int(logs_bloom, 16)) if logs_bloom else BloomFilter()
+        if int(bloom) == 0:
+            return False
+        return all(item in bloom for item in self._bloom_items)
+
+    def matches(self, event_log: dict) -> bool:
+        if self.address is not None and event_log.get('scoreAddress') != self.address:
+            return False
+        if self.event is not None:
+            indexed = event_log.get('indexed')
+            if not indexed or indexed[0] != self.event:
+                return False
+        return True
+
+
+class LogQuery(object):
+    """
+    Query event logs in block DB.
+    Blocks are skipped with their logsBloom. If log index of block DB covers the range and both of address and
+    event are given, matched event logs are read from the index without scanning blocks
+    """
+    def __init__(self, block: 'Block'):
+        self._block = block
+
+    def query(self, start: int = 0, end: int = None, address: str = None, event: str = None,
+              limit: int = LOG_QUERY_LIMIT) -> list:
+        """
+        Query event logs
+        :param start: first block height
+        :param end: last block height. last block if None
+        :param address: SCORE address which emitted the event log
+        :param event: event signature
+        :param limit: maximum number of event logs
+        :return: event logs in block order
+        """
+        limit = min(limit, LOG_QUERY_MAX_LIMIT)
+        if end is None or end > self._block.block_height:
+            end = self._block.block_height
+        if limit <= 0 or end < start:
+            return []
+
+        log_filter = LogFilter(address=address, event=event)
+        use_index = address is not None and event is not None and self._block.is_log_indexed(start)
+        logs = self._query_index(log_filter, start, end) if use_index else self._scan(log_filter, start, end)
+
+        result = []
+        for log in logs:
+            result.append(log)
+            if len(result) >= limit:
+                break
+        return result
+
+    def _query_index(self, log_filter: 'LogFilter', start: int, end: int) -> Iterator[dict]:
+        for block_height, tx_index, log_index, tx_hash in self._block.iter_log_index(
+                log_filter.address, log_filter.event, start, end):
+            tx_result = self._block.get_txresult_data(tx_hash)
+            if tx_result is None:
+                continue
+
+            event_logs = tx_result.get('eventLogs', [])
+            # index entries are filtered again against the event log because the key has a digest of the event
+            if log_index < len(event_logs) and log_filter.matches(event_logs[log_index]):
+                yield self._make_log(block_height, tx_result, tx_index, log_index, event_logs[log_index])
+
+    def _scan(self, log_filter: 'LogFilter', start: int, end: int) -> Iterator[dict]:
+        for block in self._block.iter_blocks(start=start, end=end):
+            if not log_filter.may_contain(block.get('logsBloom')):
+                continue
+
+            for tx_index, tx in enumerate(block.get('transactions', [])):
+                tx_hash = tx.get('txHash')
+                if not isinstance(tx_hash, str):
+                    continue
+
+                tx_result = self._block.get_txresult_data(tx_hash[2:] if tx_hash[:2] == '0x' else tx_hash)
+                if tx_result is None or not log_filter.may_contain(tx_result.get('logsBloom')):
+                    continue
+
+                for log_index, event_log in enumerate(tx_result.get('eventLogs', [])):
+                    if log_filter.matches(event_log):
+                        yield self._make_log(block['height'], tx_result, tx_index, log_index, event_log)
+
+    @staticmethod
+    def _make_log(block_height: int, tx_result: dict, tx_index: int, log_index: int, event_log: dict) -> dict:
+        tx_hash = tx_result.get('txHash', '')
+        return {
+            'blockHeight': hex(block_height),
+            'txHash': tx_hash if tx_hash[:2] == '0x' else f'0x{tx_hash}',
+            'txIndex': hex(tx_index),
+            'logIndex': hex(log_index),
+            'scoreAddress': event_log.get('scoreAddress'),
+            'indexed': event_log.get('indexed', []),
+            'data': event_log.get('data', [])
+        }
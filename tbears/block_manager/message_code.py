@@ -72,6 +72,7 @@ class Response:
     fail_subscribe_limit = -15
     fail_invalid_key_error = -16
     fail_wrong_block_height = -17
+    fail_out_of_tps_limit = -19
     fail_tx_invalid_unknown = -100
     fail_tx_invalid_hash_format = -101
     fail_tx_invalid_hash_generation = -102
@@ -149,6 +150,9 @@ responseCodeMap = {
     Response.fail_wrong_block_height:
         (Response.fail_wrong_block_height, "fail wrong block height"),
 
+    Response.fail_out_of_tps_limit:
+        (Response.fail_out_of_tps_limit, "Server is processing too many requests"),
+
     Response.fail_tx_invalid_unknown:
         (Response.fail_tx_invalid_unknown, "fail tx invalid unknown"),
 
@@ -0,0 +1,160 @@
+# Copyright 2021 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import os
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Tuple
+
+METRIC_PREFIX = 'tbears_'
+
+# buckets in second
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COUNT_BUCKETS = (0, 1, 10, 50, 100, 500, 1000, 5000, 10000, 50000)
+
+
+class Counter(object):
+    type_name = 'counter'
+
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        self.value = 0
+
+    def inc(self, amount: int = 1):
+        self.value += amount
+
+    def to_dict(self):
+        return self.value
+
+    def to_prometheus(self) -> list:
+        return [f'{self.name} {self.value}']
+
+
+class Gauge(Counter):
+    type_name = 'gauge'
+
+    def set(self, value):
+        self.value = value
+
+
+class Histogram(object):
+    type_name = 'histogram'
+
+    def __init__(self, name: str, description: str, buckets: Tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(buckets)
+        # last one is for +Inf
+        self.bucket_counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0
+
+    def observe(self, value):
+        self.bucket_counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    @contextmanager
+    def time(self):
+        """
+        Observe elapsed time of the block in second
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def to_dict(self) -> dict:
+        return {
+            'buckets': dict(zip([str(bucket) for bucket in self.buckets] + ['+Inf'], self._cumulative_counts())),
+            'count': self.count,
+            'sum': self.sum
+        }
+
+    def to_prometheus(self) -> list:
+        lines = []
+        for bucket, count in zip([str(bucket) for bucket in self.buckets] + ['+Inf'], self._cumulative_counts()):
+            lines.append(f'{self.name}_bucket{{le="{bucket}"}} {count}')
+        lines.append(f'{self.name}_sum {self.sum}')
+        lines.append(f'{self.name}_count {self.count}')
+        return lines
+
+    def _cumulative_counts(self) -> list:
+        counts = []
+        total = 0
+        for count in self.bucket_counts:
+            total += count
+            counts.append(total)
+        return counts
+
+
+class Metrics(object):
+    """
+    Latency and throughput metrics of tbears block_manager
+    """
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+
+        self.tx_queue_wait = self._add(Histogram('tx_queue_wait_seconds', 'Waiting time of transaction in pool'))
+        self.signature_verify = self._add(Histogram('signature_verify_seconds',
+                                                    'Transaction signature verification time'))
+        self.invoke = self._add(Histogram('invoke_seconds', 'Round-trip time of invoke request to iconservice'))
+        self.confirm_db_write = self._add(Histogram('confirm_db_write_seconds', 'DB writing time of block'))
+        self.precommit = self._add(Histogram('precommit_seconds',
+                                             'Round-trip time of write_precommit_state request to iconservice'))
+        self.block_tx_count = self._add(Histogram('block_tx_count', 'Number of transactions in block',
+                                                  buckets=COUNT_BUCKETS))
+        self.tx_pool_depth = self._add(Gauge('tx_pool_depth', 'Number of transactions in pool'))
+        self.txs_received = self._add(Counter('transactions_received_total', 'Transactions added to pool'))
+        self.txs_rejected = self._add(Counter('transactions_rejected_total',
+                                              'Transactions rejected by full pool'))
+        self.txs_confirmed = self._add(Counter('transactions_confirmed_total', 'Transactions in confirmed block'))
+        self.blocks_confirmed = self._add(Counter('blocks_confirmed_total', 'Confirmed blocks'))
+        self.block_cache_hits = self._add(Counter('block_cache_hits_total', 'Block cache hits'))
+        self.block_cache_misses = self._add(Counter('block_cache_misses_total', 'Block cache misses'))
+        self.block_cache_bytes = self._add(Gauge('block_cache_bytes', 'Size of block cache'))
+
+    def _add(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def to_dict(self) -> dict:
+        return {name: metric.to_dict() for name, metric in self._metrics.items()}
+
+    def to_prometheus(self) -> str:
+        """
+        Get metrics in Prometheus text exposition format
+        :return:
+        """
+        lines = []
+        for metric in self._metrics.values():
+            name = f'{METRIC_PREFIX}{metric.name}'
+            lines.append(f'# HELP {name} {metric.description}')
+            lines.append(f'# TYPE {name} {metric.type_name}')
+            lines.extend(f'{METRIC_PREFIX}{line}' for line in metric.to_prometheus())
+
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path: str):
+        """
+        Write metrics to file in Prometheus text exposition format. The file is replaced atomically
+        :param path: file path
+        :return:
+        """
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
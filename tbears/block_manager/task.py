@@ -75,6 +75,7 @@ class Immediate:
         self.funcs: list = []
         self.is_started = False
         self._task = None
+        self._event: asyncio.Event = None
 
     async def start(self):
         """
@@ -83,7 +84,10 @@ class Immediate:
         """
         if not self.is_started:
             self.is_started = True
-            # Start task to call func periodically:
+            self._event = asyncio.Event()
+            if self.funcs:
+                self._event.set()
+            # Start task to call func when it is added:
             self._task = asyncio.ensure_future(self._run())
 
     async def stop(self):
@@ -99,7 +103,17 @@ class Immediate:
                 await self._task
 
     def add_func(self, func: callable):
-        self.funcs.append(func)
+        """
+        Add work and wake up the task.
+        Work which is already waiting is not added again, so multiple requests are coalesced into one call
+        :param func: work
+        :return:
+        """
+        if func not in self.funcs:
+            self.funcs.append(func)
+
+        if self._event is not None:
+            self._event.set()
 
     async def _run(self):
         """
@@ -107,8 +121,102 @@ class Immediate:
         :return:
         """
         while True:
-            if self.funcs:
-                func: callable = self.funcs.pop()
+            await self._event.wait()
+            self._event.clear()
+
+            while self.funcs:
+                func: callable = self.funcs.pop(0)
                 await func()
-            else:
-                await asyncio.sleep(0)
+
+
+class Hybrid:
+    """
+    Class for work triggered by time and amount in asyncio.
+    The work is done when pending amount reaches the limit, when linger time has passed since something became
+    pending or when the interval has passed since the last work
+    """
+    def __init__(self, func: callable, interval: float, linger: float, get_pending: callable,
+                 max_count: int = 0, max_bytes: int = 0):
+        """
+        :param func: work
+        :param interval: maximum interval between works in second
+        :param linger: maximum waiting time of pending items in second
+        :param get_pending: function returning count and bytes of pending items
+        :param max_count: do work immediately when pending count reaches it. 0 means unlimited
+        :param max_bytes: do work immediately when pending bytes reaches it. 0 means unlimited
+        """
+        self.func = func
+        self.interval = interval
+        self.linger = linger
+        self.get_pending = get_pending
+        self.max_count = max_count
+        self.max_bytes = max_bytes
+        self.is_started = False
+        self._task = None
+        self._event: asyncio.Event = None
+        self._pending_since: float = None
+
+    async def start(self):
+        """
+        Start the hybrid work
+        :return:
+        """
+        if not self.is_started:
+            self.is_started = True
+            self._event = asyncio.Event()
+            # Start task to call func when triggered:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        """
+        Stop the hybrid work
+        :return:
+        """
+        if self.is_started:
+            self.is_started = False
+            # Stop task and await it stopped:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+
+    def notify(self):
+        """
+        Notify that pending items are changed
+        :return:
+        """
+        if self._event is not None:
+            self._event.set()
+
+    def _is_full(self, count: int, size: int) -> bool:
+        return 0 < self.max_count <= count or 0 < self.max_bytes <= size
+
+    async def _run(self):
+        """
+        Do the work
+        :return:
+        """
+        next_time = time.time() + self.interval
+        while True:
+            now = time.time()
+            count, size = self.get_pending()
+            if not self._is_full(count, size):
+                # get time to sleep
+                wake_time = next_time
+                if count > 0:
+                    if self._pending_since is None:
+                        self._pending_since = now
+                    wake_time = min(wake_time, self._pending_since + self.linger)
+
+                remain_time = wake_time - now
+                if remain_time > 0:
+                    self._event.clear()
+                    with suppress(asyncio.TimeoutError):
+                        await asyncio.wait_for(self._event.wait(), remain_time)
+                    continue
+
+            # set next working time
+            next_time = time.time() + self.interval
+            self._pending_since = None
+
+            # do work
+            await self.func()
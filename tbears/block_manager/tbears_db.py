@@ -15,13 +15,49 @@ import os
 
 import plyvel
 
+# 'blockDb' configuration key -> plyvel.DB option
+DB_OPTIONS = {
+    'lruCacheSize': 'lru_cache_size',
+    'bloomFilterBits': 'bloom_filter_bits',
+    'writeBufferSize': 'write_buffer_size',
+    'maxOpenFiles': 'max_open_files',
+    'blockSize': 'block_size',
+    'compression': 'compression'
+}
+
 
 class TbearsDB:
     @staticmethod
-    def make_db(path: str, create_if_missing: bool = True) -> plyvel.DB:
+    def make_db(path: str, create_if_missing: bool = True, options: dict = None) -> plyvel.DB:
+        """Open LevelDB
+
+        :param path: db path
+        :param create_if_missing: create db if it does not exist
+        :param options: LevelDB options. keys of DB_OPTIONS. plyvel defaults are used for missing options
+        :return: plyvel DB instance
+        """
         if not os.path.exists(path):
             os.makedirs(path)
-        return plyvel.DB(path, create_if_missing=create_if_missing)
+        return plyvel.DB(path, create_if_missing=create_if_missing, **TbearsDB.get_db_options(options))
+
+    @staticmethod
+    def get_db_options(options: dict = None) -> dict:
+        """Convert LevelDB options in configuration to plyvel.DB keyword arguments
+
+        :param options: LevelDB options in configuration
+        :return: plyvel.DB keyword arguments
+        """
+        kwargs = {}
+        for key, value in (options or {}).items():
+            if key not in DB_OPTIONS:
+                raise ValueError(f'Invalid block DB option: {key}')
+            if key == 'compression':
+                # null or "none" disables compression
+                value = None if value in (None, '', 'none') else value
+            elif value is None:
+                continue
+            kwargs[DB_OPTIONS[key]] = value
+        return kwargs
 
     def __init__(self, db: plyvel.DB) -> None:
         """Constructor
@@ -71,5 +107,38 @@ class TbearsDB:
     def commit_write_batch(write_batch):
         write_batch.write()
 
-    def iterator(self) -> iter:
-        return self._db.iterator()
+    def write_rows(self, rows: list) -> None:
+        """Put rows into db atomically with a write batch
+
+        :param rows: list of (key, value). row is deleted if value is None
+        """
+        with self.create_write_batch() as wb:
+            for key, value in rows:
+                if value is None:
+                    wb.delete(key)
+                else:
+                    wb.put(key, value)
+
+    def compact_range(self, start: bytes = None, stop: bytes = None) -> None:
+        """Compact underlying storage for the key range
+
+        :param start: first key. None for the beginning of db
+        :param stop: last key. None for the end of db
+        """
+        self._db.compact_range(start=start, stop=stop)
+
+    def iterator(self, prefix: bytes = None, start: bytes = None, stop: bytes = None) -> iter:
+        return self._db.iterator(prefix=prefix, start=start, stop=stop)
+
+    def get_many(self, keys: list) -> list:
+        """Get values of keys from a snapshot of db. plyvel does not support MultiGet,
+        so values are read from the same snapshot to be consistent
+
+        :param keys: db keys
+        :return: values indicated by keys. None for missing keys
+        """
+        snapshot = self._db.snapshot()
+        try:
+            return [snapshot.get(key) for key in keys]
+        finally:
+            snapshot.close()
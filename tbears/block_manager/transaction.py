@@ -0,0 +1,102 @@
+# Copyright 2021 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import json
+import time
+from typing import Union
+
+from tbears.block_manager.hash_utils import get_leaf_hash
+
+
+class Transaction(object):
+    """
+    Immutable transaction record of tbears block_manager.
+    Encodes the transaction to JSON and hashes its merkle leaf once when received.
+    The bytes are reused when the transaction is saved and the leaf is reused for transactionsHash
+    """
+    __slots__ = ('_tx_hash', '_data', '_raw', '_size', '_received', '_leaf_hash')
+
+    def __init__(self, tx_hash: str, tx: dict, size: int = 0):
+        """
+        :param tx_hash: transaction hash
+        :param tx: transaction data. Shallow copied with txHash
+        :param size: serialized size of transaction in bytes
+        """
+        data = dict(tx)
+        data['txHash'] = tx_hash
+
+        self._tx_hash: str = tx_hash
+        self._data: dict = data
+        self._raw: bytes = json.dumps(data).encode()
+        self._size: int = size
+        self._received: float = time.monotonic()
+        self._leaf_hash: bytes = get_leaf_hash(data)
+
+    @property
+    def tx_hash(self) -> str:
+        return self._tx_hash
+
+    @property
+    def data(self) -> dict:
+        """
+        Transaction data with txHash. Must not be modified
+        :return:
+        """
+        return self._data
+
+    @property
+    def raw(self) -> bytes:
+        """
+        JSON encoded transaction data
+        :return:
+        """
+        return self._raw
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @property
+    def received(self) -> float:
+        """
+        time.monotonic() when the transaction is received
+        :return:
+        """
+        return self._received
+
+    @property
+    def leaf_hash(self) -> bytes:
+        """
+        Merkle tree leaf of transactionsHash
+        :return:
+        """
+        return self._leaf_hash
+
+    def __repr__(self) -> str:
+        return f'Transaction({self._raw.decode()})'
+
+
+def get_tx_hash(tx: Union['Transaction', dict]) -> str:
+    return tx.tx_hash if isinstance(tx, Transaction) else tx['txHash']
+
+
+def get_tx_data(tx: Union['Transaction', dict]) -> dict:
+    return tx.data if isinstance(tx, Transaction) else tx
+
+
+def get_tx_bytes(tx: Union['Transaction', dict]) -> bytes:
+    return tx.raw if isinstance(tx, Transaction) else json.dumps(tx).encode()
+
+
+def get_tx_leaf_hash(tx: Union['Transaction', dict]) -> bytes:
+    return tx.leaf_hash if isinstance(tx, Transaction) else get_leaf_hash(tx)
@@ -0,0 +1,127 @@
+# Copyright 2021 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from collections import OrderedDict
+from typing import Optional
+
+
+class TxPool(object):
+    """
+    Transaction pool of tbears block_manager.
+    Keeps pending transactions in arrival order and indexes them with transaction hash
+    """
+    def __init__(self, max_size: int = 0):
+        """
+        :param max_size: maximum number of pending transactions. 0 means unlimited
+        """
+        # tx_hash -> (transaction, size)
+        self._txs: OrderedDict = OrderedDict()
+        self._max_size: int = max_size
+        self._size_in_bytes: int = 0
+
+    def __len__(self) -> int:
+        return len(self._txs)
+
+    def __contains__(self, tx_hash: str) -> bool:
+        return tx_hash in self._txs
+
+    def __iter__(self):
+        return (tx for tx, _ in self._txs.values())
+
+    @property
+    def max_size(self) -> int:
+        return self._max_size
+
+    @property
+    def size_in_bytes(self) -> int:
+        """
+        Sum of sizes of pending transactions
+        :return:
+        """
+        return self._size_in_bytes
+
+    def is_full(self) -> bool:
+        return 0 < self._max_size <= len(self._txs)
+
+    def get(self, tx_hash: str) -> Optional[dict]:
+        item = self._txs.get(tx_hash)
+        return None if item is None else item[0]
+
+    def add(self, tx_hash: str, tx: dict, size: int = 0) -> bool:
+        """
+        Add transaction to pool
+        :param tx_hash: transaction hash
+        :param tx: transaction
+        :param size: serialized size of transaction in bytes
+        :return: False if the transaction is duplicated or the pool is full
+        """
+        if tx_hash in self._txs or self.is_full():
+            return False
+
+        self._txs[tx_hash] = (tx, size)
+        self._size_in_bytes += size
+        return True
+
+    def pop(self, max_count: int = 0, max_bytes: int = 0) -> list:
+        """
+        Remove transactions from the head of pool within the given limits.
+        The first transaction is always removed even if it exceeds max_bytes by itself
+        :param max_count: maximum number of transactions. 0 means unlimited
+        :param max_bytes: maximum sum of transaction sizes. 0 means unlimited
+        :return: removed transactions in arrival order
+        """
+        if max_count <= 0 and max_bytes <= 0:
+            return self.clear()
+
+        tx_list = []
+        size_in_bytes = 0
+        while self._txs:
+            if 0 < max_count <= len(tx_list):
+                break
+
+            tx_hash, (tx, size) = next(iter(self._txs.items()))
+            if tx_list and 0 < max_bytes < size_in_bytes + size:
+                break
+
+            del self._txs[tx_hash]
+            tx_list.append(tx)
+            size_in_bytes += size
+
+        self._size_in_bytes -= size_in_bytes
+        return tx_list
+
+    def restore(self, txs: list):
+        """
+        Put transactions removed by pop() back at the head of pool in the given order.
+        The pool size limit is not applied and transactions already in pool are skipped
+        :param txs: list of (tx_hash, tx, size)
+        :return:
+        """
+        for tx_hash, tx, size in reversed(txs):
+            if tx_hash in self._txs:
+                continue
+
+            self._txs[tx_hash] = (tx, size)
+            self._txs.move_to_end(tx_hash, last=False)
+            self._size_in_bytes += size
+
+    def clear(self) -> list:
+        """
+        Remove all transactions from pool
+        :return: removed transactions in arrival order
+        """
+        tx_list = [tx for tx, _ in self._txs.values()]
+        self._txs = OrderedDict()
+        self._size_in_bytes = 0
+
+        return tx_list
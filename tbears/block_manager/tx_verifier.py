@@ -12,7 +12,11 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
+import base64
 import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 
 from iconcommons import Logger
 from coincurve import PublicKey
@@ -43,3 +47,123 @@ def verify_signature(msg_hash: bytes, signature: bytes, sender: str) -> bool:
         Logger.info(f'Signed address={address}', "verify_signature")
 
     return False
+
+
+def verify_tx_signature(serialized_data: bytes, signature: str, sender: str) -> bool:
+    """
+    Verify transaction signature
+    :param serialized_data: serialized transaction data
+    :param signature: base64 encoded signature
+    :param sender: 'from' address of transaction
+    :return: True if the transaction is signed by sender
+    """
+    try:
+        msg_hash = hashlib.sha3_256(serialized_data).digest()
+        sig_byte = base64.b64decode(signature)
+        return verify_signature(msg_hash, sig_byte, sender)
+    except Exception as e:
+        Logger.info(f'Invalid signature: {e}', "verify_signature")
+        return False
+
+
+def verify_tx_signatures(requests: list) -> list:
+    """
+    Verify signatures of transactions in batch
+    :param requests: list of (serialized_data, signature, sender)
+    :return: list of verification results
+    """
+    return [verify_tx_signature(*request) for request in requests]
+
+
+class SignatureVerifier(object):
+    """
+    Verify transaction signatures with worker threads.
+    coincurve releases the GIL while recovering public key, so the verification runs off the event loop in parallel.
+    Requests arriving in the same loop iteration are verified together as a batch
+    """
+    def __init__(self, workers: int = 0, batch_size: int = 1):
+        """
+        :param workers: number of worker threads. 0 means verifying in the event loop
+        :param batch_size: maximum number of signatures in a batch
+        """
+        self._batch_size: int = max(batch_size, 1)
+        self._executor = None
+        if workers > 0:
+            self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='verify_signature')
+        self._pending: list = []
+        self._flush_handle = None
+
+    async def verify(self, serialized_data: bytes, signature: str, sender: str) -> bool:
+        """
+        Verify transaction signature
+        :param serialized_data: serialized transaction data
+        :param signature: base64 encoded signature
+        :param sender: 'from' address of transaction
+        :return: True if the transaction is signed by sender
+        """
+        if self._executor is None:
+            return verify_tx_signature(serialized_data, signature, sender)
+
+        loop = asyncio.get_event_loop()
+        future = loop.create_future()
+        self._pending.append((serialized_data, signature, sender, future))
+
+        if len(self._pending) >= self._batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_soon(self._flush)
+
+        return await future
+
+    async def verify_many(self, requests: list) -> list:
+        """
+        Verify transaction signatures as a group. Requests are split into batches and verified by worker threads
+        :param requests: list of (serialized_data, signature, sender)
+        :return: list of verification results
+        """
+        if self._executor is None:
+            return verify_tx_signatures(requests)
+
+        loop = asyncio.get_event_loop()
+        batches = [requests[i:i + self._batch_size] for i in range(0, len(requests), self._batch_size)]
+        results = await asyncio.gather(*[loop.run_in_executor(self._executor, verify_tx_signatures, batch)
+                                         for batch in batches])
+        return [result for batch_results in results for result in batch_results]
+
+    def _flush(self):
+        """
+        Send pending requests to worker threads
+        :return:
+        """
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        requests = [request[:3] for request in batch]
+        futures = [request[3] for request in batch]
+
+        loop = asyncio.get_event_loop()
+        task = loop.run_in_executor(self._executor, verify_tx_signatures, requests)
+        task.add_done_callback(partial(self._set_results, futures))
+
+    @staticmethod
+    def _set_results(futures: list, task: asyncio.Future):
+        if task.cancelled() or task.exception() is not None:
+            exc = task.exception() if not task.cancelled() else asyncio.CancelledError()
+            for future in futures:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        for future, result in zip(futures, task.result()):
+            if not future.done():
+                future.set_result(result)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
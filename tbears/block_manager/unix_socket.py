@@ -0,0 +1,326 @@
+# Copyright 2021 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Unix domain socket transport of message queue tasks.
+
+UnixSocketService and UnixSocketStub have the same task interfaces as earlgrey MessageQueueService and
+MessageQueueStub, but the tasks are sent in length-prefixed frames over a Unix domain socket without AMQP broker.
+Frame is 4 bytes big-endian length followed by pickled payload like earlgrey message body.
+Socket file is only accessible by the owner because pickled payload is trusted.
+"""
+import asyncio
+import functools
+import inspect
+import itertools
+import logging
+import os
+import pickle
+import socket
+import struct
+import threading
+from asyncio import ensure_future
+from typing import Generic, TypeVar, Dict, Optional, Set
+
+from earlgrey import MessageQueueException, MessageQueueType, MESSAGE_QUEUE_TYPE_KEY, TASK_ATTR_DICT
+
+T = TypeVar('T')
+
+UNIX_SOCKET_PATH_FORMAT = "{uds_target}/{queue_name}.sock"
+# process name of iconservice and iconrpcserver hosts. See unix_socket_host
+TBEARS_UDS_HOST = 'tbears_uds_host'
+CONNECTION_ATTEMPTS = 100
+RETRY_DELAY = 0.1
+
+_HEADER = struct.Struct('>I')
+# message id of worker task. worker task has no response
+_WORKER_MSG_ID = 0
+
+
+def get_unix_socket_path(uds_target: str, queue_name: str) -> str:
+    """
+    Get Unix domain socket path of the queue
+    :param uds_target: directory of Unix domain sockets
+    :param queue_name: message queue name. e.g. CHANNEL_QUEUE_NAME_FORMAT
+    :return: socket file path
+    """
+    return UNIX_SOCKET_PATH_FORMAT.format(uds_target=uds_target.rstrip('/'), queue_name=queue_name)
+
+
+def _pack(payload) -> bytes:
+    body = pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL)
+    return _HEADER.pack(len(body)) + body
+
+
+async def _read_frame(reader: 'asyncio.StreamReader'):
+    header = await reader.readexactly(_HEADER.size)
+    body = await reader.readexactly(_HEADER.unpack(header)[0])
+    return pickle.loads(body)
+
+
+def _recv_exactly(sock: 'socket.socket', size: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < size:
+        chunk = sock.recv(size - len(buf))
+        if not chunk:
+            raise ConnectionError('Unix domain socket is closed')
+        buf += chunk
+    return bytes(buf)
+
+
+def _iter_tasks(task: object):
+    for attribute_name in dir(task):
+        try:
+            attribute = getattr(task, attribute_name)
+            task_attr: dict = getattr(attribute, TASK_ATTR_DICT)
+        except AttributeError:
+            continue
+        yield attribute_name, attribute, task_attr[MESSAGE_QUEUE_TYPE_KEY]
+
+
+class UnixSocketService(Generic[T]):
+    """
+    Serve message queue tasks of TaskType on a Unix domain socket
+    """
+    TaskType: type = object
+
+    def __init__(self, path: str, **task_kwargs):
+        """
+        :param path: socket file path. See get_unix_socket_path()
+        :param task_kwargs: arguments of TaskType
+        """
+        if self.TaskType is object and type(self) is not UnixSocketService:
+            raise RuntimeError("MessageQueueTasks is not specified.")
+
+        self._path = path
+        self._task = self.__class__.TaskType(**task_kwargs)
+        self._handlers: Dict[str, callable] = {}
+        self._server: Optional['asyncio.AbstractServer'] = None
+        self._writers: Set['asyncio.StreamWriter'] = set()
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def task(self) -> T:
+        return self._task
+
+    async def connect(self, **kwargs):
+        """
+        Listen on the socket. Stale socket file of the previous process is removed
+        """
+        self._handlers = {name: attribute for name, attribute, _ in _iter_tasks(self._task)}
+
+        if os.path.exists(self._path):
+            os.remove(self._path)
+        os.makedirs(os.path.dirname(self._path) or '.', exist_ok=True)
+
+        self._server = await asyncio.start_unix_server(self._on_connected, path=self._path)
+        os.chmod(self._path, 0o600)
+
+    def serve(self, **kwargs):
+        asyncio.get_event_loop().create_task(self.connect(**kwargs))
+
+    def close(self):
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+        # stubs are notified that the connections are closed
+        for writer in self._writers:
+            writer.close()
+        self._writers.clear()
+        if os.path.exists(self._path):
+            os.remove(self._path)
+
+    async def _on_connected(self, reader: 'asyncio.StreamReader', writer: 'asyncio.StreamWriter'):
+        self._writers.add(writer)
+        try:
+            while True:
+                msg_id, func_name, kwargs = await _read_frame(reader)
+                # tasks are handled concurrently like message queue consumer
+                ensure_future(self._execute(writer, msg_id, func_name, kwargs))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    async def _execute(self, writer: 'asyncio.StreamWriter', msg_id: int, func_name: str, kwargs: dict):
+        handler = self._handlers.get(func_name)
+        if handler is None:
+            result = MessageQueueException(f"{type(self._task).__name__}.{func_name} is not found")
+        else:
+            result = await handler(**kwargs)
+
+        if msg_id == _WORKER_MSG_ID or writer.is_closing():
+            return
+        # a frame is written at once, so frames of concurrent tasks are not interleaved
+        writer.write(_pack((msg_id, result)))
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+
+class UnixSocketStub(Generic[T]):
+    """
+    Call message queue tasks of TaskType served by UnixSocketService
+    """
+    TaskType: type = object
+
+    def __init__(self, path: str):
+        """
+        :param path: socket file path. See get_unix_socket_path()
+        """
+        if self.TaskType is object and type(self) is not UnixSocketStub:
+            raise RuntimeError("MessageQueueTasks is not specified.")
+
+        self._path = path
+        self._writer: Optional['asyncio.StreamWriter'] = None
+        self._receiver: Optional['asyncio.Task'] = None
+        self._futures: Dict[int, 'asyncio.Future'] = {}
+        self._msg_ids = itertools.count(_WORKER_MSG_ID + 1)
+
+        self._async_task = object.__new__(self.__class__.TaskType)  # not calling __init__
+        self._thread_local = _Local()
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    async def connect(self, connection_attempts: int = None, retry_delay: float = None):
+        """
+        Connect to the socket. Retry until the service listens on the socket
+        :param connection_attempts: number of attempts
+        :param retry_delay: delay between attempts in second
+        """
+        attempts = connection_attempts or CONNECTION_ATTEMPTS
+        for attempt in range(attempts):
+            try:
+                reader, self._writer = await asyncio.open_unix_connection(self._path)
+                break
+            except (FileNotFoundError, ConnectionRefusedError) as e:
+                if attempt == attempts - 1:
+                    raise RuntimeError(f"Failed to connect to {self._path}. ({e})")
+                await asyncio.sleep(retry_delay or RETRY_DELAY)
+
+        self._receiver = ensure_future(self._receive(reader))
+        self._register_tasks(self._async_task, self._call_async_worker, self._call_async_rpc)
+
+    def close(self):
+        if self._receiver is not None:
+            self._receiver.cancel()
+            self._receiver = None
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def async_task(self) -> T:
+        return self._async_task
+
+    def sync_task(self) -> T:
+        if self._thread_local.sync_task is None:
+            self._thread_local.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._thread_local.sock.connect(self._path)
+            self._thread_local.sync_task = object.__new__(self.__class__.TaskType)  # not calling __init__
+            self._register_tasks(self._thread_local.sync_task, self._call_sync_worker, self._call_sync_rpc)
+
+        return self._thread_local.sync_task
+
+    def _callback_connection_close(self, exc: Exception):
+        pass
+
+    @staticmethod
+    def _register_tasks(task: object, worker_method, rpc_method):
+        for attribute_name, attribute, message_queue_type in _iter_tasks(task):
+            if message_queue_type == MessageQueueType.Worker:
+                binding_method = worker_method
+            elif message_queue_type == MessageQueueType.RPC:
+                binding_method = rpc_method
+            else:
+                raise RuntimeError(f"MessageQueueType invalid. {attribute_name}, {message_queue_type}")
+
+            setattr(task, attribute_name, functools.partial(binding_method, attribute_name, attribute))
+
+    async def _receive(self, reader: 'asyncio.StreamReader'):
+        exc = None
+        try:
+            while True:
+                msg_id, result = await _read_frame(reader)
+                future = self._futures.pop(msg_id, None)
+                if future is not None and not future.done():
+                    future.set_result(result)
+        except (asyncio.IncompleteReadError, ConnectionError) as e:
+            exc = e
+        except asyncio.CancelledError:
+            return
+
+        for future in self._futures.values():
+            if not future.done():
+                future.set_exception(ConnectionError(f'Unix domain socket is closed. {self._path}'))
+        self._futures.clear()
+        self._callback_connection_close(exc)
+
+    async def _call_async_worker(self, func_name, func, *args, **kwargs):
+        params = inspect.signature(func).bind(*args, **kwargs)
+        params.apply_defaults()
+        self._writer.write(_pack((_WORKER_MSG_ID, func_name, params.arguments)))
+        await self._writer.drain()
+
+    async def _call_async_rpc(self, func_name, func, *args, **kwargs):
+        params = inspect.signature(func).bind(*args, **kwargs)
+        params.apply_defaults()
+
+        msg_id = next(self._msg_ids)
+        future = asyncio.get_event_loop().create_future()
+        self._futures[msg_id] = future
+        try:
+            self._writer.write(_pack((msg_id, func_name, params.arguments)))
+            await self._writer.drain()
+            result = await future
+        finally:
+            self._futures.pop(msg_id, None)
+
+        if isinstance(result, MessageQueueException):
+            logging.error(result)
+            raise result
+        return result
+
+    def _call_sync_worker(self, func_name, func, *args, **kwargs):
+        params = inspect.signature(func).bind(*args, **kwargs)
+        params.apply_defaults()
+        self._thread_local.sock.sendall(_pack((_WORKER_MSG_ID, func_name, params.arguments)))
+
+    def _call_sync_rpc(self, func_name, func, *args, **kwargs):
+        params = inspect.signature(func).bind(*args, **kwargs)
+        params.apply_defaults()
+
+        sock = self._thread_local.sock
+        msg_id = next(self._msg_ids)
+        sock.sendall(_pack((msg_id, func_name, params.arguments)))
+        # a thread waits for a response at a time, so the next frame is the response
+        header = _recv_exactly(sock, _HEADER.size)
+        response_id, result = pickle.loads(_recv_exactly(sock, _HEADER.unpack(header)[0]))
+        if response_id != msg_id:
+            raise ConnectionError(f'Unexpected response. msg_id: {msg_id}, response: {response_id}')
+
+        if isinstance(result, MessageQueueException):
+            logging.error(result)
+            raise result
+        return result
+
+
+class _Local(threading.local):
+    sock: 'socket.socket' = None
+    sync_task = None
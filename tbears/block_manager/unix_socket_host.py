@@ -0,0 +1,178 @@
+# Copyright 2021 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Hosts of iconservice and iconrpcserver linked with tbears block_manager over Unix domain sockets.
+
+iconservice and iconrpcserver commands only support message queue, so tbears runs them in these processes when
+'udsTarget' is configured.
+    python -m tbears.block_manager.unix_socket_host icon -c <config>
+    python -m tbears.block_manager.unix_socket_host rpc -c <config>
+"""
+import argparse
+import asyncio
+import signal
+import sys
+
+import setproctitle
+from earlgrey import MessageQueueService
+from iconcommons.icon_config import IconConfig
+from iconcommons.logger import Logger
+from iconrpcserver.utils.message_queue.channel_inner_stub import (
+    ChannelInnerTask as RpcChannelInnerTask, ChannelTxCreatorInnerTask as RpcChannelTxCreatorInnerTask
+)
+from iconrpcserver.utils.message_queue.icon_score_inner_stub import IconScoreInnerTask as RpcIconScoreInnerTask
+
+from tbears.block_manager.block_manager import (
+    CHANNEL_QUEUE_NAME_FORMAT, CHANNEL_TX_CREATOR_QUEUE_NAME_FORMAT, ICON_SCORE_QUEUE_NAME_FORMAT
+)
+from tbears.block_manager.embedded import make_icon_conf, start_rpc_server
+from tbears.block_manager.unix_socket import (
+    TBEARS_UDS_HOST, UnixSocketService, UnixSocketStub, get_unix_socket_path
+)
+from tbears.config.tbears_config import TConfigKey, tbears_server_config
+
+HOST_ICON = 'icon'
+HOST_RPC = 'rpc'
+
+
+class RpcChannelSocketStub(UnixSocketStub[RpcChannelInnerTask]):
+    TaskType = RpcChannelInnerTask
+
+
+class RpcChannelTxCreatorSocketStub(UnixSocketStub[RpcChannelTxCreatorInnerTask]):
+    TaskType = RpcChannelTxCreatorInnerTask
+
+
+class RpcIconSocketStub(UnixSocketStub[RpcIconScoreInnerTask]):
+    TaskType = RpcIconScoreInnerTask
+
+
+def _get_socket_path(conf: 'IconConfig', queue_name_format: str) -> str:
+    queue_name = queue_name_format.format(channel_name=conf[TConfigKey.CHANNEL], amqp_key=conf[TConfigKey.AMQP_KEY])
+    return get_unix_socket_path(conf[TConfigKey.UDS_TARGET], queue_name)
+
+
+def _run_forever(serve, cleanup):
+    """
+    Run the coroutine function and the event loop until SIGINT or SIGTERM
+    :param serve: coroutine function starting service
+    :param cleanup: function called after the event loop stops
+    """
+    loop = MessageQueueService.loop
+    asyncio.set_event_loop(loop)
+
+    async def _serve():
+        try:
+            await serve()
+        except Exception as e:
+            msg = f'Failed to start {TBEARS_UDS_HOST}. ({e})'
+            Logger.error(msg, TBEARS_UDS_HOST)
+            print(msg)
+            loop.stop()
+            return
+
+        Logger.info(f'{TBEARS_UDS_HOST} service started!', TBEARS_UDS_HOST)
+
+    loop.create_task(_serve())
+    loop.add_signal_handler(signal.SIGINT, loop.stop)
+    loop.add_signal_handler(signal.SIGTERM, loop.stop)
+
+    try:
+        loop.run_forever()
+    finally:
+        cleanup()
+
+
+def serve_icon(conf: 'IconConfig'):
+    """
+    Serve iconservice tasks on the Unix domain socket of 'IconScore' queue
+    :param conf: tbears configuration
+    """
+    # imports iconservice only in the iconservice host
+    from iconservice.icon_inner_service import IconScoreInnerTask
+
+    class IconScoreSocketService(UnixSocketService[IconScoreInnerTask]):
+        TaskType = IconScoreInnerTask
+
+    asyncio.set_event_loop(MessageQueueService.loop)
+    service = IconScoreSocketService(_get_socket_path(conf, ICON_SCORE_QUEUE_NAME_FORMAT), conf=make_icon_conf(conf))
+
+    def _cleanup():
+        service.close()
+        service.task.cleanup()
+
+    _run_forever(service.connect, _cleanup)
+
+
+def serve_rpc(conf: 'IconConfig'):
+    """
+    Serve JSON-RPC with the stubs connected to the Unix domain sockets of block_manager and iconservice
+    :param conf: tbears configuration
+    """
+    stubs = [RpcChannelSocketStub(_get_socket_path(conf, CHANNEL_QUEUE_NAME_FORMAT)),
+             RpcChannelTxCreatorSocketStub(_get_socket_path(conf, CHANNEL_TX_CREATOR_QUEUE_NAME_FORMAT)),
+             RpcIconSocketStub(_get_socket_path(conf, ICON_SCORE_QUEUE_NAME_FORMAT))]
+    rpc_server = None
+
+    async def _serve():
+        nonlocal rpc_server
+        for stub in stubs:
+            await stub.connect()
+        rpc_server = await start_rpc_server(conf, *stubs)
+
+    def _cleanup():
+        if rpc_server is not None:
+            MessageQueueService.loop.run_until_complete(rpc_server.close())
+        for stub in stubs:
+            stub.close()
+
+    _run_forever(_serve, _cleanup)
+
+
+def create_parser():
+    parser = argparse.ArgumentParser(prog=TBEARS_UDS_HOST,
+                                     description='Host iconservice or iconrpcserver over Unix domain sockets')
+    parser.add_argument('host', choices=(HOST_ICON, HOST_RPC), help='Service to host')
+    parser.add_argument('-c', '--config', help='Configuration file path')
+
+    return parser
+
+
+def main():
+    args = create_parser().parse_args(sys.argv[1:])
+
+    if args.config and not IconConfig.valid_conf_path(args.config):
+        print(f'Invalid configuration file : {args.config}')
+        sys.exit(1)
+
+    conf = IconConfig(args.config or str(), tbears_server_config)
+    conf.load()
+    Logger.load_config(conf)
+
+    if not conf.get(TConfigKey.UDS_TARGET):
+        print(f'{TConfigKey.UDS_TARGET} is not configured')
+        sys.exit(1)
+
+    setproctitle.setproctitle(f'{TBEARS_UDS_HOST}.{args.host}.{conf[TConfigKey.CHANNEL]}.{conf[TConfigKey.AMQP_KEY]}')
+
+    if args.host == HOST_ICON:
+        serve_icon(conf)
+    else:
+        serve_rpc(conf)
+
+    Logger.info(f'==============={TBEARS_UDS_HOST} {args.host} done================', TBEARS_UDS_HOST)
+
+
+if __name__ == '__main__':
+    main()
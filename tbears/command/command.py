@@ -19,6 +19,7 @@ from typing import Optional
 
 from iconcommons.logger import Logger
 
+from tbears.command.command_db import CommandDb
 from tbears.command.command_wallet import CommandWallet
 from tbears.command.command_server import CommandServer
 from tbears.command.command_score import CommandScore
@@ -43,6 +44,7 @@ class Command(object):
         self.cmdScore = CommandScore(self.subparsers)
         self.cmdUtil = CommandUtil(self.subparsers)
         self.cmdWallet = CommandWallet(self.subparsers)
+        self.cmdDb = CommandDb(self.subparsers)
 
     def _create_parser(self):
         parser = TbearsParser(prog='tbears', description=f'tbears v{self.version} arguments')
@@ -74,6 +76,8 @@ class Command(object):
                 result = self.cmdUtil.run(args)
             elif self.cmdWallet.check_command(args.command):
                 result = self.cmdWallet.run(args)
+            elif self.cmdDb.check_command(args.command):
+                result = self.cmdDb.run(args)
         except TBearsBaseException as e:
             print(f"{e}")
             return e.code.value
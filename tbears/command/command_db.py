@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+# Copyright 2021 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import os
+import sys
+
+from iconcommons.logger import Logger
+
+from tbears.block_manager.block import Block
+from tbears.block_manager.block_codec import Encoding
+from tbears.command.command_server import CommandServer
+from tbears.config.tbears_config import FN_SERVER_CONF, TConfigKey, TBEARS_CLI_TAG
+from tbears.tbears_exception import TBearsCommandException
+from tbears.util.argparse_type import IconPath, non_negative_num_type
+
+
+class CommandDb(object):
+    def __init__(self, subparsers):
+        parser = subparsers.add_parser('db', help='Manage block DB of tbears service',
+                                       description='Manage block DB of tbears service')
+        db_subparsers = parser.add_subparsers(title='Available db commands', metavar='db_command')
+        db_subparsers.required = True
+        db_subparsers.dest = 'db_command'
+
+        self._add_migrate_parser(db_subparsers)
+        self._add_export_parser(db_subparsers)
+
+    @staticmethod
+    def _add_migrate_parser(subparsers) -> None:
+        parser = subparsers.add_parser('migrate', help='Convert encoding of block DB',
+                                       description='Convert encoding of blocks, transactions and transaction results '
+                                                   'in block DB. tbears service must be stopped')
+        parser.add_argument('-e', '--encoding', choices=Encoding.ALL, default=Encoding.MSGPACK,
+                            help=f'Target encoding (default: {Encoding.MSGPACK})')
+        parser.add_argument('-c', '--config', type=IconPath(),
+                            help=f'tbears configuration file path (default: {FN_SERVER_CONF})')
+
+    @staticmethod
+    def _add_export_parser(subparsers) -> None:
+        parser = subparsers.add_parser('export', help='Export blocks to NDJSON',
+                                       description='Export blocks in the height range to NDJSON, one block per line. '
+                                                   'tbears service must be stopped')
+        parser.add_argument('-s', '--start', type=non_negative_num_type, default='0x0',
+                            help='First block height (default: 0)')
+        parser.add_argument('-e', '--end', type=non_negative_num_type,
+                            help='Last block height (default: last block)')
+        parser.add_argument('-o', '--output', help='Output file path (default: stdout)')
+        parser.add_argument('-c', '--config', type=IconPath(),
+                            help=f'tbears configuration file path (default: {FN_SERVER_CONF})')
+
+    def run(self, args):
+        if not hasattr(self, args.db_command):
+            raise TBearsCommandException(f"Invalid command {args.db_command}")
+
+        # load configurations
+        conf = CommandServer.get_icon_conf(args.command, args=vars(args))
+
+        Logger.info(f"Run 'db {args.db_command}' command with config: {conf}", TBEARS_CLI_TAG)
+
+        # run command
+        return getattr(self, args.db_command)(conf)
+
+    def check_command(self, command):
+        return command == 'db'
+
+    def migrate(self, conf: dict):
+        """ Convert encoding of block DB
+
+        :param conf: migrate command configuration
+        """
+        block = self._open_block(conf)
+        try:
+            count = block.migrate(encoding=conf['encoding'])
+        finally:
+            block.db.close()
+
+        print(f"Migrated {count} values to {conf['encoding']} successfully")
+        if conf.get(TConfigKey.BLOCK_DB_ENCODING, Encoding.JSON) != conf['encoding']:
+            print(f"Set '{TConfigKey.BLOCK_DB_ENCODING}' to '{conf['encoding']}' in the configuration file "
+                  f"to write new blocks with the same encoding")
+
+    def export(self, conf: dict):
+        """ Export blocks to NDJSON
+
+        :param conf: export command configuration
+        """
+        start = int(conf['start'], 16)
+        end = None if conf.get('end') is None else int(conf['end'], 16)
+
+        block = self._open_block(conf)
+        try:
+            if conf.get('output'):
+                with open(conf['output'], 'wb') as f:
+                    count = self._write_blocks(block, f, start, end)
+                print(f"Exported {count} blocks to {conf['output']}")
+            else:
+                self._write_blocks(block, sys.stdout.buffer, start, end)
+                sys.stdout.buffer.flush()
+        finally:
+            block.db.close()
+
+    @staticmethod
+    def _write_blocks(block: 'Block', f, start: int, end: int = None) -> int:
+        count = 0
+        for block_bytes in block.iter_blocks(start=start, end=end, raw=True):
+            f.write(block_bytes + b'\n')
+            count += 1
+        return count
+
+    @staticmethod
+    def _open_block(conf: dict) -> 'Block':
+        if CommandServer.is_service_running():
+            raise TBearsCommandException(f'You must stop T-Bears service to run db command')
+
+        db_path = f'{conf["stateDbRootPath"]}/tbears'
+        if not os.path.exists(db_path):
+            raise TBearsCommandException(f'There is no block DB in {db_path}')
+
+        return Block(db_path, db_options=conf.get(TConfigKey.BLOCK_DB))
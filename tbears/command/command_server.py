@@ -13,6 +13,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import asyncio
 import copy
 import json
 import os
@@ -26,15 +27,22 @@ from typing import Optional
 from iconcommons.icon_config import IconConfig
 from iconcommons.logger import Logger
 
-from tbears.block_manager.block_manager import TBEARS_BLOCK_MANAGER
+from tbears.block_manager.block_manager import TBEARS_BLOCK_MANAGER, CHANNEL_QUEUE_NAME_FORMAT
+from tbears.block_manager.block_notifier import create_new_block_subscriber
+from tbears.block_manager.channel_service import ChannelStub, ChannelSocketStub
+from tbears.block_manager.log_query import LOG_QUERY_LIMIT
+from tbears.block_manager.message_code import Response
+from tbears.block_manager.unix_socket import TBEARS_UDS_HOST, get_unix_socket_path
 from tbears.config.tbears_config import FN_SERVER_CONF, tbears_server_config, TConfigKey, TBEARS_CLI_TAG
 from tbears.tbears_exception import TBearsCommandException, TBearsWriteFileException
 from tbears.tools.mainnet.sync import Sync
 from tbears.util import write_file
-from tbears.util.argparse_type import port_type, IconPath
+from tbears.util.argparse_type import port_type, IconPath, IconAddress, non_negative_num_type
 
 BLOCKMANAGER_MODULE_NAME = 'tbears.block_manager'
+UDS_HOST_MODULE_NAME = 'tbears.block_manager.unix_socket_host'
 TBEARS_CLI_ENV = '/tmp/.tbears.env'
+SERVICE_START_TIMEOUT = 30
 
 
 class CommandServer(object):
@@ -42,6 +50,8 @@ class CommandServer(object):
         self._add_start_parser(subparsers)
         self._add_stop_parser(subparsers)
         self._add_sync_mainnet_parser(subparsers)
+        self._add_logs_parser(subparsers)
+        self._add_watch_parser(subparsers)
 
     @staticmethod
     def _add_start_parser(subparsers) -> None:
@@ -51,6 +61,9 @@ class CommandServer(object):
         parser.add_argument('-p', '--port', type=port_type, help='Port to listen on (default: 9000)')
         parser.add_argument('-c', '--config', type=IconPath(),
                             help=f'tbears configuration file path (default: {FN_SERVER_CONF})')
+        parser.add_argument('-e', '--embedded', action='store_true', default=None, dest=TConfigKey.EMBEDDED,
+                            help='Run iconservice, block manager and JSON-RPC server in a single process '
+                                 'without RabbitMQ')
 
     @staticmethod
     def _add_stop_parser(subparsers) -> None:
@@ -62,6 +75,27 @@ class CommandServer(object):
         parser = subparsers.add_parser('sync_mainnet', help='Synchronize revision and governance SCORE with the mainnet',
                                        description='Synchronize revision and governance SCORE with the mainnet')
 
+    @staticmethod
+    def _add_logs_parser(subparsers) -> None:
+        parser = subparsers.add_parser('logs', help='Query event logs of running tbears service',
+                                       description='Query event logs in the block range of running tbears service. '
+                                                   'Blocks are filtered with logsBloom')
+        parser.add_argument('-s', '--start', type=non_negative_num_type, default='0x0',
+                            help='First block height (default: 0)')
+        parser.add_argument('-e', '--end', type=non_negative_num_type, help='Last block height (default: last block)')
+        parser.add_argument('-a', '--address', type=IconAddress('cx'), help='SCORE address which emitted event logs')
+        parser.add_argument('-v', '--event', help="Event signature. e.g. 'Transfer(Address,Address,int)'")
+        parser.add_argument('-l', '--limit', type=non_negative_num_type, default=hex(LOG_QUERY_LIMIT),
+                            help=f'Maximum number of event logs (default: {LOG_QUERY_LIMIT})')
+
+    @staticmethod
+    def _add_watch_parser(subparsers) -> None:
+        parser = subparsers.add_parser('watch', help='Watch new blocks of running tbears service',
+                                       description='Print height, hash, number of transactions and logsBloom of new '
+                                                   'blocks of running tbears service')
+        parser.add_argument('-n', '--count', type=non_negative_num_type, default='0x0',
+                            help='Number of new blocks to watch. 0 to watch until interrupted (default: 0)')
+
     def run(self, args):
         if not hasattr(self, args.command):
             raise TBearsCommandException(f"Invalid command {args.command}")
@@ -123,15 +157,26 @@ class CommandServer(object):
         with open(temp_conf, mode='w') as file:
             file.write(json.dumps(conf))
 
-        # run iconservice
-        self._start_iconservice(conf, temp_conf)
+        if conf.get(TConfigKey.EMBEDDED, False):
+            # start iconservice, tbears_block_manager and iconrpcserver in a process
+            self._start_blockmanager(conf, temp_conf)
+            self._wait_rpc_server(conf)
+        elif conf.get(TConfigKey.UDS_TARGET):
+            # start iconservice and iconrpcserver hosts linked with tbears_block_manager over Unix domain sockets
+            self._start_uds_host('icon', temp_conf)
+            self._start_blockmanager(conf, temp_conf)
+            self._start_uds_host('rpc', temp_conf)
+            self._wait_rpc_server(conf)
+        else:
+            # run iconservice
+            self._start_iconservice(conf, temp_conf)
 
-        # start tbears_block_manager
-        self._start_blockmanager(conf)
+            # start tbears_block_manager
+            self._start_blockmanager(conf)
 
-        # start iconrpcserver
-        self._start_iconrpcserver(conf, temp_conf)
-        time.sleep(3)
+            # start iconrpcserver
+            self._start_iconrpcserver(conf, temp_conf)
+            time.sleep(3)
 
         # remove temporary configuration file
         os.remove(temp_conf)
@@ -154,14 +199,24 @@ class CommandServer(object):
             print(f'tbears service is not running')
             return
 
+        server_conf = self.get_server_conf()
+        embedded = server_conf is not None and server_conf.get(TConfigKey.EMBEDDED, False)
+        uds_target = server_conf is not None and server_conf.get(TConfigKey.UDS_TARGET)
+
         # stop iconrpcserver
-        subprocess.run(['iconrpcserver', 'stop'], stdout=subprocess.DEVNULL)
+        if uds_target:
+            subprocess.run(['pkill', '-f', f'{TBEARS_UDS_HOST}.rpc'], stdout=subprocess.DEVNULL)
+        elif not embedded:
+            subprocess.run(['iconrpcserver', 'stop'], stdout=subprocess.DEVNULL)
 
-        # stop tbears_block_manager
+        # stop tbears_block_manager. iconservice and iconrpcserver in embedded mode are stopped with it
         subprocess.run(['pkill', '-f', TBEARS_BLOCK_MANAGER], stdout=subprocess.DEVNULL)
 
         # stop iconservice
-        subprocess.run(['iconservice', 'stop', '-c', f'{TBEARS_CLI_ENV}'], stdout=subprocess.DEVNULL)
+        if uds_target:
+            subprocess.run(['pkill', '-f', f'{TBEARS_UDS_HOST}.icon'], stdout=subprocess.DEVNULL)
+        elif not embedded:
+            subprocess.run(['iconservice', 'stop', '-c', f'{TBEARS_CLI_ENV}'], stdout=subprocess.DEVNULL)
 
         time.sleep(2)
 
@@ -183,6 +238,73 @@ class CommandServer(object):
 
         print(f'Synchronized successfully revision and governance SCORE with the mainnet')
 
+    def logs(self, conf: dict) -> list:
+        """ Query event logs of running tbears service
+
+        :param conf: logs command configuration
+        :return: event logs
+        """
+        server_conf = self.get_server_conf()
+        if server_conf is None or not self.is_service_running():
+            raise TBearsCommandException(f'tbears service is not running')
+        if server_conf.get(TConfigKey.EMBEDDED, False):
+            raise TBearsCommandException(f'logs command needs message queue. It is not supported in embedded mode')
+
+        route_key = CHANNEL_QUEUE_NAME_FORMAT.format(channel_name=server_conf[TConfigKey.CHANNEL],
+                                                     amqp_key=server_conf[TConfigKey.AMQP_KEY])
+        if server_conf.get(TConfigKey.UDS_TARGET):
+            stub = ChannelSocketStub(get_unix_socket_path(server_conf[TConfigKey.UDS_TARGET], route_key))
+        else:
+            stub = ChannelStub(amqp_target=server_conf[TConfigKey.AMQP_TARGET], route_key=route_key)
+        response_code, logs = stub.sync_task().get_logs(
+            start=int(conf['start'], 16),
+            end=None if conf.get('end') is None else int(conf['end'], 16),
+            address=conf.get('address'),
+            event=conf.get('event'),
+            limit=int(conf['limit'], 16))
+        if response_code != Response.success:
+            raise TBearsCommandException(f'Failed to query event logs. response code: {response_code}')
+
+        print(f"Event logs : {json.dumps(logs, indent=4)}")
+        return logs
+
+    def watch(self, conf: dict) -> list:
+        """ Watch new blocks of running tbears service
+
+        :param conf: watch command configuration
+        :return: new block notifications. empty if count is 0
+        """
+        server_conf = self.get_server_conf()
+        if server_conf is None or not self.is_service_running():
+            raise TBearsCommandException(f'tbears service is not running')
+
+        subscriber = create_new_block_subscriber(server_conf)
+        if subscriber is None:
+            raise TBearsCommandException(f'watch command needs message queue or Unix domain sockets. '
+                                         f'It is not supported in embedded mode without {TConfigKey.UDS_TARGET}')
+
+        count = int(conf['count'], 16)
+        notifications = []
+
+        async def _watch():
+            await subscriber.connect()
+            async for notification in subscriber:
+                print(json.dumps(notification))
+                if count:
+                    notifications.append(notification)
+                    if len(notifications) >= count:
+                        break
+
+        loop = asyncio.get_event_loop()
+        try:
+            loop.run_until_complete(_watch())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            subscriber.close()
+
+        return notifications
+
     def check_command(self, command):
         return hasattr(self, command)
 
@@ -195,22 +317,42 @@ class CommandServer(object):
         subprocess.run(['iconrpcserver', 'start', '-tbears', '-c', f'{config_path}'], stdout=subprocess.DEVNULL)
 
     @staticmethod
-    def _start_blockmanager(conf: dict):
+    def _start_uds_host(host: str, config_path: str):
+        # Run iconservice or iconrpcserver host in background mode
+        subprocess.Popen([sys.executable, '-m', UDS_HOST_MODULE_NAME, host, '-c', config_path], close_fds=True)
+
+    @staticmethod
+    def _start_blockmanager(conf: dict, config_path: str = None):
         # make params
         params = {'-ch': conf.get(TConfigKey.CHANNEL, None),
                   '-at': conf.get(TConfigKey.AMQP_TARGET, None),
                   '-ak': conf.get(TConfigKey.AMQP_KEY, None),
-                  '-c': conf.get('config', None)}
+                  '-c': config_path or conf.get('config', None)}
 
         custom_argv = []
         for k, v in params.items():
             if v:
                 custom_argv.append(k)
                 custom_argv.append(v)
+        if conf.get(TConfigKey.EMBEDDED, False):
+            custom_argv.append('-em')
 
         # Run block_manager in background mode
         subprocess.Popen([sys.executable, '-m', BLOCKMANAGER_MODULE_NAME, *custom_argv], close_fds=True)
 
+    @staticmethod
+    def _wait_rpc_server(conf: dict, timeout: int = SERVICE_START_TIMEOUT):
+        """
+        Wait until JSON-RPC server of tbears service listens on the port
+        :param conf: start command configuration
+        :param timeout: timeout in second
+        """
+        deadline = time.monotonic() + timeout
+        while CommandServer.is_port_available(conf):
+            if time.monotonic() > deadline or not CommandServer.is_service_running():
+                raise TBearsCommandException(f"Failed to start tbears service. See the log file")
+            time.sleep(0.1)
+
     @staticmethod
     def is_service_running(name: str = TBEARS_BLOCK_MANAGER) -> bool:
         """ Check if server is running.
@@ -259,7 +401,9 @@ class CommandServer(object):
             "stateDbRootPath": conf['stateDbRootPath'],
             TConfigKey.CHANNEL: conf.get(TConfigKey.CHANNEL, None),           # to stop iconservice
             TConfigKey.AMQP_TARGET: conf.get(TConfigKey.AMQP_TARGET, None),   # to stop iconservice
-            TConfigKey.AMQP_KEY: conf.get(TConfigKey.AMQP_KEY, None)          # to stop iconservice
+            TConfigKey.AMQP_KEY: conf.get(TConfigKey.AMQP_KEY, None),         # to stop iconservice
+            TConfigKey.EMBEDDED: conf.get(TConfigKey.EMBEDDED, False),
+            TConfigKey.UDS_TARGET: conf.get(TConfigKey.UDS_TARGET, '')
         }
         Logger.debug(f"Write server Info.({conf}) to {TBEARS_CLI_ENV}", TBEARS_CLI_TAG)
         file_path = TBEARS_CLI_ENV
@@ -18,6 +18,7 @@ import json
 import os
 from time import time
 
+import requests
 from iconcommons import IconConfig
 from iconcommons.logger.logger import Logger
 from iconsdk.builder.call_builder import CallBuilder
@@ -50,6 +51,7 @@ class CommandWallet:
         self._add_totalsupply_parser(subparsers)
         self._add_scoreapi_parser(subparsers)
         self._add_txbyhash_parser(subparsers)
+        self._add_txbyaddress_parser(subparsers)
         self._add_lastblock_parser(subparsers)
         self._add_blockbyhash_parser(subparsers)
         self._add_blockbyheight_parser(subparsers)
@@ -186,6 +188,19 @@ class CommandWallet:
                             help=f'Configuration file path. This file defines the default value for '
                                  f'"uri" (default: {FN_CLI_CONF})')
 
+    @staticmethod
+    def _add_txbyaddress_parser(subparsers):
+        parser = subparsers.add_parser('txbyaddress', help='Get transactions sent from or to given address',
+                                       description='Get hashes of transactions sent from or to given address. '
+                                                   'Use next index of the response to get the next page')
+        parser.add_argument('address', type=IconAddress(), help='Address of the transactions to be queried.')
+        parser.add_argument('-i', '--index', type=non_negative_num_type, default='0x0',
+                            help='Index of the page (default: 0)')
+        parser.add_argument('-u', '--node-uri', dest='uri', help='URI of node (default: http://127.0.0.1:9000/api/v3)')
+        parser.add_argument('-c', '--config', type=IconPath(),
+                            help=f'Configuration file path. This file defines the default value for '
+                                 f'"uri" (default: {FN_CLI_CONF})')
+
     @staticmethod
     def _add_sendtx_parser(subparsers):
         parser = subparsers.add_parser('sendtx', help='Request icx_sendTransaction with the specified json file and '
@@ -366,6 +381,33 @@ class CommandWallet:
 
         return response
 
+    def txbyaddress(self, conf):
+        """Query transaction hashes using given address. icx_getTransactionByAddress is supported in JSON-RPC v2
+
+        :param conf: txbyaddress command configuration.
+        :return: result of query.
+        """
+        uri, _ = uri_parser(conf['uri'])
+        payload = {
+            "jsonrpc": "2.0",
+            "method": "icx_getTransactionByAddress",
+            "id": int(time()),
+            "params": {
+                "address": conf['address'],
+                "index": convert_hex_str_to_int(conf['index'])
+            }
+        }
+
+        response = requests.post(f'{uri}/api/v2', json=payload).json()
+
+        if "error" in response:
+            print('Got an error response')
+            print(f"Can not get transactions \n{json.dumps(response, indent=4)}")
+        else:
+            print(f"Transactions : {json.dumps(response, indent=4)}")
+
+        return response
+
     def txresult(self, conf):
         """Query transaction result using given transaction hash.
 
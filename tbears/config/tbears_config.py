@@ -60,6 +60,25 @@ class TConfigKey(ConfigKey):
     BLOCK_GENERATE_COUNT_PER_LEADER = 'blockGenerateCountPerLeader'
     BLOCK_MANUAL_CONFIRM = 'blockManualConfirm'
     NETWORK_DELAY_MS = 'networkDelayMs'
+    TX_POOL_MAX_SIZE = 'txPoolMaxSize'
+    SIGNATURE_VERIFY_WORKERS = 'signatureVerifyWorkers'
+    SIGNATURE_VERIFY_BATCH_SIZE = 'signatureVerifyBatchSize'
+    MAX_TX_PER_BLOCK = 'maxTxPerBlock'
+    MAX_BLOCK_BYTES = 'maxBlockBytes'
+    BLOCK_CONFIRM_HYBRID = 'blockConfirmHybrid'
+    BLOCK_TRIGGER_TX_COUNT = 'blockTriggerTxCount'
+    BLOCK_TRIGGER_BYTES = 'blockTriggerBytes'
+    BLOCK_LINGER_MS = 'blockLingerMs'
+    METRICS_FILE_PATH = 'metricsFilePath'
+    METRICS_INTERVAL = 'metricsInterval'
+    BLOCK_CACHE_SIZE = 'blockCacheSize'
+    BLOCK_DB_ENCODING = 'blockDbEncoding'
+    BLOCK_DB = 'blockDb'
+    BLOCK_RETENTION = 'blockRetention'
+    BLOCK_RETENTION_DAYS = 'blockRetentionDays'
+    LOG_INDEX = 'logIndex'
+    EMBEDDED = 'embedded'
+    UDS_TARGET = 'udsTarget'
 
 
 tbears_server_config = {
@@ -114,6 +133,31 @@ tbears_server_config = {
     TConfigKey.BLOCK_GENERATE_COUNT_PER_LEADER: 10,
     TConfigKey.BLOCK_MANUAL_CONFIRM: False,
     TConfigKey.NETWORK_DELAY_MS: 500,
+    TConfigKey.TX_POOL_MAX_SIZE: 100000,
+    TConfigKey.SIGNATURE_VERIFY_WORKERS: 2,
+    TConfigKey.SIGNATURE_VERIFY_BATCH_SIZE: 64,
+    TConfigKey.MAX_TX_PER_BLOCK: 10000,
+    TConfigKey.MAX_BLOCK_BYTES: 1024 * 1024,
+    TConfigKey.BLOCK_CONFIRM_HYBRID: False,
+    TConfigKey.BLOCK_TRIGGER_TX_COUNT: 1000,
+    TConfigKey.BLOCK_TRIGGER_BYTES: 256 * 1024,
+    TConfigKey.BLOCK_LINGER_MS: 100,
+    TConfigKey.METRICS_FILE_PATH: "",
+    TConfigKey.METRICS_INTERVAL: 10,
+    TConfigKey.BLOCK_CACHE_SIZE: 32 * 1024 * 1024,
+    TConfigKey.BLOCK_DB_ENCODING: "json",
+    TConfigKey.BLOCK_DB: {
+        "lruCacheSize": 64 * 1024 * 1024,
+        "bloomFilterBits": 10,
+        "writeBufferSize": 16 * 1024 * 1024,
+        "maxOpenFiles": 1000,
+        "compression": "snappy"
+    },
+    TConfigKey.BLOCK_RETENTION: 0,
+    TConfigKey.BLOCK_RETENTION_DAYS: 0,
+    TConfigKey.LOG_INDEX: False,
+    TConfigKey.EMBEDDED: False,
+    TConfigKey.UDS_TARGET: "",
     TConfigKey.PREP_MAIN_PREPS: 4,
     TConfigKey.IISS_CALCULATE_PERIOD: 30,
     TConfigKey.TERM_PERIOD: 30
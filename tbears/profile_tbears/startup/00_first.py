@@ -112,6 +112,10 @@ class TbearsCommands(Magics):
     def txbyhash(self, line):
         return self.run_command(f"txbyhash {line}")
 
+    @line_magic
+    def txbyaddress(self, line):
+        return self.run_command(f"txbyaddress {line}")
+
     @line_magic
     def lastblock(self, line):
         return self.run_command(f"lastblock {line}")
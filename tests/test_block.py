@@ -12,15 +12,62 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import asyncio
+import base64
+import hashlib
 import json
 import os
 import shutil
 import time
 import unittest
+from unittest.mock import patch
 
-from tbears.block_manager.block import Block
-from tbears.block_manager.block_manager import BlockManager
+from iconsdk.libs.serializer import serialize
+from iconsdk.wallet.wallet import KeyWallet
+
+from tbears.block_manager import message_code
+from tbears.block_manager.block import Block, BlockCache, DECODED_SIZE_FACTOR
+from tbears.block_manager.block_manager import BlockManager, PRepManager
+from tbears.block_manager.channel_service import ChannelInnerTask, ChannelTxCreatorInnerTask
+from tbears.block_manager.hash_utils import VOTE_HASH_SALT, generate_hash
+from tbears.block_manager.task import Periodic
+from tbears.block_manager.transaction import Transaction
 from tbears.config.tbears_config import tbears_server_config
+from tbears.util import create_hash
+
+
+class FakeIconStub(object):
+    """
+    iconservice stub of block_manager in tests. Calls are appended to events
+    """
+    def __init__(self, block: 'Block', events: list = None, delay: float = 0, validate: callable = None):
+        """
+        :param block: block DB. its height is recorded when a block is invoked
+        :param events: list of ('invoke', height, block DB height) and ('precommit', height)
+        :param delay: seconds taken by invoke and write_precommit_state
+        :param validate: returns validate_transaction response of transaction params. success if None
+        """
+        self.block = block
+        self.events = [] if events is None else events
+        self.delay = delay
+        self.validate = validate
+
+    def async_task(self):
+        return self
+
+    async def invoke(self, request):
+        self.events.append(('invoke', int(request['block']['blockHeight'], 16), self.block.block_height))
+        await asyncio.sleep(self.delay)
+        tx_results = [{'txHash': tx['params']['txHash'], 'status': '0x1'} for tx in request['transactions']]
+        return {'txResults': tx_results, 'stateRootHash': '0' * 64}
+
+    async def write_precommit_state(self, request):
+        assert request['oldBlockHash'] == request['newBlockHash']
+        await asyncio.sleep(self.delay)
+        self.events.append(('precommit', int(request['blockHeight'], 16)))
+
+    async def validate_transaction(self, request):
+        return {} if self.validate is None else self.validate(request['params'])
 
 
 class TestTBearsBlock(unittest.TestCase):
@@ -33,7 +80,34 @@ class TestTBearsBlock(unittest.TestCase):
         self.block_manager = BlockManager(config)
         self.block = self.block_manager.block
 
+    def _start_block_manager(self, fail_writes: int = 0, **kwargs) -> 'FakeIconStub':
+        """
+        Link block manager with fake iconservice on genesis block
+        :param fail_writes: number of block DB writes which fail first
+        :param kwargs: arguments of FakeIconStub
+        :return: fake iconservice stub
+        """
+        block_manager = self.block_manager
+        stub = FakeIconStub(self.block, **kwargs)
+        block_manager._icon_stub = stub
+        self.block.commit_block(self.PREV_BLOCK_HASH)
+        block_manager._head_height, block_manager._head_hash = 0, self.PREV_BLOCK_HASH
+
+        if fail_writes > 0:
+            write_block = block_manager._write_block
+            failures = [OSError('disk full')] * fail_writes
+
+            def _write_block(*args):
+                if failures:
+                    raise failures.pop()
+                write_block(*args)
+
+            block_manager._write_block = _write_block
+
+        return stub
+
     def tearDown(self):
+        self.block.db.close()
         try:
             if os.path.exists(self.DB_PATH):
                 shutil.rmtree(self.DB_PATH)
@@ -64,6 +138,141 @@ class TestTBearsBlock(unittest.TestCase):
         self.assertEqual(block_height + 1, self.block.block_height)
         self.assertEqual(self.PREV_BLOCK_HASH, self.block.prev_block_hash)
 
+    def test_batch(self):
+        tx_list = [{'txHash': '01'}, {'txHash': '02'}]
+        block = {'hash': self.PREV_BLOCK_HASH, 'height': 0, 'transactions': tx_list}
+
+        with self.block.batch():
+            self.block.save_transactions(tx_list, self.PREV_BLOCK_HASH)
+            self.block.save_block(block)
+            self.block.commit_block(self.PREV_BLOCK_HASH)
+
+            # nothing is written until the unit of work is committed
+            self.assertIsNone(self.block.db.get(b'tx|' + bytes.fromhex('01')))
+            self.assertIsNone(self.block.get_block_by_height(0))
+            self.assertEqual(-1, self.block.block_height)
+            self.assertIsNone(self.block.prev_block_hash)
+
+        self.assertEqual(0, self.block.block_height)
+        self.assertEqual(self.PREV_BLOCK_HASH, self.block.prev_block_hash)
+        self.assertEqual(block, self.block.get_last_block())
+        self.assertEqual(hex(0), self.block.get_transaction('02')['block_height'])
+
+        # nothing is written if failed
+        with self.assertRaises(RuntimeError):
+            with self.block.batch():
+                self.block.save_transactions([{'txHash': '03'}], self.PREV_BLOCK_HASH)
+                self.block.commit_block('ff')
+                raise RuntimeError
+        self.assertIsNone(self.block.get_transaction('03'))
+        self.assertEqual(0, self.block.block_height)
+        self.assertEqual(self.PREV_BLOCK_HASH, self.block.prev_block_hash)
+
+        # reload Block info
+        self.block.db.close()
+        self.block = Block(db_path=f"{self.DB_PATH}/tbears/")
+        self.assertEqual(0, self.block.block_height)
+        self.assertEqual(self.PREV_BLOCK_HASH, self.block.prev_block_hash)
+
+    def test_iter_blocks(self):
+        blocks = []
+        for height in range(5):
+            block = {'hash': f'{height:064x}', 'height': height, 'transactions': [{'txHash': f'{height:02x}'}]}
+            self.block.save_block(block)
+            self.block.commit_block(block['hash'])
+            blocks.append(block)
+
+        self.assertEqual(blocks, list(self.block.iter_blocks()))
+        self.assertEqual(blocks[1:4], list(self.block.iter_blocks(start=1, end=3, chunk_size=2)))
+        self.assertEqual(blocks[3:], list(self.block.iter_blocks(start=3, end=10)))
+        self.assertEqual([], list(self.block.iter_blocks(start=3, end=2)))
+
+        # raw JSON bytes
+        self.assertEqual([json.dumps(block).encode() for block in blocks[:2]],
+                         list(self.block.iter_blocks(end=1, raw=True)))
+
+    def test_prune(self):
+        addr1, addr2 = 'hx' + '1' * 40, 'hx' + '2' * 40
+        self.block.db.close()
+        self.block = Block(db_path=f"{self.DB_PATH}/tbears/", cache_size=1024 * 1024)
+
+        for height in range(6):
+            block_hash = f'{height:064x}'
+            tx_list = [{'txHash': f'{height:02x}{i:062x}', 'from': addr1, 'to': addr2} for i in range(2)]
+            block = {'hash': block_hash, 'height': height, 'timestamp': height * 10, 'transactions': tx_list}
+            with self.block.batch():
+                self.block.save_transactions(tx_list, block_hash)
+                self.block.save_txresults([{'txHash': tx['txHash'], 'status': '0x1'} for tx in tx_list], block_hash)
+                self.block.save_block(block)
+                self.block.commit_block(block_hash)
+
+        # read block 1 through cache
+        self.assertEqual(2, len(self.block.get_block_by_height(1)['transactions']))
+
+        # prune blocks below 4. genesis block is kept
+        self.assertEqual(3, self.block.prune(stop_height=4))
+        self.assertEqual(4, self.block.pruned_height)
+        self.assertIsNotNone(self.block.get_transaction(f'00{0:062x}'))
+        for height in range(1, 4):
+            block = self.block.get_block_by_height(height)
+            self.assertEqual(height, block['height'])
+            self.assertEqual([], block['transactions'])
+            self.assertIsNone(self.block.get_transaction(f'{height:02x}{0:062x}'))
+            self.assertIsNone(self.block.get_txresult(f'{height:02x}{1:062x}'))
+        self.assertIsNotNone(self.block.get_transaction(f'04{0:062x}'))
+        self.assertIsNotNone(self.block.get_txresult(f'05{1:062x}'))
+        # pruned transactions are still duplicates
+        self.assertTrue(self.block.has_transaction(f'01{0:062x}'))
+        self.assertEqual([True, True, True, False],
+                         self.block.has_transactions([f'03{1:062x}', f'00{0:062x}', f'04{0:062x}', f'06{0:062x}']))
+        tx_hashes, _ = self.block.get_tx_by_address(addr2, count=100)
+        self.assertEqual([f'0x00{0:062x}', f'0x00{1:062x}', f'0x04{0:062x}', f'0x04{1:062x}', f'0x05{0:062x}',
+                          f'0x05{1:062x}'], tx_hashes)
+
+        # nothing to prune
+        self.assertEqual(0, self.block.prune(stop_height=4))
+
+        # only blocks older than the timestamp are pruned
+        self.assertEqual(0, self.block.prune(stop_height=6, before_timestamp=40))
+        self.assertEqual(1, self.block.prune(stop_height=6, before_timestamp=41))
+        self.assertEqual(5, self.block.pruned_height)
+
+        # compaction keeps data
+        self.block.compact()
+        self.assertEqual(5, self.block.get_last_block()['height'])
+
+        # reload pruned height
+        self.block.db.close()
+        self.block = Block(db_path=f"{self.DB_PATH}/tbears/")
+        self.assertEqual(5, self.block.pruned_height)
+
+    def test_tx_by_address(self):
+        addr1, addr2, score = 'hx' + '1' * 40, 'hx' + '2' * 40, 'cx' + '1' * 40
+        # block 0: 5 transactions from addr1 to addr2 and score
+        tx_list = [{'txHash': f'{i:064x}', 'from': addr1, 'to': addr2 if i % 2 else score} for i in range(5)]
+        self.block.save_transactions(tx_list, self.PREV_BLOCK_HASH)
+        self.block.commit_block(self.PREV_BLOCK_HASH)
+        # block 1: 5 transactions from addr1 to itself
+        tx_list = [{'txHash': f'{i + 5:064x}', 'from': addr1, 'to': addr1} for i in range(5)]
+        self.block.save_transactions(tx_list, self.PREV_BLOCK_HASH)
+        self.block.commit_block(self.PREV_BLOCK_HASH)
+
+        # paginate transactions in block order
+        tx_hashes, next_index = self.block.get_tx_by_address(addr1, count=4)
+        self.assertEqual([f'0x{i:064x}' for i in range(4)], tx_hashes)
+        tx_hashes, next_index = self.block.get_tx_by_address(addr1, index=next_index, count=4)
+        self.assertEqual([f'0x{i:064x}' for i in range(4, 8)], tx_hashes)
+        tx_hashes, next_index = self.block.get_tx_by_address(addr1, index=next_index, count=4)
+        self.assertEqual([f'0x{i:064x}' for i in range(8, 10)], tx_hashes)
+        self.assertEqual(0, next_index)
+
+        self.assertEqual(([f'0x{i:064x}' for i in (1, 3)], 0), self.block.get_tx_by_address(addr2))
+        self.assertEqual(([f'0x{i:064x}' for i in (0, 2, 4)], 0), self.block.get_tx_by_address(score))
+
+        # unknown or invalid address
+        self.assertEqual(([], 0), self.block.get_tx_by_address('hx' + '3' * 40))
+        self.assertEqual(([], 0), self.block.get_tx_by_address('invalid'))
+
     def test_transactions(self):
         tx_list = [
             {'txHash': '01'},
@@ -79,6 +288,175 @@ class TestTBearsBlock(unittest.TestCase):
             self.assertEqual(hex(self.block.block_height + 1), tx.get('block_height'))
             self.assertEqual(f'0x{self.PREV_BLOCK_HASH}', tx.get('block_hash'))
 
+    def test_transaction_record(self):
+        tx = {'from': 'hx01', 'to': 'hx02', 'data': {'method': 'transfer', 'params': {'value': '0x1'}}}
+        tx_record = Transaction('01', tx, size=10)
+        self.assertEqual(dict(tx, txHash='01'), tx_record.data)
+        self.assertNotIn('txHash', tx)
+
+        # encoded record is saved in the same format as dictionary
+        self.block.save_transactions([tx_record, {'txHash': '02', 'from': 'hx01'}], self.PREV_BLOCK_HASH)
+        self.assertEqual(Block._get_tx_value(0, '01', tx_record.data, self.PREV_BLOCK_HASH, 0)[1],
+                         self.block.db.get(b'tx|' + bytes.fromhex('01')))
+        value = json.loads(self.block.db.get(b'tx|' + bytes.fromhex('01')))
+        self.assertEqual({'transaction': tx_record.data, 'tx_index': '0x0', 'block_height': '0x0',
+                          'block_hash': f'0x{self.PREV_BLOCK_HASH}'}, value)
+        self.assertEqual(hex(1), self.block.get_transaction('02')['tx_index'])
+
+        block = {'hash': self.PREV_BLOCK_HASH, 'height': 0, 'transactions': [tx_record], 'prevVotes': []}
+        self.block.save_block(block)
+        self.assertEqual(json.dumps(dict(block, transactions=[tx_record.data])).encode(),
+                         self.block.db.get(b'block|' + bytes.fromhex(self.PREV_BLOCK_HASH)))
+
+    def test_block_cache(self):
+        cache = BlockCache(capacity=25)
+        cache.put(b'k1', b'v' * 8)
+        cache.put(b'k2', b'v' * 8)
+        self.assertEqual([b'v' * 8, None], cache.get(b'k1'))
+        self.assertEqual(20, cache.size)
+
+        # least recently used one is evicted
+        cache.put(b'k3', b'v' * 8)
+        self.assertIsNone(cache.get(b'k2'))
+        self.assertIsNotNone(cache.get(b'k1'))
+        self.assertEqual(2, len(cache))
+        self.assertEqual((2, 1), (cache.hits, cache.misses))
+
+        # too big value is not cached
+        cache.put(b'k4', b'v' * 40)
+        self.assertIsNone(cache.get(b'k4'))
+        self.assertEqual(20, cache.size)
+
+        cache.delete(b'k1')
+        self.assertEqual(10, cache.size)
+
+        # decoded value is charged and evicts least recently used ones
+        entry = cache.get(b'k3')
+        cache.put(b'k5', b'v' * 3)
+        self.assertEqual(15, cache.size)
+        cache.set_decoded(b'k5', cache.get(b'k5'), {'v': 3})
+        self.assertEqual(5 + 3 * DECODED_SIZE_FACTOR, cache.size)
+        self.assertIsNone(cache.get(b'k3'))
+        self.assertEqual([b'v' * 3, {'v': 3}], cache.get(b'k5'))
+
+        # evicted entry is not charged
+        cache.set_decoded(b'k3', entry, {'v': 8})
+        self.assertEqual({'v': 8}, entry[1])
+        self.assertEqual(5 + 3 * DECODED_SIZE_FACTOR, cache.size)
+
+        # peek does not count hits and misses and does not update LRU order
+        cache.put(b'k6', b'v' * 3)
+        self.assertIsNotNone(cache.peek(b'k5'))
+        self.assertIsNone(cache.peek(b'k1'))
+        self.assertEqual((5, 3), (cache.hits, cache.misses))
+        cache.put(b'k7', b'v' * 8)
+        self.assertIsNone(cache.peek(b'k5'))
+
+        # value read before a write is not cached
+        generation = cache.generation
+        cache.delete(b'k6')
+        cache.put(b'k6', b'v' * 3, generation=generation)
+        self.assertIsNone(cache.peek(b'k6'))
+        cache.put(b'k6', b'v' * 3, generation=cache.generation)
+        self.assertIsNotNone(cache.peek(b'k6'))
+
+        # too big value written removes the old one
+        cache.put(b'k6', b'v' * 40)
+        self.assertIsNone(cache.peek(b'k6'))
+
+        cache.clear()
+        self.assertEqual(0, len(cache))
+
+    def test_cached_read(self):
+        self.block.db.close()
+        self.block = Block(db_path=f"{self.DB_PATH}/tbears/", cache_size=1024 * 1024)
+
+        # values are cached on write
+        self.block.save_transactions([{'txHash': '01'}], self.PREV_BLOCK_HASH)
+        self.block.save_txresults([{'txHash': '01', 'status': '0x1'}], self.PREV_BLOCK_HASH)
+        tx = self.block.get_transaction('01')
+        self.assertEqual({'txHash': '01'}, tx['transaction'])
+        self.assertIs(tx, self.block.get_transaction('01'))
+        self.assertEqual({'txHash': '01', 'status': '0x1', 'blockHash': self.PREV_BLOCK_HASH},
+                         json.loads(self.block.get_txresult('01')))
+        self.assertEqual((3, 0), (self.block.cache.hits, self.block.cache.misses))
+
+        # values not in cache are read from DB
+        self.block.cache.clear()
+        self.assertEqual(tx, self.block.get_transaction('01'))
+        self.assertIsNone(self.block.get_transaction('02'))
+        self.assertEqual(2, self.block.cache.misses)
+        self.assertEqual(tx, self.block.get_transaction('01'))
+        self.assertEqual(4, self.block.cache.hits)
+
+        # checking saved transactions does not touch cache statistics
+        self.assertEqual([True, False], self.block.has_transactions(['01', '02']))
+        self.assertEqual((4, 2), (self.block.cache.hits, self.block.cache.misses))
+
+        # value read from DB is not cached if it is written during the read
+        db_get = self.block.db.get
+
+        def get_and_write(key):
+            value = db_get(key)
+            self.block.db.get = db_get
+            self.block.save_transactions([{'txHash': '01', 'nonce': '0x1'}], self.PREV_BLOCK_HASH)
+            return value
+
+        self.block.cache.clear()
+        self.block.db.get = get_and_write
+        self.assertEqual({'txHash': '01'}, self.block.get_transaction('01')['transaction'])
+        self.assertEqual({'txHash': '01', 'nonce': '0x1'}, self.block.get_transaction('01')['transaction'])
+
+    def test_msgpack_encoding(self):
+        tx_list = [{'txHash': '01', 'from': 'hx' + '1' * 40}]
+        tx_result = {'txHash': '01', 'status': '0x1'}
+
+        # legacy JSON values
+        self.block.save_transactions(tx_list, self.PREV_BLOCK_HASH)
+        self.block.db.close()
+
+        self.block = Block(db_path=f"{self.DB_PATH}/tbears/", encoding='msgpack')
+        self.block.save_txresults([tx_result], self.PREV_BLOCK_HASH)
+        self.block.save_block({'hash': self.PREV_BLOCK_HASH, 'height': 0, 'transactions': tx_list})
+        self.assertEqual(b'\xc1', self.block.db.get(b'txResult|' + bytes.fromhex('01'))[:1])
+
+        # both of JSON and msgpack values are read
+        self.assertEqual(tx_list[0], self.block.get_transaction('01')['transaction'])
+        self.assertEqual(json.dumps(dict(tx_result, blockHash=self.PREV_BLOCK_HASH)).encode(),
+                         self.block.get_txresult('01'))
+        self.assertEqual(tx_list, self.block.get_block_by_height(0)['transactions'])
+
+        # migrate values to JSON
+        self.assertEqual(2, self.block.migrate('json'))
+        self.assertEqual(0, self.block.migrate('json'))
+        self.assertEqual(b'{', self.block.db.get(b'txResult|' + bytes.fromhex('01'))[:1])
+        self.assertEqual(tx_list, self.block.get_block_by_height(0)['transactions'])
+
+        self.assertRaises(ValueError, self.block.migrate, 'xml')
+
+    def test_raw_block(self):
+        blocks = [{'hash': f'{height:064x}', 'height': height, 'transactions': [{'txHash': f'{height:02x}'}]}
+                  for height in range(2)]
+        self.block.save_block(blocks[0])
+        self.block.commit_block(blocks[0]['hash'])
+        self.block.db.close()
+
+        # block 1 is written in msgpack
+        self.block = Block(db_path=f"{self.DB_PATH}/tbears/", encoding='msgpack')
+        self.block.save_block(blocks[1])
+        self.block.commit_block(blocks[1]['hash'])
+
+        # stored JSON is returned as it is
+        self.assertEqual((blocks[0]['hash'], self.block.db.get(b'block|' + bytes.fromhex(blocks[0]['hash']))),
+                         self.block.get_block_raw_by_height(0))
+        self.assertEqual((blocks[0]['hash'], json.dumps(blocks[0]).encode()),
+                         self.block.get_block_raw_by_hash(blocks[0]['hash']))
+        self.assertEqual((blocks[1]['hash'], json.dumps(blocks[1]).encode()), self.block.get_last_block_raw())
+
+        self.assertIsNone(self.block.get_block_raw_by_height(2))
+        self.assertIsNone(self.block.get_block_raw_by_height(-1))
+        self.assertIsNone(self.block.get_block_raw_by_hash('ff' * 32))
+
     def test_txresult(self):
         tx_result = {'key': 'value'}
         tx_hash = '0123'
@@ -163,6 +541,176 @@ class TestTBearsBlock(unittest.TestCase):
         self.block.save_block(block)
         self.block.commit_block(block_hash)
 
+    def test_pipeline(self):
+        events = []
+        block_manager = self.block_manager
+
+        class _Publisher:
+            async def publish(self, notification):
+                events.append(('publish', notification['height'], notification['txCount']))
+
+        self._start_block_manager(events=events, delay=0.01)
+        block_manager._block_publisher = _Publisher()
+
+        block_manager.add_tx('01', {'from': 'hx1', 'to': 'hx2'})
+
+        async def _process():
+            await block_manager.process_block_data()
+            block_manager.add_tx('02', {'from': 'hx1', 'to': 'hx2'})
+            await block_manager.process_block_data()
+            await block_manager.wait_confirm()
+
+        asyncio.get_event_loop().run_until_complete(_process())
+
+        # block 1 is persisted while block 2 is invoked. precommit keeps block order
+        # new block is published after precommit
+        self.assertEqual([('invoke', 1, 0), ('invoke', 2, 0), ('precommit', 1), ('publish', 1, 1),
+                          ('precommit', 2), ('publish', 2, 1)], events)
+        self.assertEqual(2, self.block.block_height)
+        block1 = self.block.get_block_by_height(1)
+        block2 = self.block.get_block_by_height(2)
+        self.assertEqual(self.PREV_BLOCK_HASH, block1['prevHash'])
+        self.assertEqual(block1['hash'], block2['prevHash'])
+        self.assertEqual(block2['hash'], self.block.prev_block_hash)
+        self.assertEqual(hex(2), self.block.get_transaction('02')['block_height'])
+
+        metrics = block_manager.get_metrics()
+        self.assertEqual(2, metrics['blocks_confirmed_total'])
+        self.assertEqual(2, metrics['transactions_confirmed_total'])
+        self.assertEqual(2, metrics['invoke_seconds']['count'])
+        self.assertEqual(0, metrics['tx_pool_depth'])
+
+    def test_pipeline_prev_votes(self):
+        block_manager = self.block_manager
+        preps = [{'id': f'hx{i:040x}'} for i in range(3)]
+        block_manager._prep_manager = PRepManager(is_generator_rotation=False, gen_count_per_leader=10,
+                                                  prep_list=preps)
+        self._start_block_manager(delay=0.01)
+
+        async def _process():
+            for tx_hash in ('01', '02'):
+                block_manager.add_tx(tx_hash, {'from': 'hx1', 'to': 'hx2'})
+                # votes of the next block are made before the previous block is written
+                await block_manager.process_block_data()
+            await block_manager.wait_confirm()
+
+        asyncio.get_event_loop().run_until_complete(_process())
+
+        for height in (1, 2):
+            block = self.block.get_block_by_height(height)
+            prev_block = self.block.get_block_by_height(height - 1)
+            prev_hash = prev_block['hash'] if height > 1 else self.PREV_BLOCK_HASH
+            self.assertEqual(None, block['prevVotes'][0])
+            for vote in block['prevVotes'][1:]:
+                self.assertEqual((height - 1, prev_hash), (vote['blockHeight'], vote['blockHash']))
+            self.assertEqual(generate_hash(block['prevVotes'], VOTE_HASH_SALT), block['prevVotesHash'])
+
+    def test_wait_invoke_result(self):
+        block_manager = self.block_manager
+        events = []
+        self._start_block_manager(events=events, delay=0.01)
+        channel = ChannelInnerTask(block_manager)
+
+        async def _wait():
+            # pending transaction is not invoked until timeout
+            block_manager.add_tx('0a', {'from': 'hx1', 'to': 'hx2'})
+            self.assertEqual((message_code.Response.fail_tx_not_invoked, None),
+                             await channel.wait_invoke_result('0a', timeout=0.01))
+            self.assertEqual({}, block_manager._tx_result_waiters)
+
+            async def _wait_invoke_result():
+                result = await channel.wait_invoke_result('0a', timeout=5)
+                events.append(('woken',))
+                return result
+
+            # waiters are woken up when the block is written and its state is committed
+            waiters = [asyncio.ensure_future(_wait_invoke_result()) for _ in range(2)]
+            await asyncio.sleep(0)
+            started = time.monotonic()
+            await block_manager.process_block_data()
+            results = await asyncio.gather(*waiters)
+            self.assertLess(time.monotonic() - started, 1)
+            await block_manager.wait_confirm()
+
+            # written transaction result is returned at once
+            results.append(await channel.wait_invoke_result('0a', timeout=5))
+            return results
+
+        results = asyncio.get_event_loop().run_until_complete(_wait())
+        self.assertEqual([('invoke', 1, 0), ('precommit', 1), ('woken',), ('woken',)], events)
+        for response_code, tx_result in results:
+            self.assertEqual(message_code.Response.success, response_code)
+            self.assertEqual('0x1', json.loads(tx_result)['status'])
+        self.assertEqual({}, block_manager._tx_result_waiters)
+
+    def test_in_flight_duplicate(self):
+        block_manager = self.block_manager
+        self._start_block_manager()
+        task = ChannelTxCreatorInnerTask(block_manager)
+        tx = {"version": "0x3", "from": f"hx{1:040x}", "to": f"hx{2:040x}", "value": "0x1", "stepLimit": "0x100000",
+              "timestamp": hex(int(time.time() * 10 ** 6)), "nid": "0x3", "signature": "sig"}
+
+        async def _resubmit():
+            code, tx_hash, _ = await task.create_icx_tx(dict(tx))
+            self.assertEqual(message_code.Response.success, code)
+            await block_manager.process_block_data()
+
+            # transaction popped for the block is duplicated until the block is written
+            self.assertTrue(block_manager.is_tx_pending(tx_hash[2:]))
+            results = [await task.create_icx_tx(dict(tx)), (await task.create_icx_tx_batch([dict(tx)]))[0]]
+
+            await block_manager.wait_confirm()
+            self.assertFalse(block_manager.is_tx_pending(tx_hash[2:]))
+            results.append(await task.create_icx_tx(dict(tx)))
+            return results
+
+        results = asyncio.get_event_loop().run_until_complete(_resubmit())
+        self.assertEqual([message_code.Response.fail_tx_invalid_duplicated_hash] * 3, [result[0] for result in results])
+        self.assertEqual(0, len(block_manager.tx_pool))
+        self.assertEqual(1, self.block.block_height)
+
+    def test_confirm_fail(self):
+        block_manager = self.block_manager
+        stub = self._start_block_manager(fail_writes=1, delay=0.01)
+        periodic = Periodic(func=block_manager.process_block_data, interval=0.01)
+
+        async def _process():
+            block_manager.add_tx('01', {'from': 'hx1', 'to': 'hx2'})
+            await block_manager.process_block_data()
+            block_manager.add_tx('02', {'from': 'hx1', 'to': 'hx2'})
+            process = asyncio.ensure_future(block_manager.process_block_data())
+            # transaction received while block 2 is invoked
+            await asyncio.sleep(0)
+            block_manager.add_tx('03', {'from': 'hx1', 'to': 'hx2'})
+            # block 2 is not made on block 1 which is not persisted. its transactions are returned to pool
+            await process
+            pool = [tx.tx_hash for tx in block_manager.tx_pool]
+            head = block_manager._head_height, block_manager._head_hash
+
+            # block production goes on from the last block in block DB
+            await periodic.start()
+            for _ in range(100):
+                if self.block.block_height >= 1:
+                    break
+                await asyncio.sleep(0.01)
+            alive = not periodic._task.done()
+            await periodic.stop()
+            await block_manager.wait_confirm()
+            return pool, head, alive
+
+        pool, head, alive = asyncio.get_event_loop().run_until_complete(_process())
+
+        self.assertEqual(['02', '03'], pool)
+        self.assertEqual((0, self.PREV_BLOCK_HASH), head)
+        self.assertTrue(alive)
+        self.assertEqual([('invoke', 1, 0), ('invoke', 2, 0), ('invoke', 1, 0)], stub.events[:3])
+        self.assertIn(('precommit', 1), stub.events)
+        self.assertEqual(['02', '03'], [tx['txHash'] for tx in self.block.get_block_by_height(1)['transactions']])
+        self.assertEqual(self.PREV_BLOCK_HASH, self.block.get_block_by_height(1)['prevHash'])
+        self.assertIsNone(self.block.get_transaction('01'))
+        self.assertFalse(block_manager.is_tx_pending('01'))
+        self.assertEqual(0, len(block_manager.tx_pool))
+
     def _check_block(self, block_hash, prev_hash, tx_list, timestamp, height, leader, next_leader, is_genesis=False):
         last_block = self.block.get_last_block()
         block_by_hash = self.block.get_block_by_hash(block_hash)
@@ -189,3 +737,88 @@ class TestTBearsBlock(unittest.TestCase):
         else:
             self.assertEqual(tx_list, block_by_hash.get('transactions'))
             self.assertEqual("tbears_block_manager_does_not_support_block_signature", block_by_hash.get('signature'))
+
+    def test_create_icx_tx_batch(self):
+        wallet = KeyWallet.create()
+
+        def make_tx(nonce: int, signed: bool = False) -> dict:
+            tx = {
+                "version": "0x3",
+                "from": wallet.get_address(),
+                "to": f"hx{nonce:040x}",
+                "value": "0x1",
+                "stepLimit": "0x100000",
+                "timestamp": hex(int(time.time() * 10 ** 6)),
+                "nid": "0x3",
+                "nonce": hex(nonce),
+                "signature": "sig"
+            }
+            if signed:
+                tx['signature'] = base64.b64encode(wallet.sign(hashlib.sha3_256(serialize(tx)).digest())).decode()
+            return tx
+
+        def create_icx_tx_batch(tx_list: list) -> list:
+            return asyncio.get_event_loop().run_until_complete(task.create_icx_tx_batch(tx_list))
+
+        def validate(params: dict) -> dict:
+            if params['value'] != '0x1':
+                return {'error': {'code': -32602, 'message': 'Out of balance'}}
+            return {}
+
+        self.block_manager._icon_stub = FakeIconStub(self.block, validate=validate)
+        task = ChannelTxCreatorInnerTask(self.block_manager)
+        tx_saved = make_tx(0)
+        tx_pooled = make_tx(1)
+        tx_signed = make_tx(2, signed=True)
+        tx_invalid = dict(make_tx(3, signed=True), to=f"hx{4:040x}")
+        tx_new = make_tx(5)
+
+        # saved transaction and transaction in pool
+        saved_hash = create_hash(serialize(tx_saved))
+        self.block.save_transactions([Transaction(saved_hash, tx_saved)], block_hash='0' * 64)
+        self.assertEqual([True, False], self.block.has_transactions([saved_hash, '1' * 64]))
+        code, pooled_hash, _ = create_icx_tx_batch([tx_pooled])[0]
+        self.assertEqual(message_code.Response.success, code)
+
+        results = create_icx_tx_batch([tx_saved, tx_pooled, tx_signed, tx_invalid, tx_new, tx_new])
+        self.assertEqual([message_code.Response.fail_tx_invalid_duplicated_hash,
+                          message_code.Response.fail_tx_invalid_duplicated_hash,
+                          message_code.Response.success,
+                          message_code.Response.fail_tx_invalid_signature,
+                          message_code.Response.success,
+                          message_code.Response.fail_tx_invalid_duplicated_hash], [result[0] for result in results])
+        self.assertEqual(f'0x{create_hash(serialize(tx_signed))}', results[2][1])
+        self.assertEqual(f'0x{create_hash(serialize(tx_new))}', results[4][1])
+        self.assertEqual(3, len(self.block_manager.tx_pool))
+
+        # invalid transactions fail by themselves
+        tx_no_signature = make_tx(6)
+        del tx_no_signature['signature']
+        tx_out_of_balance = dict(make_tx(7), value='0x10')
+        tx_valid = make_tx(8, signed=True)
+        results = create_icx_tx_batch([tx_no_signature, 'tx', tx_out_of_balance, tx_valid])
+        self.assertEqual([message_code.Response.fail_tx_invalid_params,
+                          message_code.Response.fail_tx_invalid_params,
+                          message_code.Response.fail_tx_invalid_params,
+                          message_code.Response.success], [result[0] for result in results])
+        self.assertEqual('Out of balance', results[2][2])
+        self.assertEqual(f'0x{create_hash(serialize(tx_valid))}', results[3][1])
+        self.assertEqual(4, len(self.block_manager.tx_pool))
+
+        # number of validation requests in flight is limited
+        in_flight = []
+        max_in_flight = []
+
+        async def validate_transaction(request):
+            in_flight.append(request)
+            max_in_flight.append(len(in_flight))
+            await asyncio.sleep(0.001)
+            in_flight.remove(request)
+            return validate(request['params'])
+
+        self.block_manager.icon_stub.validate_transaction = validate_transaction
+        with patch('tbears.block_manager.channel_service.VALIDATE_TX_CONCURRENCY', 2):
+            results = create_icx_tx_batch([make_tx(nonce) for nonce in range(10, 15)])
+        self.assertEqual([message_code.Response.success] * 5, [result[0] for result in results])
+        self.assertEqual(5, len(max_in_flight))
+        self.assertEqual(2, max(max_in_flight))
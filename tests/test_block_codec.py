@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+# Copyright 2021 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import json
+import unittest
+
+from tbears.block_manager.block_codec import Encoding, decode, encode, is_compact, to_json_bytes, unpack
+
+TX_RESULT = {
+    "txHash": "0x0f3c6b1e0d5e4f1a2b3c4d5e6f708192a3b4c5d6e7f8091a2b3c4d5e6f708192",
+    "blockHeight": "0x1a",
+    "blockHash": "4c3b2a1908f7e6d5c4b3a29180f7e6d5c4b3a29180f7e6d5c4b3a29180f7e6d5",
+    "txIndex": "0x0",
+    "to": "cx0000000000000000000000000000000000000001",
+    "stepUsed": "0x1e3a0",
+    "stepPrice": "0x2540be400",
+    "cumulativeStepUsed": "0x1e3a0",
+    "eventLogs": [
+        {
+            "scoreAddress": "cx0000000000000000000000000000000000000001",
+            "indexed": ["Transfer(Address,Address,int)", "hx" + "ab" * 20, "hxABCD", "0x00ff"],
+            "data": []
+        }
+    ],
+    "logsBloom": "0x" + "00" * 255 + "01",
+    "status": "0x1",
+    "failure": None,
+    "custom": {"nested": [True, 1.5, -3, "", "0x", "plain text", "deadbeef"]}
+}
+
+
+class TestBlockCodec(unittest.TestCase):
+
+    def test_round_trip(self):
+        value = encode(TX_RESULT, Encoding.MSGPACK)
+        self.assertTrue(is_compact(value))
+        self.assertEqual(TX_RESULT, decode(value))
+        self.assertLess(len(value), len(encode(TX_RESULT, Encoding.JSON)) // 2)
+
+        # JSON bytes of compact value are the same as legacy one
+        self.assertEqual(json.dumps(TX_RESULT).encode(), to_json_bytes(value))
+
+    def test_legacy_json(self):
+        value = encode(TX_RESULT, Encoding.JSON)
+        self.assertFalse(is_compact(value))
+        self.assertEqual(TX_RESULT, decode(value))
+        self.assertIs(value, to_json_bytes(value))
+
+    def test_unsupported_version(self):
+        value = encode(TX_RESULT, Encoding.MSGPACK)
+        self.assertRaises(ValueError, unpack, value[:1] + b'\xff' + value[2:])
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+# Copyright 2021 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import shutil
+import tempfile
+import unittest
+from copy import deepcopy
+
+from tbears.block_manager.block_notifier import (
+    AmqpBlockPublisher, AmqpNewBlockSubscriber, BlockPublisher, NewBlockSubscriber, UnixSocketBlockPublisher,
+    UnixSocketNewBlockSubscriber, create_block_publisher, create_new_block_subscriber, make_new_block_notification
+)
+from tbears.config.tbears_config import TConfigKey, tbears_server_config
+
+
+class TestBlockNotifier(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.get_event_loop()
+        self.uds_target = tempfile.mkdtemp()
+        self.conf = deepcopy(tbears_server_config)
+        self.conf[TConfigKey.UDS_TARGET] = self.uds_target
+
+    def tearDown(self):
+        shutil.rmtree(self.uds_target)
+
+    def test_make_new_block_notification(self):
+        block_data = {'height': 3, 'hash': 'ab' * 32, 'transactions': [{}, {}], 'logsBloom': '0x1',
+                      'prevHash': 'cd' * 32, 'timestamp': 1}
+        self.assertEqual({'height': 3, 'hash': 'ab' * 32, 'txCount': 2, 'logsBloom': '0x1'},
+                         make_new_block_notification(block_data))
+
+    def test_create(self):
+        self.assertIsInstance(create_block_publisher(self.conf), UnixSocketBlockPublisher)
+        self.assertIsInstance(create_new_block_subscriber(self.conf), UnixSocketNewBlockSubscriber)
+
+        self.conf[TConfigKey.UDS_TARGET] = ''
+        self.assertIsInstance(create_block_publisher(self.conf), AmqpBlockPublisher)
+        self.assertIsInstance(create_new_block_subscriber(self.conf), AmqpNewBlockSubscriber)
+
+        # embedded mode without Unix domain sockets
+        self.conf[TConfigKey.EMBEDDED] = True
+        self.assertIsNone(create_block_publisher(self.conf))
+        self.assertIsNone(create_new_block_subscriber(self.conf))
+
+        # publisher and subscriber which don't implement the interface are not created
+        class _Publisher(BlockPublisher):
+            pass
+
+        class _Subscriber(NewBlockSubscriber):
+            async def connect(self):
+                pass
+
+        self.assertRaises(TypeError, _Publisher)
+        self.assertRaises(TypeError, _Subscriber)
+
+    def test_unix_socket(self):
+        publisher = create_block_publisher(self.conf)
+        subscribers = [create_new_block_subscriber(self.conf) for _ in range(2)]
+        notifications = [{'height': i, 'hash': f'{i:064x}', 'txCount': i, 'logsBloom': '0x0'} for i in range(3)]
+
+        async def _run():
+            await publisher.connect()
+            # notification without subscribers is dropped
+            await publisher.publish({'height': -1})
+
+            for subscriber in subscribers:
+                await subscriber.connect()
+            await asyncio.sleep(0.01)
+            for notification in notifications:
+                await publisher.publish(notification)
+
+            # all subscribers get all notifications in order
+            results = []
+            for subscriber in subscribers:
+                results.append([await subscriber.get() for _ in notifications])
+
+            # iteration stops when the publisher is closed
+            publisher.close()
+            results.append([notification async for notification in subscribers[0]])
+            return results
+
+        try:
+            results = self.loop.run_until_complete(_run())
+        finally:
+            for subscriber in subscribers:
+                subscriber.close()
+
+        self.assertEqual([notifications, notifications, []], results)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+# Copyright 2021 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from iconservice.utils.hashing.hash_generator import HashGenerator, RootHashGenerator
+
+from tbears.block_manager.hash_utils import (
+    EMPTY_ROOT_HASH, MerkleRoot, TRANSACTION_HASH_SALT, VOTE_HASH_SALT, generate_hash, get_hash
+)
+from tbears.block_manager.transaction import Transaction, get_tx_leaf_hash
+
+
+def make_tx(i: int) -> dict:
+    return {
+        "version": "0x3",
+        "from": f"hx{i:040x}",
+        "to": f"hx{i + 1:040x}",
+        "value": hex(i),
+        "stepLimit": "0x100000",
+        "timestamp": hex(1600000000000000 + i),
+        "nid": "0x3",
+        "nonce": hex(i),
+        "txHash": f"{i:064x}"
+    }
+
+
+def legacy_generate_hash(data: list, salt: str = TRANSACTION_HASH_SALT):
+    # implementation of generate_hash with iconservice MerkleTree
+    if not data:
+        return "0" * 64
+    HashGenerator._SALT = salt
+    values = []
+    for elem in data:
+        if isinstance(elem, dict):
+            value = HashGenerator.generate_hash(elem)
+        elif elem is None:
+            continue
+        else:
+            value = elem
+        values.append(value)
+    return RootHashGenerator.generate_root_hash(values, True).hex()
+
+
+class TestHashUtils(unittest.TestCase):
+    def tearDown(self):
+        HashGenerator._SALT = TRANSACTION_HASH_SALT
+
+    def test_get_hash(self):
+        tx = make_tx(1)
+        tx['data'] = {"method": "transfer", "params": {"_to": None, "_value": ["0x1", {"a.b": "[c]"}]}}
+        for salt in (TRANSACTION_HASH_SALT, VOTE_HASH_SALT, None):
+            HashGenerator._SALT = salt
+            self.assertEqual(HashGenerator.generate_hash(tx), get_hash(tx, salt))
+
+    def test_concurrent_generate_hash(self):
+        txs = [make_tx(i) for i in range(200)]
+        expected = {salt: legacy_generate_hash(txs, salt) for salt in (TRANSACTION_HASH_SALT, VOTE_HASH_SALT)}
+
+        # hashes with different salts don't interfere with each other
+        salts = [TRANSACTION_HASH_SALT, VOTE_HASH_SALT] * 20
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda salt: generate_hash(txs, salt), salts))
+        self.assertEqual([expected[salt] for salt in salts], results)
+
+    def test_generate_hash(self):
+        self.assertEqual(EMPTY_ROOT_HASH, generate_hash([]))
+        self.assertEqual(EMPTY_ROOT_HASH, generate_hash(None))
+
+        # odd and even number of leaves in each level
+        for count in list(range(1, 34)) + [100, 1000]:
+            txs = [make_tx(i) for i in range(count)]
+            self.assertEqual(legacy_generate_hash(txs), generate_hash(txs), count)
+
+        # bytes elements, None elements and salt
+        reps = [f'00{i:040x}'.encode() for i in range(22)]
+        self.assertEqual(legacy_generate_hash(reps), generate_hash(reps))
+        txs = [make_tx(0), None, make_tx(1), make_tx(2), None]
+        self.assertEqual(legacy_generate_hash(txs, "icx_vote"), generate_hash(txs, "icx_vote"))
+
+    def test_merkle_root(self):
+        txs = [make_tx(i) for i in range(77)]
+        expected = generate_hash(txs)
+
+        # incremental
+        merkle_root = MerkleRoot()
+        self.assertIsNone(merkle_root.digest())
+        self.assertEqual(EMPTY_ROOT_HASH, merkle_root.hexdigest())
+        for i, tx in enumerate(txs):
+            merkle_root.add(tx)
+            self.assertEqual(generate_hash(txs[:i + 1]), merkle_root.hexdigest())
+        self.assertEqual(len(txs), len(merkle_root))
+
+        # None is ignored
+        merkle_root.add(None)
+        self.assertEqual(len(txs), len(merkle_root))
+        self.assertEqual(expected, merkle_root.hexdigest())
+
+        # batch
+        merkle_root = MerkleRoot()
+        merkle_root.extend(txs[:30])
+        merkle_root.extend(txs[30:])
+        self.assertEqual(expected, merkle_root.hexdigest())
+
+        # leaves of transaction records
+        tx_records = [Transaction(tx['txHash'], tx) for tx in txs]
+        merkle_root = MerkleRoot()
+        merkle_root.extend_leaves([get_tx_leaf_hash(tx) for tx in tx_records])
+        self.assertEqual(expected, merkle_root.hexdigest())
+        self.assertEqual(tx_records[3].leaf_hash, get_tx_leaf_hash(txs[3]))
+
+
+if __name__ == "__main__":
+    unittest.main()
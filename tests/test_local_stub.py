@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+# Copyright 2021 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import unittest
+
+from earlgrey import MessageQueueException, MessageQueueType, message_queue_task
+
+from tbears.block_manager.local_stub import LocalStub
+
+
+class SampleTask(object):
+    def __init__(self):
+        self.requests = []
+        self.notified = []
+
+    @message_queue_task
+    async def echo(self, request: dict, suffix: str = '!') -> dict:
+        self.requests.append(request)
+        request['message'] += suffix
+        return request
+
+    @message_queue_task
+    async def fail(self):
+        raise ValueError('failed')
+
+    @message_queue_task(type_=MessageQueueType.Worker)
+    async def notify(self, value: int):
+        self.notified.append(value)
+
+    async def not_task(self):
+        pass
+
+
+class TestLocalStub(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.get_event_loop()
+        self.task = SampleTask()
+        self.stub = LocalStub(self.task)
+        self.loop.run_until_complete(self.stub.connect())
+
+    def test_rpc(self):
+        request = {'message': 'hello'}
+        result = self.loop.run_until_complete(self.stub.async_task().echo(request))
+        self.assertEqual({'message': 'hello!'}, result)
+        result = self.loop.run_until_complete(self.stub.async_task().echo(request, suffix='?'))
+        self.assertEqual({'message': 'hello?'}, result)
+
+        # parameters and results are copied like message queue
+        self.assertEqual({'message': 'hello'}, request)
+        self.assertIsNot(self.task.requests[0], result)
+
+        self.assertRaises(MessageQueueException, self.loop.run_until_complete, self.stub.async_task().fail())
+        self.assertFalse(hasattr(self.stub.async_task(), 'not_task'))
+
+    def test_worker(self):
+        async def _notify():
+            await self.stub.async_task().notify(1)
+            await asyncio.sleep(0)
+
+        self.loop.run_until_complete(_notify())
+        self.assertEqual([1], self.task.notified)
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+# Copyright 2021 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import os
+import shutil
+import unittest
+
+from iconservice.base.address import Address
+from iconservice.iconscore.icon_score_event_log import EventLogEmitter
+from iconservice.utils.bloom import BloomFilter
+
+from tbears.block_manager.block import Block
+from tbears.block_manager.log_query import LogFilter, LogQuery
+
+SCORE1 = f'cx{"1" * 40}'
+SCORE2 = f'cx{"2" * 40}'
+TRANSFER = 'Transfer(Address,Address,int)'
+APPROVAL = 'Approval(Address,Address,int)'
+
+
+def make_bloom(event_logs: list) -> str:
+    bloom = BloomFilter()
+    for event_log in event_logs:
+        bloom.add(EventLogEmitter.get_ordered_bytes(0xff, Address.from_string(event_log['scoreAddress'])))
+        for i, indexed in enumerate(event_log['indexed']):
+            bloom.add(EventLogEmitter.get_ordered_bytes(i, indexed))
+    return hex(int(bloom))
+
+
+class TestLogQuery(unittest.TestCase):
+    DB_PATH = './testdb'
+
+    def setUp(self):
+        self.block = None
+
+    def tearDown(self):
+        if self.block is not None:
+            self.block.db.close()
+        if os.path.exists(self.DB_PATH):
+            shutil.rmtree(self.DB_PATH)
+
+    def _save_blocks(self, events: list):
+        """
+        Save a block for each item of events. Each transaction emits an event log with the SCORE address and event
+        :param events: list of (SCORE address, event signature) list. None for a transaction without event log
+        """
+        for event_list in events:
+            height = self.block.block_height + 1
+            block_hash = f'{height:064x}'
+            tx_list, tx_results, event_logs = [], [], []
+            for i, event in enumerate(event_list):
+                tx_hash = f'{height:032x}{i:032x}'
+                tx_list.append({'txHash': tx_hash})
+                logs = [] if event is None else [{'scoreAddress': event[0], 'indexed': [event[1], f'hx{"a" * 40}'],
+                                                  'data': [hex(i)]}]
+                event_logs.extend(logs)
+                tx_results.append({'txHash': tx_hash, 'blockHeight': hex(height), 'txIndex': hex(i),
+                                   'eventLogs': logs, 'logsBloom': make_bloom(logs)})
+
+            with self.block.batch():
+                self.block.save_txresults(tx_results, block_hash)
+                self.block.save_transactions(tx_list, block_hash)
+                self.block.save_block({'hash': block_hash, 'height': height, 'logsBloom': make_bloom(event_logs),
+                                       'transactions': tx_list})
+                self.block.commit_block(block_hash)
+
+    def test_log_filter(self):
+        event_log = {'scoreAddress': SCORE1, 'indexed': [TRANSFER], 'data': []}
+        bloom = make_bloom([event_log])
+
+        self.assertTrue(LogFilter().may_contain(bloom))
+        self.assertTrue(LogFilter(SCORE1, TRANSFER).may_contain(bloom))
+        self.assertFalse(LogFilter(SCORE2).may_contain(bloom))
+        self.assertFalse(LogFilter(event=APPROVAL).may_contain(bloom))
+        self.assertFalse(LogFilter().may_contain('0x0'))
+
+        self.assertTrue(LogFilter(SCORE1, TRANSFER).matches(event_log))
+        self.assertFalse(LogFilter(SCORE1, APPROVAL).matches(event_log))
+        self.assertFalse(LogFilter(SCORE2).matches(event_log))
+
+    def _test_query(self, log_index: bool):
+        self.block = Block(db_path=f'{self.DB_PATH}/tbears', log_index=log_index)
+        self._save_blocks([
+            [(SCORE1, TRANSFER), None],
+            [None],
+            [(SCORE2, TRANSFER), (SCORE1, APPROVAL), (SCORE1, TRANSFER)],
+            []
+        ])
+        query = LogQuery(self.block)
+
+        logs = query.query(address=SCORE1, event=TRANSFER)
+        self.assertEqual([('0x0', '0x0'), ('0x2', '0x2')], [(log['blockHeight'], log['txIndex']) for log in logs])
+        self.assertEqual({'blockHeight': '0x2', 'txHash': f'0x{2:032x}{2:032x}', 'txIndex': '0x2', 'logIndex': '0x0',
+                          'scoreAddress': SCORE1, 'indexed': [TRANSFER, f'hx{"a" * 40}'], 'data': ['0x2']}, logs[1])
+
+        # block range and limit
+        self.assertEqual(['0x2'], [log['blockHeight'] for log in query.query(start=1, address=SCORE1, event=TRANSFER)])
+        self.assertEqual(['0x0'], [log['blockHeight'] for log in query.query(end=1, address=SCORE1, event=TRANSFER)])
+        self.assertEqual(1, len(query.query(address=SCORE1, event=TRANSFER, limit=1)))
+
+        # partial filters
+        self.assertEqual(3, len(query.query(address=SCORE1)))
+        self.assertEqual(3, len(query.query(event=TRANSFER)))
+        self.assertEqual(4, len(query.query()))
+        self.assertEqual([], query.query(address=SCORE2, event=APPROVAL))
+
+    def test_query_scan(self):
+        self._test_query(log_index=False)
+        self.assertFalse(self.block.is_log_indexed(0))
+
+    def test_query_index(self):
+        self._test_query(log_index=True)
+        self.assertTrue(self.block.is_log_indexed(0))
+        self.assertEqual([(2, 2, 0, f'{2:032x}{2:032x}')],
+                         list(self.block.iter_log_index(SCORE1, TRANSFER, start=1, end=3)))
+
+        # pruned transactions are removed from log index. genesis block is not pruned
+        self.block.prune(stop_height=3)
+        self.assertEqual([0], [entry[0] for entry in self.block.iter_log_index(SCORE1, TRANSFER, start=0, end=3)])
+
+        # log index restarts when it is enabled again
+        self.block.db.close()
+        self.block = Block(db_path=f'{self.DB_PATH}/tbears', log_index=False)
+        self.block.db.close()
+        self.block = Block(db_path=f'{self.DB_PATH}/tbears', log_index=True)
+        self.assertFalse(self.block.is_log_indexed(0))
+        self._save_blocks([[(SCORE1, TRANSFER)]])
+        self.assertFalse(self.block.is_log_indexed(3))
+        self.assertTrue(self.block.is_log_indexed(4))
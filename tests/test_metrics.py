@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+# Copyright 2021 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import os
+import shutil
+import tempfile
+import unittest
+
+from tbears.block_manager.metrics import Histogram, Metrics
+
+
+class TestMetrics(unittest.TestCase):
+
+    def test_histogram(self):
+        histogram = Histogram('latency', 'test', buckets=(1, 5, 10))
+        for value in (0.5, 1, 3, 7, 20):
+            histogram.observe(value)
+
+        self.assertEqual({'buckets': {'1': 2, '5': 3, '10': 4, '+Inf': 5}, 'count': 5, 'sum': 31.5},
+                         histogram.to_dict())
+        self.assertEqual(['latency_bucket{le="1"} 2', 'latency_bucket{le="5"} 3', 'latency_bucket{le="10"} 4',
+                          'latency_bucket{le="+Inf"} 5', 'latency_sum 31.5', 'latency_count 5'],
+                         histogram.to_prometheus())
+
+        with histogram.time():
+            pass
+        self.assertEqual(6, histogram.count)
+        self.assertEqual(3, histogram.to_dict()['buckets']['1'])
+
+    def test_prometheus(self):
+        metrics = Metrics()
+        metrics.txs_received.inc(3)
+        metrics.tx_pool_depth.set(2)
+        metrics.block_tx_count.observe(3)
+
+        self.assertEqual(3, metrics.to_dict()['transactions_received_total'])
+        self.assertEqual(1, metrics.to_dict()['block_tx_count']['count'])
+
+        text = metrics.to_prometheus()
+        self.assertIn('# TYPE tbears_transactions_received_total counter\ntbears_transactions_received_total 3\n',
+                      text)
+        self.assertIn('# TYPE tbears_tx_pool_depth gauge\ntbears_tx_pool_depth 2\n', text)
+        self.assertIn('tbears_block_tx_count_bucket{le="10"} 1\n', text)
+
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmp_dir, 'metrics.prom')
+            metrics.write_prometheus(path)
+            with open(path) as f:
+                self.assertEqual(text, f.read())
+            self.assertEqual(['metrics.prom'], os.listdir(tmp_dir))
+        finally:
+            shutil.rmtree(tmp_dir)
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+# Copyright 2021 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import json
+import os
+import shutil
+from unittest.mock import patch
+
+from tbears.block_manager.block import Block
+from tbears.block_manager.block_codec import is_compact
+from tbears.command.command_server import CommandServer
+from tbears.tbears_exception import TBearsCommandException
+
+from tests.test_parsing_command import TestCommand
+from tests.test_util import TEST_UTIL_DIRECTORY
+
+
+class TestCommandDb(TestCommand):
+    DB_PATH = './testdb'
+
+    def tearDown(self):
+        if os.path.exists(self.DB_PATH):
+            shutil.rmtree(self.DB_PATH)
+
+    def test_migrate_args_parsing(self):
+        config_path = os.path.join(TEST_UTIL_DIRECTORY, 'test_tbears_server_config.json')
+
+        # Parsing test
+        cmd = f'db migrate -e json -c {config_path}'
+        parsed = self.parser.parse_args(cmd.split())
+        self.assertEqual(parsed.command, 'db')
+        self.assertEqual(parsed.db_command, 'migrate')
+        self.assertEqual(parsed.encoding, 'json')
+        self.assertEqual(parsed.config, config_path)
+
+        # default encoding
+        parsed = self.parser.parse_args('db migrate'.split())
+        self.assertEqual(parsed.encoding, 'msgpack')
+
+        # db command is required
+        self.assertRaises(SystemExit, self.parser.parse_args, 'db'.split())
+
+        # Invalid encoding
+        cmd = f'db migrate -e xml'
+        self.assertRaises(SystemExit, self.parser.parse_args, cmd.split())
+
+    @patch.object(CommandServer, 'is_service_running', return_value=False)
+    def test_migrate(self, _):
+        block = Block(f'{self.DB_PATH}/tbears')
+        block.save_transactions([{'txHash': 'ab' * 32, 'from': 'hx' + '1' * 40}], '0c' * 32)
+        block.save_txresults([{'txHash': 'ab' * 32, 'status': '0x1'}], '0c' * 32)
+        block.db.close()
+
+        conf = {'stateDbRootPath': self.DB_PATH, 'encoding': 'msgpack'}
+        self.cmd.cmdDb.migrate(conf)
+
+        block = Block(f'{self.DB_PATH}/tbears')
+        try:
+            values = [value for _, value in block.db.iterator()]
+            self.assertEqual(2, len([value for value in values if is_compact(value)]))
+            self.assertEqual('hx' + '1' * 40, block.get_transaction('ab' * 32)['transaction']['from'])
+        finally:
+            block.db.close()
+
+        # tbears service must be stopped
+        with patch.object(CommandServer, 'is_service_running', return_value=True):
+            self.assertRaises(TBearsCommandException, self.cmd.cmdDb.migrate, conf)
+
+        # block DB must exist
+        conf['stateDbRootPath'] = './not_exists'
+        self.assertRaises(TBearsCommandException, self.cmd.cmdDb.migrate, conf)
+
+    def test_export_args_parsing(self):
+        config_path = os.path.join(TEST_UTIL_DIRECTORY, 'test_tbears_server_config.json')
+
+        # Parsing test
+        cmd = f'db export -s 10 -e 0x20 -o blocks.ndjson -c {config_path}'
+        parsed = self.parser.parse_args(cmd.split())
+        self.assertEqual(parsed.db_command, 'export')
+        self.assertEqual(parsed.start, '0xa')
+        self.assertEqual(parsed.end, '0x20')
+        self.assertEqual(parsed.output, 'blocks.ndjson')
+        self.assertEqual(parsed.config, config_path)
+
+        # default range
+        parsed = self.parser.parse_args('db export'.split())
+        self.assertEqual(parsed.start, '0x0')
+        self.assertIsNone(parsed.end)
+        self.assertIsNone(parsed.output)
+
+        # Invalid height
+        cmd = f'db export -s -1'
+        self.assertRaises(SystemExit, self.parser.parse_args, cmd.split())
+
+    @patch.object(CommandServer, 'is_service_running', return_value=False)
+    def test_export(self, _):
+        block = Block(f'{self.DB_PATH}/tbears', encoding='msgpack')
+        blocks = []
+        for height in range(3):
+            block_data = {'hash': f'{height:064x}', 'height': height, 'transactions': []}
+            block.save_block(block_data)
+            block.commit_block(block_data['hash'])
+            blocks.append(block_data)
+        block.db.close()
+
+        output = f'{self.DB_PATH}/blocks.ndjson'
+        conf = {'stateDbRootPath': self.DB_PATH, 'start': '0x1', 'end': None, 'output': output}
+        self.cmd.cmdDb.export(conf)
+
+        with open(output) as f:
+            self.assertEqual(blocks[1:], [json.loads(line) for line in f])
@@ -34,6 +34,11 @@ class TestCommandServer(TestCommand):
         self.assertEqual(str(parsed.hostAddress), hostAddress)
         self.assertEqual(int(parsed.port), port)
         self.assertEqual(parsed.config, config_path)
+        self.assertIsNone(parsed.embedded)
+
+        cmd = f'start --embedded'
+        parsed = self.parser.parse_args(cmd.split())
+        self.assertTrue(parsed.embedded)
 
         # Too many arguments (start cli doesn't need argument)
         cmd = f'start wrongArgument'
@@ -64,3 +69,45 @@ class TestCommandServer(TestCommand):
         # Wrong option (stop cli has no option)
         cmd = f'stop -w wrongOption'
         self.assertRaises(SystemExit, self.parser.parse_args, cmd.split())
+
+    def test_logs_args_parsing(self):
+        score_address = f'cx{"1" * 40}'
+
+        # Parsing test
+        cmd = f'logs -s 1 -e 0x10 -a {score_address} -v Transfer(Address,int) -l 10'
+        parsed = self.parser.parse_args(cmd.split())
+        self.assertEqual(parsed.command, 'logs')
+        self.assertEqual(parsed.start, '0x1')
+        self.assertEqual(parsed.end, '0x10')
+        self.assertEqual(parsed.address, score_address)
+        self.assertEqual(parsed.event, 'Transfer(Address,int)')
+        self.assertEqual(parsed.limit, '0xa')
+
+        # default options
+        parsed = self.parser.parse_args('logs'.split())
+        self.assertEqual(parsed.start, '0x0')
+        self.assertIsNone(parsed.end)
+        self.assertIsNone(parsed.address)
+        self.assertIsNone(parsed.event)
+        self.assertEqual(parsed.limit, '0x64')
+
+        # Invalid SCORE address
+        cmd = f'logs -a hx{"1" * 40}'
+        self.assertRaises(SystemExit, self.parser.parse_args, cmd.split())
+
+        # Invalid block height
+        cmd = f'logs -s -1'
+        self.assertRaises(SystemExit, self.parser.parse_args, cmd.split())
+
+    def test_watch_args_parsing(self):
+        parsed = self.parser.parse_args('watch -n 3'.split())
+        self.assertEqual(parsed.command, 'watch')
+        self.assertEqual(parsed.count, '0x3')
+
+        # default options
+        parsed = self.parser.parse_args('watch'.split())
+        self.assertEqual(parsed.count, '0x0')
+
+        # Invalid count
+        cmd = f'watch -n -1'
+        self.assertRaises(SystemExit, self.parser.parse_args, cmd.split())
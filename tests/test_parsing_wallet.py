@@ -404,6 +404,35 @@ class TestWalletParsing(TestCommand):
         cmd = f'txbyhash {invalid_hash}'
         self.assertRaises(SystemExit, self.parser.parse_args, cmd.split())
 
+    def test_txbyaddress_args_parsing(self):
+        address = keystore_test1['address']
+        node_uri = 'http://localhost:9999/api/v3'
+        config = os.path.join(TEST_UTIL_DIRECTORY, 'test_tbears_cli_config.json')
+        cmd = f'txbyaddress {address} -i 0x10 -u {node_uri} -c {config}'
+        parsed = self.parser.parse_args(cmd.split())
+
+        self.assertEqual(parsed.command, 'txbyaddress')
+        self.assertEqual(parsed.address, address)
+        self.assertEqual(parsed.index, '0x10')
+        self.assertEqual(parsed.uri, node_uri)
+        self.assertEqual(parsed.config, config)
+
+        # default index
+        parsed = self.parser.parse_args(f'txbyaddress {address}'.split())
+        self.assertEqual(parsed.index, '0x0')
+
+        # SCORE address
+        parsed = self.parser.parse_args(f'txbyaddress cx{address[2:]}'.split())
+        self.assertEqual(parsed.address, f'cx{address[2:]}')
+
+        # given invalid address
+        cmd = f'txbyaddress ax{address[2:]}'
+        self.assertRaises(SystemExit, self.parser.parse_args, cmd.split())
+
+        # given invalid index
+        cmd = f'txbyaddress {address} -i -1'
+        self.assertRaises(SystemExit, self.parser.parse_args, cmd.split())
+
     # sendtx
     def test_sendtx_args_parsing(self):
         node_uri = 'http://localhost:9999/api/v3'
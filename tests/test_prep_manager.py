@@ -15,6 +15,7 @@
 import unittest
 
 from tbears.block_manager.block_manager import PRepManager
+from tbears.block_manager.hash_utils import EMPTY_ROOT_HASH, generate_hash
 from tbears.config.tbears_config import keystore_test1
 
 
@@ -59,3 +60,39 @@ class TestTBearsPRepManager(unittest.TestCase):
         self.assertEqual(PREP_LIST[1].get('id'), info.get('prevBlockGenerator'))
         self.assertEqual(len(PREP_LIST) - 1, len(info.get('prevBlockValidators')))
         self.assertEqual(PREP_LIST[0].get('id'), info.get('prevBlockValidators')[0])
+
+    def test_reps_hash(self):
+        def make_hash(preps: list) -> str:
+            return generate_hash([f'00{prep["id"][2:]}'.encode() for prep in preps])
+
+        preps = [{"id": f"hx{i:040x}"} for i in range(5)]
+        manager = PRepManager(is_generator_rotation=True, gen_count_per_leader=1)
+        self.assertEqual(EMPTY_ROOT_HASH, manager.get_reps_hash())
+        self.assertEqual(EMPTY_ROOT_HASH, manager.get_next_reps_hash())
+
+        # new P-Rep set
+        manager.register_preps({"preps": preps})
+        self.assertEqual(EMPTY_ROOT_HASH, manager.get_reps_hash())
+        self.assertEqual(make_hash(preps), manager.get_next_reps_hash())
+        manager.commit_preps()
+        self.assertEqual(make_hash(preps), manager.get_reps_hash())
+
+        # rotate twice around the ring. both hashes follow the order of the current set
+        for i in range(1, len(preps) * 2 + 1):
+            info = manager.get_prev_block_contributors_info()
+            rotated = preps[i % len(preps):] + preps[:i % len(preps)]
+            self.assertEqual([prep['id'] for prep in rotated], [prep['id'] for prep in manager.prep_list])
+            self.assertEqual(rotated[0]['id'], manager.generator)
+            self.assertEqual(len(preps) - 1, len(info['prevBlockValidators']))
+            self.assertEqual(make_hash(rotated), manager.get_next_reps_hash())
+            self.assertEqual(make_hash(rotated), manager.get_reps_hash())
+            manager.commit_preps()
+
+        # next term. previous set is kept until the block is made
+        new_preps = preps[2:]
+        manager.register_preps({"preps": new_preps})
+        self.assertEqual(make_hash(new_preps), manager.get_next_reps_hash())
+        self.assertEqual(make_hash(preps), manager.get_reps_hash())
+        manager.commit_preps()
+        self.assertEqual(make_hash(new_preps), manager.get_reps_hash())
+        self.assertEqual(new_preps, manager.prev_preps)
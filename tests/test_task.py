@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+# Copyright 2021 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import unittest
+
+from tbears.block_manager.task import Immediate, Hybrid
+
+
+class TestImmediate(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.get_event_loop()
+        self.count = 0
+
+    async def _work(self):
+        self.count += 1
+        await asyncio.sleep(0.01)
+
+    def test_coalesce(self):
+        async def _test():
+            immediate = Immediate()
+            await immediate.start()
+
+            # idle task waits for the work without running
+            await asyncio.sleep(0.05)
+            self.assertEqual(0, self.count)
+
+            # requests added before the task wakes up are coalesced
+            immediate.add_func(self._work)
+            immediate.add_func(self._work)
+            immediate.add_func(self._work)
+            await asyncio.sleep(0.05)
+            self.assertEqual(1, self.count)
+
+            # request added while working is processed after the work
+            immediate.add_func(self._work)
+            await asyncio.sleep(0)
+            immediate.add_func(self._work)
+            await asyncio.sleep(0.05)
+            self.assertEqual(3, self.count)
+
+            await immediate.stop()
+
+        self.loop.run_until_complete(_test())
+
+
+class TestHybrid(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.get_event_loop()
+        self.pending = []
+        self.blocks = []
+
+    async def _work(self):
+        self.blocks.append(list(self.pending[:3]))
+        del self.pending[:3]
+
+    def _get_pending(self):
+        return len(self.pending), len(self.pending) * 100
+
+    def test_trigger(self):
+        async def _test():
+            hybrid = Hybrid(func=self._work, interval=0.5, linger=0.1, get_pending=self._get_pending,
+                            max_count=3, max_bytes=0)
+            await hybrid.start()
+
+            # linger time
+            self.pending.append(1)
+            hybrid.notify()
+            await asyncio.sleep(0.05)
+            self.assertEqual([], self.blocks)
+            await asyncio.sleep(0.1)
+            self.assertEqual([[1]], self.blocks)
+
+            # count limit. remains are confirmed after linger time
+            self.pending.extend([2, 3, 4, 5])
+            hybrid.notify()
+            await asyncio.sleep(0.01)
+            self.assertEqual([[1], [2, 3, 4]], self.blocks)
+            await asyncio.sleep(0.15)
+            self.assertEqual([[1], [2, 3, 4], [5]], self.blocks)
+
+            # interval without pending items
+            await asyncio.sleep(0.5)
+            self.assertEqual([[1], [2, 3, 4], [5], []], self.blocks)
+
+            await hybrid.stop()
+
+        self.loop.run_until_complete(_test())
+
+    def test_bytes_limit(self):
+        async def _test():
+            hybrid = Hybrid(func=self._work, interval=10, linger=10, get_pending=self._get_pending,
+                            max_count=0, max_bytes=200)
+            await hybrid.start()
+
+            self.pending.append(1)
+            hybrid.notify()
+            await asyncio.sleep(0.01)
+            self.assertEqual([], self.blocks)
+
+            self.pending.append(2)
+            hybrid.notify()
+            await asyncio.sleep(0.01)
+            self.assertEqual([[1, 2]], self.blocks)
+
+            await hybrid.stop()
+
+        self.loop.run_until_complete(_test())
@@ -73,3 +73,24 @@ class TestTBearsDB(unittest.TestCase):
             expected_value = ('value' + str(i)).encode()
             self.assertEqual(expected_value, actual_value)
             i += 1
+
+    def test_db_options(self):
+        options = {
+            "lruCacheSize": 1024 * 1024,
+            "bloomFilterBits": 10,
+            "writeBufferSize": 1024 * 1024,
+            "maxOpenFiles": 100,
+            "compression": None
+        }
+        self.assertEqual({'lru_cache_size': 1024 * 1024, 'bloom_filter_bits': 10, 'write_buffer_size': 1024 * 1024,
+                          'max_open_files': 100, 'compression': None}, TbearsDB.get_db_options(options))
+        self.assertEqual({}, TbearsDB.get_db_options(None))
+
+        # reopen with options
+        self.TBEARS_DB.put(self.test_key, self.test_value)
+        self.TBEARS_DB.close()
+        self.TBEARS_DB = TbearsDB(TbearsDB.make_db(DB_PATH, options=options))
+        self.assertEqual(self.test_value, self.TBEARS_DB.get(self.test_key))
+
+        # invalid option
+        self.assertRaises(ValueError, TbearsDB.get_db_options, {'invalid': 1})
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+# Copyright 2021 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import unittest
+
+from tbears.block_manager.tx_pool import TxPool
+
+
+class TestTxPool(unittest.TestCase):
+
+    def test_add_and_clear(self):
+        pool = TxPool()
+        for i in range(5):
+            self.assertTrue(pool.add(f'{i:02}', {'txHash': f'{i:02}'}))
+        self.assertEqual(5, len(pool))
+        self.assertIn('03', pool)
+        self.assertNotIn('05', pool)
+        self.assertEqual({'txHash': '03'}, pool.get('03'))
+
+        # duplicated transaction
+        self.assertFalse(pool.add('03', {'txHash': '03'}))
+        self.assertEqual(5, len(pool))
+
+        # clear returns transactions in arrival order
+        tx_list = pool.clear()
+        self.assertEqual([f'{i:02}' for i in range(5)], [tx['txHash'] for tx in tx_list])
+        self.assertEqual(0, len(pool))
+        self.assertNotIn('03', pool)
+
+    def test_max_size(self):
+        pool = TxPool(max_size=2)
+        self.assertTrue(pool.add('01', {}))
+        self.assertFalse(pool.is_full())
+        self.assertTrue(pool.add('02', {}))
+        self.assertTrue(pool.is_full())
+        self.assertFalse(pool.add('03', {}))
+        self.assertEqual(2, len(pool))
+
+        pool.clear()
+        self.assertFalse(pool.is_full())
+        self.assertTrue(pool.add('03', {}))
+
+    def test_pop(self):
+        pool = TxPool()
+        for i in range(10):
+            pool.add(f'{i:02}', {'txHash': f'{i:02}'}, size=100)
+        self.assertEqual(1000, pool.size_in_bytes)
+
+        # limited by count
+        tx_list = pool.pop(max_count=3)
+        self.assertEqual(['00', '01', '02'], [tx['txHash'] for tx in tx_list])
+        self.assertEqual(7, len(pool))
+        self.assertEqual(700, pool.size_in_bytes)
+
+        # limited by bytes
+        tx_list = pool.pop(max_count=10, max_bytes=250)
+        self.assertEqual(['03', '04'], [tx['txHash'] for tx in tx_list])
+        self.assertEqual(500, pool.size_in_bytes)
+
+        # the first transaction is popped even if it is bigger than max_bytes
+        pool.add('big', {'txHash': 'big'}, size=1000)
+        tx_list = pool.pop(max_bytes=50)
+        self.assertEqual(['05'], [tx['txHash'] for tx in tx_list])
+
+        # no limit
+        tx_list = pool.pop()
+        self.assertEqual(['06', '07', '08', '09', 'big'], [tx['txHash'] for tx in tx_list])
+        self.assertEqual(0, len(pool))
+        self.assertEqual(0, pool.size_in_bytes)
+
+    def test_restore(self):
+        pool = TxPool()
+        for i in range(5):
+            pool.add(f'{i:02}', {'txHash': f'{i:02}'}, size=100)
+        tx_list = pool.pop(max_count=3)
+        pool.add('05', {'txHash': '05'}, size=100)
+
+        # restored transactions are put back at the head in the given order
+        pool.restore([(tx['txHash'], tx, 100) for tx in tx_list])
+        self.assertEqual(600, pool.size_in_bytes)
+        tx_list = pool.pop()
+        self.assertEqual(['00', '01', '02', '03', '04', '05'], [tx['txHash'] for tx in tx_list])
+
+        # transactions already in pool are skipped
+        pool.add('00', {'txHash': '00'}, size=100)
+        pool.restore([('00', {'txHash': '00'}, 100), ('01', {'txHash': '01'}, 100)])
+        self.assertEqual(2, len(pool))
+        self.assertEqual(200, pool.size_in_bytes)
+        self.assertEqual(['01', '00'], [tx['txHash'] for tx in pool.pop()])
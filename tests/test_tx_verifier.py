@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+# Copyright 2021 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import base64
+import hashlib
+import unittest
+
+from iconsdk.wallet.wallet import KeyWallet
+
+from tbears.block_manager.tx_verifier import SignatureVerifier, verify_tx_signature
+
+
+class TestSignatureVerifier(unittest.TestCase):
+
+    def setUp(self):
+        self.wallets = [KeyWallet.create() for _ in range(3)]
+        self.requests = []
+        for i in range(20):
+            wallet = self.wallets[i % len(self.wallets)]
+            data = f'icx_sendTransaction.nonce.{i}'.encode()
+            signature = wallet.sign(hashlib.sha3_256(data).digest())
+            self.requests.append((data, base64.b64encode(signature).decode(), wallet.get_address()))
+
+    def _verify_all(self, verifier: 'SignatureVerifier', requests: list) -> list:
+        async def _verify():
+            return await asyncio.gather(*[verifier.verify(*request) for request in requests])
+
+        return asyncio.get_event_loop().run_until_complete(_verify())
+
+    def test_verify_tx_signature(self):
+        data, signature, sender = self.requests[0]
+        self.assertTrue(verify_tx_signature(data, signature, sender))
+        self.assertFalse(verify_tx_signature(data + b'.', signature, sender))
+        self.assertFalse(verify_tx_signature(data, signature, self.wallets[1].get_address()))
+        self.assertFalse(verify_tx_signature(data, 'invalid signature', sender))
+
+    def test_verify_in_batch(self):
+        requests = list(self.requests)
+        # tamper every third request
+        for i in range(0, len(requests), 3):
+            data, signature, _ = requests[i]
+            requests[i] = (data, signature, self.wallets[(i + 1) % len(self.wallets)].get_address())
+        expected = [i % 3 != 0 for i in range(len(requests))]
+
+        for workers, batch_size in ((0, 1), (2, 1), (2, 8), (4, 64)):
+            verifier = SignatureVerifier(workers=workers, batch_size=batch_size)
+            try:
+                self.assertEqual(expected, self._verify_all(verifier, requests))
+            finally:
+                verifier.close()
+
+    def test_verify_many(self):
+        requests = list(self.requests)
+        data, signature, _ = requests[5]
+        # signed by wallets[2]
+        requests[5] = (data, signature, self.wallets[0].get_address())
+        expected = [i != 5 for i in range(len(requests))]
+
+        for workers, batch_size in ((0, 1), (2, 1), (2, 8), (4, 64)):
+            verifier = SignatureVerifier(workers=workers, batch_size=batch_size)
+            try:
+                results = asyncio.get_event_loop().run_until_complete(verifier.verify_many(requests))
+                self.assertEqual(expected, results)
+            finally:
+                verifier.close()
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+# Copyright 2021 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import os
+import shutil
+import stat
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from earlgrey import MessageQueueException, MessageQueueType, message_queue_task
+
+from tbears.block_manager.unix_socket import UnixSocketService, UnixSocketStub, get_unix_socket_path
+
+
+class SampleTask(object):
+    def __init__(self, name: str):
+        self.name = name
+        self.notified = []
+
+    @message_queue_task
+    async def echo(self, request: dict, suffix: str = '!') -> dict:
+        request['message'] += suffix
+        return request
+
+    @message_queue_task
+    async def sleep(self, seconds: float) -> float:
+        await asyncio.sleep(seconds)
+        return seconds
+
+    @message_queue_task
+    async def fail(self):
+        raise ValueError('failed')
+
+    @message_queue_task(type_=MessageQueueType.Worker)
+    async def notify(self, value: int):
+        self.notified.append(value)
+
+
+class SampleStubTask(object):
+    @message_queue_task
+    async def echo(self, request: dict, suffix: str = '!') -> dict:
+        pass
+
+    @message_queue_task
+    async def sleep(self, seconds: float) -> float:
+        pass
+
+    @message_queue_task
+    async def fail(self):
+        pass
+
+    @message_queue_task
+    async def unknown(self):
+        pass
+
+    @message_queue_task(type_=MessageQueueType.Worker)
+    async def notify(self, value: int):
+        pass
+
+
+class SampleService(UnixSocketService[SampleTask]):
+    TaskType = SampleTask
+
+
+class SampleStub(UnixSocketStub[SampleStubTask]):
+    TaskType = SampleStubTask
+
+
+class TestUnixSocket(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.get_event_loop()
+        self.uds_target = tempfile.mkdtemp()
+        path = get_unix_socket_path(self.uds_target, 'Sample.channel.7100')
+        self.service = SampleService(path, name='sample')
+        self.stub = SampleStub(path)
+        self.loop.run_until_complete(self.service.connect())
+        self.loop.run_until_complete(self.stub.connect())
+
+    def tearDown(self):
+        self.stub.close()
+        self.service.close()
+        self.loop.run_until_complete(asyncio.sleep(0))
+        shutil.rmtree(self.uds_target)
+
+    def test_socket_path(self):
+        self.assertEqual('/tmp/tbears/Channel.loopchain_default.7100.sock',
+                         get_unix_socket_path('/tmp/tbears/', 'Channel.loopchain_default.7100'))
+        self.assertEqual(stat.S_IRUSR | stat.S_IWUSR, stat.S_IMODE(os.stat(self.service.path).st_mode))
+
+    def test_rpc(self):
+        request = {'message': 'hello'}
+        result = self.loop.run_until_complete(self.stub.async_task().echo(request))
+        self.assertEqual({'message': 'hello!'}, result)
+        result = self.loop.run_until_complete(self.stub.async_task().echo(request, suffix='?'))
+        self.assertEqual({'message': 'hello?'}, result)
+        self.assertEqual({'message': 'hello'}, request)
+
+        self.assertRaises(MessageQueueException, self.loop.run_until_complete, self.stub.async_task().fail())
+        self.assertRaises(MessageQueueException, self.loop.run_until_complete, self.stub.async_task().unknown())
+
+    def test_concurrent_rpc(self):
+        # responses are matched with requests even if they are returned out of order
+        async def _call():
+            return await asyncio.gather(*[self.stub.async_task().sleep(seconds) for seconds in (0.03, 0.02, 0.01, 0)])
+
+        self.assertEqual([0.03, 0.02, 0.01, 0], self.loop.run_until_complete(_call()))
+
+    def test_worker(self):
+        async def _notify():
+            await self.stub.async_task().notify(1)
+            await self.stub.async_task().notify(2)
+            await self.stub.async_task().echo({'message': ''})
+
+        self.loop.run_until_complete(_notify())
+        self.assertEqual([1, 2], self.service.task.notified)
+
+    def test_sync_task(self):
+        def _echo(message: str):
+            return self.stub.sync_task().echo({'message': message})
+
+        # sync tasks are called in threads while the service runs in the event loop
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            future = self.loop.run_in_executor(executor, lambda: [_echo(str(i)) for i in range(10)])
+            results = self.loop.run_until_complete(future)
+        self.assertEqual([{'message': f'{i}!'} for i in range(10)], results)
+
+    def test_connection_closed(self):
+        async def _call():
+            task = asyncio.ensure_future(self.stub.async_task().sleep(1))
+            await asyncio.sleep(0.05)
+            self.service.close()
+            return await task
+
+        self.assertRaises(ConnectionError, self.loop.run_until_complete, _call())
+        self.assertFalse(os.path.exists(self.service.path))
+
+    def test_connect_fail(self):
+        stub = SampleStub(get_unix_socket_path(self.uds_target, 'Unknown'))
+        self.assertRaises(RuntimeError, self.loop.run_until_complete, stub.connect(connection_attempts=2,
+                                                                                   retry_delay=0.01))
+
+
+if __name__ == "__main__":
+    unittest.main()